@@ -0,0 +1,1189 @@
+"""
+Benchmarks for the shopping cart
+Run with: python benchmarks.py <benchmark> [--lines N]
+
+The suite benchmark times every cart operation at several cart sizes:
+    python benchmarks.py suite --output results.json
+    python benchmarks.py suite --baseline results.json
+The second form compares against stored results and exits with status 1
+if any operation got slower by more than --threshold.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cart_numpy
+from cart_catalog import Catalog, CatalogShoppingCart
+from cart_columnar import ColumnarShoppingCart
+from cart_concurrent import ConcurrentShoppingCart
+from cart_history import CartHistory
+from cart_import import import_orders
+from cart_indexes import CartIndex
+from cart_inventory import Inventory
+from cart_journal import open_cart
+from cart_merge import Changeset, diff, merge
+from cart_pricing import BuyXGetY, CartPricing, Coupon, PercentOff, PricingEngine, Tax, TieredDiscount
+from cart_render import render_total
+from cart_shards import ShardedCartEngine
+from cart_snapshot import CartSnapshot, load_cart, save_cart
+from module8 import ItemToPurchase, ShoppingCart
+from money import Money
+
+
+def make_items(count):
+    """
+    Generates ItemToPurchase objects with a realistic mix of repeated descriptions
+    Parameters:
+        count: Integer number of items to generate
+    """
+    for i in range(count):
+        yield ItemToPurchase(f"Item {i}", 1 + i % 250, 1 + i % 5, f"Description {i % 100}")
+
+
+def measure_memory(build):
+    """
+    Measures the memory still allocated by the object a function builds
+    Parameters:
+        build: Function taking no arguments and returning the object to measure
+    Returns:
+        Integer number of bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def bench_memory(lines):
+    """
+    Compares the memory used by ShoppingCart and ColumnarShoppingCart
+    The items are generated inside the measurement, so the ShoppingCart figure
+    includes the item objects it keeps.
+    Parameters:
+        lines: Integer number of cart lines
+    Returns:
+        Dictionary mapping layout name to bytes used
+    """
+    def build(cart_class):
+        cart = cart_class("Benchmark", "May 11, 2025")
+        for item in make_items(lines):
+            cart.add_item(item)
+        return cart
+
+    # The smallest of a few runs: a run can also be charged for growing
+    # interpreter-wide tables, such as the one sys.intern adds names to
+    return {
+        "objects": min(measure_memory(lambda: build(ShoppingCart)) for _ in range(3)),
+        "columnar": min(measure_memory(lambda: build(ColumnarShoppingCart)) for _ in range(3)),
+    }
+
+
+def print_memory(lines):
+    """
+    Prints the memory benchmark results
+    """
+    results = bench_memory(lines)
+    print(f"Memory for a {lines}-line cart")
+    for layout, size in results.items():
+        print(f"{layout:>10}: {size / 1e6:8.2f} MB  ({size / lines:6.1f} bytes/line)")
+
+
+def best_time(function, repeat=3):
+    """
+    Runs a function several times and returns the fastest run in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_money(lines):
+    """
+    Compares summing line totals with floats and with Money
+    Parameters:
+        lines: Integer number of line totals to sum
+    Returns:
+        Dictionary with the time of each path in seconds and the float error
+    """
+    rng = random.Random(8)
+    cents = [rng.randrange(1, 100_000) for _ in range(lines)]
+    quantities = [rng.randrange(1, 10) for _ in range(lines)]
+    floats = [c / 100 for c in cents]
+    prices = [Money.from_cents(c) for c in cents]
+
+    def float_total():
+        total = 0
+        for price, quantity in zip(floats, quantities):
+            total += price * quantity
+        return total
+
+    def money_total():
+        return Money.total(prices, quantities)
+
+    exact = money_total()
+    return {
+        "float_seconds": best_time(float_total),
+        "money_seconds": best_time(money_total),
+        "float_error_cents": abs(float_total() * 100 - exact.cents),
+    }
+
+
+def print_money(lines):
+    """
+    Prints the money benchmark results
+    """
+    results = bench_money(lines)
+    print(f"Summing {lines} line totals")
+    print(f"   float: {results['float_seconds'] * 1000:8.1f} ms")
+    print(f"   Money: {results['money_seconds'] * 1000:8.1f} ms")
+    print(f"   float drift: {results['float_error_cents']:.6f} cents")
+
+
+def bench_batch(lines, cart_class=ShoppingCart):
+    """
+    Compares the batch cart methods with looping over the single-item methods
+    Parameters:
+        lines: Integer number of items in the batch
+        cart_class: ShoppingCart or a subclass to benchmark
+    Returns:
+        Dictionary mapping "<operation>_<loop|batch>" to seconds
+    """
+    updates = [ItemToPurchase(f"Item {i}", 0, 7) for i in range(lines)]
+    names = [f"Item {i}" for i in range(lines)]
+    results = {}
+
+    def run(label, operation, loaded=True):
+        # Each run gets fresh items, since items added to a cart belong to it
+        items = list(make_items(lines))
+        cart = cart_class()
+        if loaded:
+            cart.add_items(items)
+        start = time.perf_counter()
+        operation(cart, items)
+        results[label] = time.perf_counter() - start
+
+    def add_loop(cart, items):
+        for item in items:
+            cart.add_item(item)
+
+    def modify_loop(cart, items):
+        for item in updates:
+            cart.modify_item(item)
+
+    def remove_loop(cart, items):
+        for name in names:
+            cart.remove_item(name)
+
+    run("add_loop", add_loop, loaded=False)
+    run("add_batch", lambda cart, items: cart.add_items(items), loaded=False)
+    run("modify_loop", modify_loop)
+    run("modify_batch", lambda cart, items: cart.modify_items(updates))
+    run("remove_loop", remove_loop)
+    run("remove_batch", lambda cart, items: cart.remove_items(names))
+    return results
+
+
+def print_batch(lines):
+    """
+    Prints the batch benchmark results for both cart layouts
+    """
+    for cart_class in (ShoppingCart, ColumnarShoppingCart):
+        results = bench_batch(lines, cart_class)
+        print(f"{cart_class.__name__}, {lines} items")
+        for operation in ("add", "modify", "remove"):
+            loop = results[f"{operation}_loop"]
+            batch = results[f"{operation}_batch"]
+            print(f"{operation:>8}: loop {loop * 1000:7.1f} ms, batch {batch * 1000:7.1f} ms")
+
+
+def save_cart_json(cart, path):
+    """
+    Baseline for the snapshot benchmark: writes a cart as JSON
+    """
+    with open(path, "w") as file:
+        json.dump({
+            "customer_name": cart.customer_name,
+            "current_date": cart.current_date,
+            "items": [[item.item_name, item.item_price.cents, item.item_price.whole,
+                       item.item_quantity, item.item_description] for item in cart],
+        }, file)
+
+
+def load_cart_json(path):
+    """
+    Baseline for the snapshot benchmark: reads a cart written by save_cart_json
+    """
+    with open(path) as file:
+        data = json.load(file)
+    cart = ShoppingCart(data["customer_name"], data["current_date"])
+    cart.add_items(ItemToPurchase(name, Money.from_cents(cents, whole), quantity, description)
+                   for name, cents, whole, quantity, description in data["items"])
+    return cart
+
+
+def bench_snapshot(lines):
+    """
+    Compares binary snapshots with JSON for saving, loading and reading totals
+    Parameters:
+        lines: Integer number of cart lines
+    Returns:
+        Dictionary of seconds and file sizes for each format
+    """
+    cart = ShoppingCart("Benchmark", "May 11, 2025")
+    cart.add_items(make_items(lines))
+    with tempfile.TemporaryDirectory() as directory:
+        binary_path = os.path.join(directory, "cart.snap")
+        json_path = os.path.join(directory, "cart.json")
+
+        def snapshot_totals():
+            with CartSnapshot(binary_path) as snapshot:
+                return snapshot.get_cost_of_cart()
+
+        results = {
+            "binary_save": best_time(lambda: save_cart(cart, binary_path)),
+            "json_save": best_time(lambda: save_cart_json(cart, json_path)),
+            "binary_load": best_time(lambda: load_cart(binary_path)),
+            "json_load": best_time(lambda: load_cart_json(json_path)),
+            "binary_totals": best_time(snapshot_totals),
+            "json_totals": best_time(lambda: load_cart_json(json_path).get_cost_of_cart()),
+            "binary_bytes": os.path.getsize(binary_path),
+            "json_bytes": os.path.getsize(json_path),
+        }
+    return results
+
+
+def print_snapshot(lines):
+    """
+    Prints the snapshot benchmark results
+    """
+    results = bench_snapshot(lines)
+    print(f"Snapshot of a {lines}-line cart")
+    for form in ("binary", "json"):
+        print(f"{form:>8}: save {results[form + '_save'] * 1000:8.1f} ms, "
+              f"load {results[form + '_load'] * 1000:8.1f} ms, "
+              f"totals {results[form + '_totals'] * 1000:8.3f} ms, "
+              f"{results[form + '_bytes'] / 1e6:6.2f} MB")
+
+
+def bench_journal(lines):
+    """
+    Measures the cost of journaling cart changes and of replaying them
+    Parameters:
+        lines: Integer number of items added (each is also modified once)
+    Returns:
+        Dictionary of seconds for the plain, journaled and replay runs
+    """
+    def changes(cart):
+        for item in make_items(lines):
+            cart.add_item(item)
+        for i in range(lines):
+            cart.modify_item(ItemToPurchase(f"Item {i}", 0, 3))
+
+    start = time.perf_counter()
+    changes(ShoppingCart())
+    results = {"plain": time.perf_counter() - start}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cart.journal")
+        start = time.perf_counter()
+        cart, journal = open_cart(path)
+        changes(cart)
+        journal.close()
+        results["journaled"] = time.perf_counter() - start
+        start = time.perf_counter()
+        cart, journal = open_cart(path)
+        results["replay"] = time.perf_counter() - start
+        journal.close()
+    return results
+
+
+def print_journal(lines):
+    """
+    Prints the journal benchmark results
+    """
+    results = bench_journal(lines)
+    operations = 2 * lines
+    print(f"{operations} cart changes")
+    for label, seconds in results.items():
+        print(f"{label:>10}: {seconds * 1000:8.1f} ms ({operations / seconds:10.0f} changes/s)")
+
+
+class GlobalLockCart:
+    """
+    ShoppingCart behind one lock, the simple alternative to ConcurrentShoppingCart
+    """
+
+    def __init__(self):
+        self.cart = ShoppingCart()
+        self.lock = threading.Lock()
+
+    def add_item(self, item):
+        with self.lock:
+            self.cart.add_item(item)
+
+    def adjust_quantity(self, item_name, delta):
+        with self.lock:
+            item = self.cart.find_item(item_name)
+            item.item_quantity += delta
+
+    def get_totals(self):
+        with self.lock:
+            return self.cart.get_num_items_in_cart(), self.cart.get_cost_of_cart()
+
+
+def bench_concurrent(lines, thread_counts=(1, 2, 4, 8)):
+    """
+    Measures concurrent quantity changes with one reader polling the totals
+    Parameters:
+        lines: Integer number of quantity changes per run, split between threads
+        thread_counts: Numbers of writer threads to try
+    Returns:
+        Dictionary mapping (cart label, threads) to (changes/s, reads/s)
+    """
+    results = {}
+    for label, make_cart in (("global lock", GlobalLockCart),
+                             ("striped", ConcurrentShoppingCart)):
+        for threads in thread_counts:
+            cart = make_cart()
+            for item in make_items(1000):
+                cart.add_item(item)
+            per_thread = lines // threads
+            done = threading.Event()
+            reads = 0
+
+            def writer(number):
+                for i in range(per_thread):
+                    cart.adjust_quantity(f"Item {(number + i * threads) % 1000}", 1)
+
+            def reader():
+                nonlocal reads
+                while not done.is_set():
+                    cart.get_totals()
+                    reads += 1
+
+            reader_thread = threading.Thread(target=reader)
+            writers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+            reader_thread.start()
+            start = time.perf_counter()
+            for thread in writers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+            seconds = time.perf_counter() - start
+            done.set()
+            reader_thread.join()
+            results[label, threads] = (per_thread * threads / seconds, reads / seconds)
+    return results
+
+
+def print_concurrent(lines):
+    """
+    Prints the concurrent cart benchmark results
+    """
+    print(f"{lines} quantity changes on a 1000-line cart, one reader polling totals")
+    for (label, threads), (changes, reads) in bench_concurrent(lines).items():
+        print(f"{label:>12}, {threads} writers: {changes:10.0f} changes/s, {reads:10.0f} reads/s")
+
+
+def bench_shards(lines, worker_counts=(1, 2, 4)):
+    """
+    Measures the sharded engine with different numbers of worker processes
+    Parameters:
+        lines: Integer number of items added, spread over 1000 customers
+        worker_counts: Numbers of worker processes to try
+    Returns:
+        Dictionary mapping the worker count to commands per second
+    """
+    commands = [(f"Customer {i % 1000}", "add", f"Item {i}", 1 + i % 250, 1 + i % 5, "d")
+                for i in range(lines)]
+    commands += [(f"Customer {i}", "cost") for i in range(1000)]
+    results = {}
+    for workers in worker_counts:
+        with ShardedCartEngine(workers) as engine:
+            start = time.perf_counter()
+            engine.execute(commands)
+            engine.total_revenue()
+            results[workers] = len(commands) / (time.perf_counter() - start)
+    return results
+
+
+def print_shards(lines):
+    """
+    Prints the sharded engine benchmark results
+    """
+    print(f"{lines} adds over 1000 customers, {os.cpu_count()} CPUs")
+    for workers, rate in bench_shards(lines).items():
+        print(f"{workers} workers: {rate:10.0f} commands/s")
+
+
+def bench_vector(lines):
+    """
+    Compares the NumPy and pure-Python paths of cart_numpy on a large cart
+    Parameters:
+        lines: Integer number of lines in the cart
+    Returns:
+        Dictionary mapping "<operation>_<numpy|python>" to seconds
+    """
+    cart = cart_numpy.NumpyShoppingCart()
+    cart.add_items(make_items(lines))
+    operations = {
+        "totals": lambda: cart_numpy.recompute_totals(cart),
+        "line_totals": lambda: cart_numpy.line_totals(cart),
+        "filtered": lambda: cart_numpy.totals_where(cart, 100),
+    }
+    results = {}
+    numpy = cart_numpy.numpy
+    for path in ("numpy", "python"):
+        if path == "numpy" and numpy is None:
+            continue
+        cart_numpy.numpy = numpy if path == "numpy" else None
+        try:
+            for label, operation in operations.items():
+                results[f"{label}_{path}"] = best_time(operation)
+            results[f"report_{path}"] = best_time(lambda: "".join(cart_numpy.render_total(cart)))
+        finally:
+            cart_numpy.numpy = numpy
+    results["report_plain"] = best_time(lambda: "".join(render_total(cart)))
+    return results
+
+
+def print_vector(lines):
+    """
+    Prints the vectorized totals benchmark results
+    """
+    print(f"Columnar cart of {lines} lines")
+    for label, seconds in bench_vector(lines).items():
+        print(f"{label:>18}: {seconds * 1000:9.2f} ms")
+
+
+def bench_catalog(carts, lines_per_cart=20, products=200):
+    """
+    Compares carts of copied items with carts referring to a shared catalog
+    Every cart holds lines_per_cart products out of a pool, with names and
+    descriptions decoded afresh for each line, as they would be when read
+    from input.
+    Parameters:
+        carts: Integer number of carts
+        lines_per_cart: Integer number of lines in each cart
+        products: Integer number of distinct products
+    Returns:
+        Dictionary with the bytes used by each layout, the seconds to read
+        every cart's cost, and the seconds to apply a price change to one
+        product and read every cart's cost again
+    """
+    def lines(cart_number):
+        for line in range(lines_per_cart):
+            number = (cart_number * 7 + line * 13) % products
+            yield ItemToPurchase(f"Product {number}".encode().decode(), 1 + number % 50, 1 + line % 3,
+                                 f"Description of product {number}".encode().decode())
+
+    def build_plain():
+        result = []
+        for number in range(carts):
+            cart = ShoppingCart(f"Customer {number}")
+            cart.add_items(lines(number))
+            result.append(cart)
+        return result
+
+    def build_catalog():
+        catalog = Catalog()
+        result = []
+        for number in range(carts):
+            cart = CatalogShoppingCart(f"Customer {number}", catalog=catalog)
+            cart.add_items(lines(number))
+            result.append(cart)
+        return catalog, result
+
+    results = {
+        "plain_bytes": measure_memory(build_plain),
+        "catalog_bytes": measure_memory(build_catalog),
+    }
+    plain = build_plain()
+    catalog, catalog_carts = build_catalog()
+
+    def read_costs(cart_list):
+        for cart in cart_list:
+            cart.get_cost_of_cart()
+
+    results["plain_costs"] = best_time(lambda: read_costs(plain))
+    results["catalog_costs"] = best_time(lambda: read_costs(catalog_carts))
+
+    def plain_price_change():
+        for cart in plain:
+            item = cart.find_item("Product 7")
+            if item is not None:
+                item.item_price = 99
+        read_costs(plain)
+
+    def catalog_price_change():
+        catalog.set_price("Product 7", 99)
+        read_costs(catalog_carts)
+
+    results["plain_price_change"] = best_time(plain_price_change)
+    results["catalog_price_change"] = best_time(catalog_price_change)
+    return results
+
+
+def print_catalog(lines):
+    """
+    Prints the catalog benchmark results for lines spread over 20-line carts
+    """
+    carts = max(1, lines // 20)
+    results = bench_catalog(carts)
+    print(f"{carts} carts of 20 lines from 200 products")
+    for layout in ("plain", "catalog"):
+        print(f"{layout:>8}: {results[layout + '_bytes'] / 1e6:8.2f} MB, "
+              f"read all costs {results[layout + '_costs'] * 1000:8.1f} ms, "
+              f"price change {results[layout + '_price_change'] * 1000:8.1f} ms")
+
+
+def bench_reports(lines):
+    """
+    Compares printing the cart report with and without the report cache
+    Parameters:
+        lines: Integer number of lines in the cart
+    Returns:
+        Dictionary of seconds for a full render, a cached render of an
+        unchanged cart, and a cached render after 1% of the lines changed
+    """
+    cart = ShoppingCart()
+    cart.add_items(make_items(lines))
+    sink = NullFile()
+    results = {"plain": best_time(lambda: cart.print_total(sink))}
+    cart.cache_reports()
+    cart.print_total(sink)
+    results["unchanged"] = best_time(lambda: cart.print_total(sink))
+    changed = [cart.find_item(f"Item {i}") for i in range(0, lines, 100)]
+
+    def change_and_print():
+        for item in changed:
+            item.item_quantity += 1
+        cart.print_total(sink)
+
+    results["one_percent_changed"] = best_time(change_and_print)
+    return results
+
+
+def print_reports(lines):
+    """
+    Prints the report cache benchmark results
+    """
+    print(f"print_total of a {lines}-line cart")
+    for label, seconds in bench_reports(lines).items():
+        print(f"{label:>20}: {seconds * 1000:9.3f} ms")
+
+
+def bench_indexes(lines, queries=100):
+    """
+    Compares cart queries answered by scanning the cart and by a CartIndex
+    Parameters:
+        lines: Integer number of lines in the cart
+        queries: Number of times each query is run
+    Returns:
+        Dictionary mapping each query to (scan seconds, index seconds) per
+        query, plus "maintain" to (seconds per modify_item without an index,
+        with one)
+    """
+    cart = ShoppingCart()
+    cart.add_items(make_items(lines))
+    scans = {
+        "top_10": lambda: sorted(cart.cart_items, key=lambda item: item.item_price,
+                                 reverse=True)[:10],
+        "price_range": lambda: [item for item in cart.cart_items
+                                if 100 <= item.item_price <= 101],
+        "search": lambda: [item for item in cart.cart_items
+                           if "description 37" in item.item_description.lower()],
+    }
+    changes = [ItemToPurchase(f"Item {i}", 1 + i % 97, 0) for i in range(0, lines, 10)]
+    results = {}
+    for name, scan in scans.items():
+        results[name] = [best_time(lambda: [scan() for _ in range(queries)]) / queries]
+    results["maintain"] = [best_time(lambda: cart.modify_items(changes)) / len(changes)]
+    index = CartIndex(cart)
+    indexed = {
+        "top_10": lambda: index.top_n(10),
+        "price_range": lambda: index.price_range(100, 101),
+        "search": lambda: index.search("description 37"),
+    }
+    for name, query in indexed.items():
+        assert len(query()) == len(scans[name]())
+        results[name].append(best_time(lambda: [query() for _ in range(queries)]) / queries)
+    results["maintain"].append(best_time(lambda: cart.modify_items(changes)) / len(changes))
+    index.close()
+    return {name: tuple(seconds) for name, seconds in results.items()}
+
+
+def print_indexes(lines):
+    """
+    Prints the cart index benchmark results
+    """
+    print(f"Queries on a {lines}-line cart")
+    print(f"{'':>12} {'scan':>12} {'index':>12}")
+    for name, (scan, indexed) in bench_indexes(lines).items():
+        print(f"{name:>12} {scan * 1e6:9.1f} us {indexed * 1e6:9.1f} us")
+
+
+def bench_import(lines):
+    """
+    Times importing CSV and JSONL order files and measures peak memory
+    The orders repeat 1000 item names, so the cart stays small and the peak
+    shows what the import itself holds on to.
+    Parameters:
+        lines: Integer number of order rows in each file
+    Returns:
+        Dictionary mapping each format to (rows per second, file bytes,
+        peak bytes allocated during the import)
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in ("csv", "jsonl"):
+            path = os.path.join(directory, f"orders.{file_format}")
+            with open(path, "w", newline="") as file:
+                if file_format == "csv":
+                    file.write("name,price,quantity,description\n")
+                for i in range(lines):
+                    row = {"name": f"Item {i % 1000}", "price": f"{1 + i % 250}.99",
+                           "quantity": 1 + i % 5, "description": f"Description {i % 100}"}
+                    if file_format == "csv":
+                        file.write(f"{row['name']},{row['price']},{row['quantity']},"
+                                   f"{row['description']}\n")
+                    else:
+                        file.write(json.dumps(row) + "\n")
+            seconds = best_time(lambda: import_orders(ShoppingCart(), path), repeat=1)
+            # tracemalloc slows the import down, so the peak is taken on a
+            # separate run
+            gc.collect()
+            tracemalloc.start()
+            result = import_orders(ShoppingCart(), path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert result.imported == lines
+            results[file_format] = (lines / seconds, os.path.getsize(path), peak)
+    return results
+
+
+def print_import(lines):
+    """
+    Prints the order import benchmark results
+    """
+    for file_format, (rate, size, peak) in bench_import(lines).items():
+        print(f"{file_format:>6}: {rate:10,.0f} rows/s, file {size / 2**20:7.1f} MiB, "
+              f"peak {peak / 2**20:5.1f} MiB")
+
+
+def bench_merge(lines):
+    """
+    Times merging a guest cart into an account cart and diffing two carts
+    The guest cart has a tenth as many lines as the account cart, half of
+    them items the account cart already holds.
+    Parameters:
+        lines: Integer number of lines in the account cart
+    Returns:
+        Dictionary of seconds for merging with one add_item call per guest
+        line, merging with merge(), serializing and replaying the merge's
+        changeset, and diffing the account cart before and after the merge
+    """
+    guest = ShoppingCart()
+    guest.add_items(ItemToPurchase(f"Item {i}", 1 + i % 250, 1 + i % 5, f"Description {i % 100}")
+                    for i in range(lines - lines // 20, lines + lines // 20))
+
+    def account():
+        cart = ShoppingCart()
+        cart.add_items(make_items(lines))
+        return cart
+
+    def add_each(cart):
+        for item in guest:
+            cart.add_item(ItemToPurchase(item.item_name, item.item_price,
+                                         item.item_quantity, item.item_description))
+    results = {
+        "add_item loop": time_per_call(account, add_each, 1),
+        "merge": time_per_call(account, lambda cart: merge(cart, guest), 1),
+    }
+    merged = account()
+    data = merge(merged, guest).to_bytes()
+    results["replay changeset"] = time_per_call(
+        account, lambda cart: Changeset.from_bytes(data).apply(cart), 1)
+    before = account()
+    results["diff"] = best_time(lambda: diff(before, merged))
+    return results
+
+
+def print_merge(lines):
+    """
+    Prints the cart merge benchmark results
+    """
+    print(f"Merging a {lines // 10}-line guest cart into a {lines}-line account cart")
+    for label, seconds in bench_merge(lines).items():
+        print(f"{label:>18}: {seconds * 1000:9.2f} ms")
+
+
+def bench_history(lines, steps=10_000):
+    """
+    Times recording, undoing and redoing changes to a cart
+    Parameters:
+        lines: Integer number of lines in the cart
+        steps: Number of changes made, undone and redone
+    Returns:
+        Dictionary of seconds per change without and with a CartHistory,
+        seconds per undo and per redo, and the bytes the history held
+        after the changes
+    """
+    cart = ShoppingCart()
+    cart.add_items(make_items(lines))
+    changes = [ItemToPurchase(f"Item {i}", 0, 1 + i % 7) for i in range(0, lines, max(1, lines // steps))]
+
+    def change():
+        for item in changes:
+            cart.modify_item(item)
+    results = {"change": best_time(change) / len(changes)}
+    # Enough room that no step is forgotten
+    history = CartHistory(cart, max_steps=len(changes), max_bytes=2 ** 40)
+    start = time.perf_counter()
+    change()
+    results["change with history"] = (time.perf_counter() - start) / len(changes)
+    results["bytes held"] = history.memory()
+    start = time.perf_counter()
+    while history.undo():
+        pass
+    results["undo"] = (time.perf_counter() - start) / len(changes)
+    start = time.perf_counter()
+    while history.redo():
+        pass
+    results["redo"] = (time.perf_counter() - start) / len(changes)
+    history.close()
+    return results
+
+
+def print_history(lines):
+    """
+    Prints the undo history benchmark results
+    """
+    results = bench_history(lines)
+    print(f"Changes to a {lines}-line cart")
+    for label in ("change", "change with history", "undo", "redo"):
+        print(f"{label:>20}: {results[label] * 1e6:9.2f} us")
+    print(f"{'bytes held':>20}: {results['bytes held']:,}")
+
+
+def bench_pricing(lines, rules=500, changes=100):
+    """
+    Compares pricing a cart by checking every rule against every line with
+    pricing it through a PricingEngine, in full and incrementally
+    Parameters:
+        lines: Integer number of lines in the cart
+        rules: Number of promotion rules, each naming a few items
+        changes: Number of lines changed before each incremental total
+    Returns:
+        Dictionary of seconds per total for each way of pricing
+    """
+    cart = ShoppingCart()
+    cart.add_items(make_items(lines))
+    rng = random.Random(24)
+    line_rules = []
+    for i in range(rules):
+        names = [f"Item {rng.randrange(lines)}" for _ in range(5)]
+        if i % 3 == 0:
+            line_rules.append(PercentOff(5 + i % 20, names))
+        elif i % 3 == 1:
+            line_rules.append(TieredDiscount([(2, 5), (4, 10)], names))
+        else:
+            line_rules.append(BuyXGetY(2, 1, names))
+    line_rules.append(TieredDiscount([(5, 2)]))
+    engine = PricingEngine(line_rules + [Coupon("SAVE10", amount=10, minimum=50), Tax(7)])
+
+    def naive():
+        discount = 0
+        for item in cart:
+            name = item.item_name
+            left = item.item_price.cents * item.item_quantity
+            for rule in line_rules:
+                if rule.names is None or name in rule.names:
+                    cents = min(rule.discount(item.item_price.cents, item.item_quantity), left)
+                    discount += cents
+                    left -= cents
+        return discount
+    results = {"every rule, every line": best_time(naive, repeat=1)}
+    pricing = CartPricing(cart, engine)
+
+    def full():
+        pricing.reprice()
+        pricing.total()
+    results["indexed, every line"] = best_time(full)
+    changed = [ItemToPurchase(f"Item {rng.randrange(lines)}", 0, rng.randrange(1, 6))
+               for _ in range(changes)]
+
+    def incremental():
+        for item in changed:
+            cart.modify_item(item)
+        pricing.total()
+    results[f"indexed, {changes} lines changed"] = best_time(incremental)
+    pricing.close()
+    assert naive() == pricing.breakdown().discount.cents
+    return results
+
+
+def print_pricing(lines):
+    """
+    Prints the pricing benchmark results
+    """
+    results = bench_pricing(lines)
+    print(f"Pricing a {lines}-line cart with 500 promotion rules")
+    for label, seconds in results.items():
+        print(f"{label:>28}: {seconds * 1000:9.3f} ms")
+
+
+def bench_inventory(lines, batch=100, threads=4):
+    """
+    Measures stock reservations per second
+    Parameters:
+        lines: Integer number of reservations made by each way of reserving
+        batch: Number of items in each reserve_many call
+        threads: Number of carts adding items at once in the contended run
+    Returns:
+        Dictionary of reservations per second for single calls, batches,
+        add_item without and with an inventory, and concurrent carts
+    """
+    names = [f"Item {i}" for i in range(lines)]
+    inventory = Inventory()
+    inventory.stock_many((name, 1_000_000) for name in names)
+    holder = object()
+
+    def single():
+        for name in names:
+            inventory.reserve(holder, name, 1)
+        inventory.release(holder, names)
+    results = {"reserve": lines / best_time(single)}
+    batches = [{name: 1 for name in names[start:start + batch]} for start in range(0, lines, batch)]
+
+    def batched():
+        for quantities in batches:
+            inventory.reserve_many(holder, quantities)
+        inventory.release(holder, names)
+    results[f"reserve_many of {batch}"] = lines / best_time(batched)
+    items = [ItemToPurchase(name, 1, 1) for name in names]
+
+    def add(with_inventory):
+        cart = ShoppingCart()
+        if with_inventory:
+            cart.set_inventory(inventory)
+        start = time.perf_counter()
+        for item in items:
+            cart.add_item(item)
+        elapsed = time.perf_counter() - start
+        cart.set_inventory(None)
+        return elapsed
+    results["add_item"] = lines / min(add(False) for _ in range(3))
+    results["add_item with inventory"] = lines / min(add(True) for _ in range(3))
+
+    # Carts on several threads all reserving from the same few items
+    contended = Inventory()
+    contended.stock_many((f"Hot {i}", lines * threads) for i in range(8))
+    carts = [ConcurrentShoppingCart() for _ in range(threads)]
+    for cart in carts:
+        cart.set_inventory(contended)
+    per_thread = lines // threads
+
+    def shop(cart):
+        for i in range(per_thread):
+            cart.adjust_quantity(f"Hot {i % 8}", 1) or cart.add_item(ItemToPurchase(f"Hot {i % 8}", 1, 1))
+    workers = [threading.Thread(target=shop, args=(cart,)) for cart in carts]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results[f"{threads} concurrent carts"] = per_thread * threads / (time.perf_counter() - start)
+    assert sum(contended.held(f"Hot {i}") for i in range(8)) == per_thread * threads
+    return results
+
+
+def print_inventory(lines):
+    """
+    Prints the inventory reservation benchmark results
+    """
+    results = bench_inventory(lines)
+    print(f"{lines} stock reservations")
+    for label, rate in results.items():
+        print(f"{label:>24}: {rate:12,.0f} reservations/s")
+
+
+SUITE_SIZES = (10, 10_000, 1_000_000)
+
+# Operations timed by the suite, each run over a full cart of the given size
+SUITE_OPERATIONS = ("add_item", "add_items", "modify_item", "remove_item",
+                    "get_num_items_in_cart", "get_cost_of_cart",
+                    "print_total", "print_descriptions")
+
+
+class NullFile:
+    """
+    File-like object that throws away what is written to it
+    """
+
+    def write(self, text):
+        pass
+
+
+def time_per_call(setup, operation, calls, repeat=3):
+    """
+    Times an operation, leaving the setup it needs out of the measurement
+    Parameters:
+        setup: Function returning the state the operation works on
+        operation: Function taking that state
+        calls: Number of calls the operation makes, to divide by
+        repeat: Number of runs; the fastest counts
+    Returns:
+        Seconds per call
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        # Collections triggered by the setup's garbage would add noise
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            operation(state)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+        del state
+    return best / calls
+
+
+def bench_suite_size(cart_class, size):
+    """
+    Times every suite operation on carts of one size
+    Small carts are measured many at a time, so each run makes at least
+    10000 calls.
+    Parameters:
+        cart_class: ShoppingCart or a subclass to benchmark
+        size: Integer number of lines in each cart
+    Returns:
+        Dictionary mapping operation name to seconds per call
+    """
+    rounds = max(1, 10_000 // size)
+    names = [f"Item {i}" for i in range(size)]
+    updates = [ItemToPurchase(name, 0, 7) for name in names]
+    sink = NullFile()
+
+    def fresh():
+        # Items can belong to only one cart, so every run gets new ones
+        return [(cart_class("Benchmark", "May 11, 2025"), list(make_items(size)))
+                for _ in range(rounds)]
+
+    def loaded():
+        carts = []
+        for cart, items in fresh():
+            cart.add_items(items)
+            carts.append(cart)
+        return carts
+
+    def add_item(state):
+        for cart, items in state:
+            for item in items:
+                cart.add_item(item)
+
+    def add_items(state):
+        for cart, items in state:
+            cart.add_items(items)
+
+    def modify_item(carts):
+        for cart in carts:
+            for item in updates:
+                cart.modify_item(item)
+
+    def remove_item(carts):
+        for cart in carts:
+            for name in names:
+                cart.remove_item(name)
+
+    def totals(method):
+        def run(carts):
+            for cart in carts:
+                for _ in range(reads):
+                    method(cart)
+        return run
+
+    def report(method):
+        def run(carts):
+            for cart in carts:
+                method(cart, sink)
+        return run
+
+    # The totals are O(1), so read them many times per cart
+    reads = max(1, 10_000 // rounds)
+    lines = rounds * size
+    repeat = 5 if lines <= 100_000 else 1
+    return {
+        "add_item": time_per_call(fresh, add_item, lines, repeat),
+        "add_items": time_per_call(fresh, add_items, lines, repeat),
+        "modify_item": time_per_call(loaded, modify_item, lines, repeat),
+        "remove_item": time_per_call(loaded, remove_item, lines, repeat),
+        "get_num_items_in_cart": time_per_call(
+            loaded, totals(cart_class.get_num_items_in_cart), rounds * reads, repeat),
+        "get_cost_of_cart": time_per_call(
+            loaded, totals(cart_class.get_cost_of_cart), rounds * reads, repeat),
+        "print_total": time_per_call(loaded, report(cart_class.print_total), rounds, repeat),
+        "print_descriptions": time_per_call(
+            loaded, report(cart_class.print_descriptions), rounds, repeat),
+    }
+
+
+def bench_suite(sizes=SUITE_SIZES, cart_classes=(ShoppingCart, ColumnarShoppingCart)):
+    """
+    Times every suite operation for each cart class and size
+    Parameters:
+        sizes: Cart sizes to measure
+        cart_classes: Cart classes to measure
+    Returns:
+        Dictionary ready to be saved as JSON: the Python version, platform
+        and a "results" dictionary mapping "<class>/<size>/<operation>" to
+        seconds per call
+    """
+    results = {}
+    for cart_class in cart_classes:
+        for size in sizes:
+            for operation, seconds in bench_suite_size(cart_class, size).items():
+                results[f"{cart_class.__name__}/{size}/{operation}"] = seconds
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare_suite(current, baseline, threshold=0.25):
+    """
+    Compares suite results with a stored baseline
+    Parameters:
+        current: Dictionary returned by bench_suite
+        baseline: Dictionary returned by bench_suite for an earlier run
+        threshold: Fraction slower than the baseline that counts as a regression
+    Returns:
+        List of (key, baseline seconds, current seconds, ratio, regressed)
+        tuples for the keys measured in both runs
+    """
+    rows = []
+    old_results = baseline["results"]
+    for key, seconds in current["results"].items():
+        old = old_results.get(key)
+        if old is None:
+            continue
+        ratio = seconds / old if old else float("inf")
+        rows.append((key, old, seconds, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:9.2f} us"
+    return f"{seconds * 1e9:9.1f} ns"
+
+
+def print_suite(sizes=SUITE_SIZES, output=None, baseline=None, threshold=0.25):
+    """
+    Runs the suite, prints the results and optionally saves or compares them
+    Parameters:
+        sizes: Cart sizes to measure
+        output: Optional path to write the results to as JSON
+        baseline: Optional path of earlier results to compare with
+        threshold: Fraction slower than the baseline that counts as a regression
+    Returns:
+        Number of regressions found (0 without a baseline)
+    """
+    current = bench_suite(sizes)
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(current, file, indent=2)
+    if baseline is None:
+        for key, seconds in current["results"].items():
+            print(f"{key:<50} {_format_seconds(seconds)}/call")
+        return 0
+    with open(baseline) as file:
+        rows = compare_suite(current, json.load(file), threshold)
+    regressions = 0
+    for key, old, seconds, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{key:<50} {_format_seconds(old)} -> {_format_seconds(seconds)} "
+              f"({ratio:5.2f}x) {flag}")
+        regressions += regressed
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+    return regressions
+
+
+def main():
+    """
+    Parses the command line and runs the chosen benchmark
+    """
+    parser = argparse.ArgumentParser(description="Shopping cart benchmarks")
+    parser.add_argument("benchmark", choices=["memory", "money", "batch", "snapshot", "journal",
+                                              "concurrent", "shards", "vector", "suite",
+                                              "catalog", "reports", "indexes", "import", "merge", "history",
+                                              "pricing", "inventory"])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SUITE_SIZES),
+                        help="cart sizes for the suite")
+    parser.add_argument("--output", help="file to save the suite results to as JSON")
+    parser.add_argument("--baseline", help="suite results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown that counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+    if args.benchmark == "memory":
+        print_memory(args.lines)
+    elif args.benchmark == "money":
+        print_money(args.lines)
+    elif args.benchmark == "batch":
+        print_batch(args.lines)
+    elif args.benchmark == "snapshot":
+        print_snapshot(args.lines)
+    elif args.benchmark == "journal":
+        print_journal(args.lines)
+    elif args.benchmark == "concurrent":
+        print_concurrent(args.lines)
+    elif args.benchmark == "shards":
+        print_shards(args.lines)
+    elif args.benchmark == "vector":
+        print_vector(args.lines)
+    elif args.benchmark == "catalog":
+        print_catalog(args.lines)
+    elif args.benchmark == "reports":
+        print_reports(args.lines)
+    elif args.benchmark == "indexes":
+        print_indexes(args.lines)
+    elif args.benchmark == "import":
+        print_import(args.lines)
+    elif args.benchmark == "merge":
+        print_merge(args.lines)
+    elif args.benchmark == "history":
+        print_history(args.lines)
+    elif args.benchmark == "pricing":
+        print_pricing(args.lines)
+    elif args.benchmark == "inventory":
+        print_inventory(args.lines)
+    elif args.benchmark == "suite":
+        if print_suite(args.sizes, args.output, args.baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
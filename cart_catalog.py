@@ -0,0 +1,454 @@
+"""
+Product catalog shared by many shopping carts
+A Catalog holds each product's name, price and description once. A
+CatalogShoppingCart line holds only the product's name (the same string
+object as the catalog's) and a quantity, so thousands of carts holding the
+same product share one copy of its details.
+
+Prices belong to the catalog. Changing a price bumps the catalog version
+and is logged; each cart notices the new version the next time its cost is
+asked for and applies the logged changes then, so a price change costs
+nothing per cart up front.
+"""
+import sys
+
+from module8 import BatchResult, ItemToPurchase, ShoppingCart, _reserve_added, _reserve_modified
+from money import Money
+
+
+class Product:
+    """
+    Class holding the canonical definition of one product
+    """
+    __slots__ = ("name", "price", "description")
+
+    def __init__(self, name, price, description="none"):
+        """
+        Constructor that defines a product
+        Parameters:
+            name: String representing the product name
+            price: Price as anything Money accepts
+            description: String describing the product
+        """
+        self.name = sys.intern(name)
+        self.price = Money(price)
+        self.description = description
+
+
+class Catalog:
+    """
+    Class holding the products that catalog carts refer to, by name
+    """
+    # Number of recent price changes kept for carts to catch up with
+    MAX_CHANGES = 1024
+
+    def __init__(self):
+        """
+        Constructor that initializes an empty catalog
+        """
+        self._products = {}
+        # Bumped by every price or description change; carts compare it
+        # with the version their cost was computed at
+        self.version = 0
+        # (name, old price, new price) of the latest changes, the first
+        # being the change that made version _changes_base + 1
+        self._changes = []
+        self._changes_base = 0
+
+    def __len__(self):
+        return len(self._products)
+
+    def __contains__(self, name):
+        return name in self._products
+
+    def __getitem__(self, name):
+        return self._products[name]
+
+    def get(self, name):
+        """
+        Returns the product with a name, or None if it is not in the catalog
+        """
+        return self._products.get(name)
+
+    def define(self, name, price, description="none"):
+        """
+        Adds a product, or returns the existing product with that name
+        Parameters:
+            name: String representing the product name
+            price: Price for a new product
+            description: Description for a new product
+        Returns:
+            The Product in the catalog
+        """
+        product = self._products.get(name)
+        if product is None:
+            product = Product(name, price, description)
+            self._products[product.name] = product
+        return product
+
+    def set_price(self, name, price):
+        """
+        Changes a product's price for every cart that holds it
+        Parameters:
+            name: String representing the product name
+            price: New price as anything Money accepts
+        """
+        product = self._products[name]
+        old_price = product.price
+        product.price = Money(price)
+        self.version += 1
+        self._changes.append((product.name, old_price, product.price))
+        self._trim_changes()
+
+    def changes_since(self, version):
+        """
+        Returns the price changes made after a catalog version
+        Parameters:
+            version: Catalog version to start from
+        Returns:
+            List of (name, old price, new price) tuples in the order they
+            were made, or None if changes that old are no longer kept
+        """
+        if version < self._changes_base:
+            return None
+        return self._changes[version - self._changes_base:]
+
+    def set_description(self, name, description):
+        """
+        Changes a product's description for every cart that holds it
+        """
+        product = self._products[name]
+        product.description = description
+        # Logged as a change that leaves the price as it is, so anything
+        # watching the version (such as a report cache) sees it
+        self.version += 1
+        self._changes.append((product.name, product.price, product.price))
+        self._trim_changes()
+
+    def _trim_changes(self):
+        if len(self._changes) > self.MAX_CHANGES:
+            dropped = len(self._changes) - self.MAX_CHANGES // 2
+            del self._changes[:dropped]
+            self._changes_base += dropped
+
+
+CATALOG = Catalog()
+
+
+class CatalogItem(ItemToPurchase):
+    """
+    ItemToPurchase-compatible view of one line of a CatalogShoppingCart
+    The name, price and description come from the catalog; the quantity
+    from the cart. Setting the price or description changes the catalog,
+    and so every cart holding the product.
+    """
+    __slots__ = ("_line_cart", "_line_name")
+
+    def __init__(self, cart, item_name):
+        """
+        Constructor that creates a view of a line in a catalog cart
+        Parameters:
+            cart: The CatalogShoppingCart holding the line
+            item_name: String representing the name of the line
+        """
+        # As for ItemView, _cart is set so other carts copy the view
+        self._cart = cart
+        self._line_cart = cart
+        self._line_name = item_name
+
+    @property
+    def item_name(self):
+        return self._line_name
+
+    @item_name.setter
+    def item_name(self, value):
+        if value != self._line_name:
+            raise ValueError("catalog cart lines cannot be renamed; remove the item and add another")
+
+    @property
+    def item_price(self):
+        return self._line_cart.catalog[self._line_name].price
+
+    @item_price.setter
+    def item_price(self, value):
+        self._line_cart._set_line(self._line_name, price=value)
+
+    @property
+    def item_quantity(self):
+        return self._line_cart._lines[self._line_name]
+
+    @item_quantity.setter
+    def item_quantity(self, value):
+        cart = self._line_cart
+        if cart._inventory is not None:
+            cart._inventory.reserve(cart, self._line_name, value)
+        cart._set_line(self._line_name, quantity=value)
+
+    @property
+    def item_description(self):
+        return self._line_cart.catalog[self._line_name].description
+
+    @item_description.setter
+    def item_description(self, value):
+        self._line_cart._set_line(self._line_name, description=value)
+
+
+class CatalogShoppingCart(ShoppingCart):
+    """
+    ShoppingCart whose lines refer to products in a shared Catalog
+    Adding an item whose name is not in the catalog defines the product from
+    the item. Adding a name the catalog already has uses the catalog's price
+    and description; the item's own are ignored.
+    """
+
+    def __init__(self, customer_name="none", current_date="January 1, 2020", catalog=None):
+        """
+        Constructor that initializes an empty catalog cart
+        Parameters:
+            customer_name: String representing the customer's name
+            current_date: String representing the current date
+            catalog: Catalog the lines refer to; defaults to CATALOG
+        """
+        super().__init__(customer_name, current_date)
+        del self._items
+        self.catalog = CATALOG if catalog is None else catalog
+        self._lines = {}  # product name -> quantity, in insertion order
+        # Catalog version _total_cents and _fractional_lines were computed at
+        self._priced_version = self.catalog.version
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        for name in self._lines:
+            yield CatalogItem(self, name)
+
+    def __reversed__(self):
+        for name in reversed(self._lines):
+            yield CatalogItem(self, name)
+
+    def __contains__(self, item_name):
+        return item_name in self._lines
+
+    def find_item(self, item_name):
+        """
+        Looks up an item by name
+        Parameters:
+            item_name: String representing the name of the item
+        Returns:
+            A CatalogItem view of the line, or None if it is not in the cart
+        """
+        if item_name in self._lines:
+            return CatalogItem(self, item_name)
+        return None
+
+    def _count(self, product, quantity, lines):
+        """
+        Adds a change to the running totals
+        Callers first bring the totals up to date with _catch_up, before the
+        lines change, so that logged price changes apply to the old lines.
+        Parameters:
+            product: The Product whose line changed
+            quantity: Change in the line's quantity
+            lines: 1 for a new line, -1 for a removed line, 0 otherwise
+        """
+        self._total_quantity += quantity
+        self._total_cents += product.price.cents * quantity
+        self._fractional_lines += lines * (not product.price.whole)
+
+    def _add(self, item):
+        # Adds one item; returns the product name if it made a new line
+        name = item.item_name
+        quantity = item.item_quantity
+        if self._priced_version != self.catalog.version:
+            self._catch_up()
+        if name in self._lines:
+            self._set_line(name, quantity=self._lines[name] + quantity)
+            return None
+        product = self.catalog.define(name, item.item_price, item.item_description)
+        self._lines[product.name] = quantity
+        self._count(product, quantity, 1)
+        return product.name
+
+    def add_item(self, item):
+        """
+        Adds an item to the cart as a reference to its catalog product
+        Adding a name already in the cart adds to that line's quantity.
+        Parameters:
+            item: An ItemToPurchase object to add to the cart
+        """
+        if self._inventory is not None:
+            self._inventory.reserve(self, item.item_name,
+                                    self._lines.get(item.item_name, 0) + item.item_quantity)
+        name = self._add(item)
+        if name is not None and self._listeners:
+            self._notify("add", CatalogItem(self, name))
+
+    def add_product(self, name, quantity=1):
+        """
+        Adds a quantity of a product that is already in the catalog
+        Parameters:
+            name: String representing the product name
+            quantity: Integer quantity to add
+        """
+        product = self.catalog[name]
+        self.add_item(ItemToPurchase(product.name, product.price, quantity, product.description))
+
+    def _remove(self, item_name):
+        if self._priced_version != self.catalog.version:
+            self._catch_up()
+        quantity = self._lines.pop(item_name, None)
+        if quantity is None:
+            return False
+        product = self.catalog[item_name]
+        self._count(product, -quantity, -1)
+        if self._listeners:
+            self._notify("remove", ItemToPurchase(item_name, product.price, quantity,
+                                                  product.description))
+        return True
+
+    def remove_item(self, item_name):
+        """
+        Removes a line from the cart based on the item name
+        Parameters:
+            item_name: String representing the name of item to remove
+        Returns:
+            True if the item was removed, False if it was not in the cart
+        """
+        if not self._remove(item_name):
+            print("Item not found in cart. Nothing removed.")
+            return False
+        return True
+
+    def _modify(self, item):
+        if item.item_name not in self._lines:
+            return False
+        self._set_line(
+            item.item_name,
+            price=item.item_price if item.item_price != 0 else None,
+            quantity=item.item_quantity if item.item_quantity != 0 else None,
+            description=item.item_description if item.item_description != "none" else None,
+        )
+        return True
+
+    def modify_item(self, item):
+        """
+        Modifies an existing line in the cart
+        Only modifies attributes that are not default values. A new price or
+        description is written to the catalog, for every cart.
+        Parameters:
+            item: An ItemToPurchase object with the same name as an existing item
+                 but with updated attributes
+        Returns:
+            True if the item was modified, False if it was not in the cart
+        """
+        if item.item_name not in self._lines:
+            print("Item not found in cart. Nothing modified.")
+            return False
+        if self._inventory is not None and item.item_quantity != 0:
+            self._inventory.reserve(self, item.item_name, item.item_quantity)
+        self._modify(item)
+        return True
+
+    def add_items(self, items):
+        if self._inventory is not None:
+            items = _reserve_added(self, items)
+        applied = 0
+        for item in items:
+            # Reserved with the whole batch above, not line by line
+            name = self._add(item)
+            if name is not None and self._listeners:
+                self._notify("add", CatalogItem(self, name))
+            applied += 1
+        return BatchResult(applied, [])
+
+    def remove_items(self, item_names):
+        applied = 0
+        missing = []
+        for item_name in item_names:
+            if self._remove(item_name):
+                applied += 1
+            else:
+                missing.append(item_name)
+        return BatchResult(applied, missing)
+
+    def modify_items(self, items):
+        if self._inventory is not None:
+            items = _reserve_modified(self, items)
+        applied = 0
+        missing = []
+        for item in items:
+            if self._modify(item):
+                applied += 1
+            else:
+                missing.append(item.item_name)
+        return BatchResult(applied, missing)
+
+    def _set_line(self, item_name, price=None, quantity=None, description=None):
+        """
+        Updates one line's quantity, or its product's price or description
+        Arguments left as None are not changed.
+        """
+        if self._priced_version != self.catalog.version:
+            self._catch_up()
+        product = self.catalog[item_name]
+        changes = ()
+        if description is not None:
+            changes += (("item_description", product.description),)
+            self.catalog.set_description(item_name, description)
+        if price is not None:
+            changes += (("item_price", product.price),)
+        if quantity is not None:
+            old_quantity = self._lines[item_name]
+            changes += (("item_quantity", old_quantity),)
+            self._lines[item_name] = quantity
+            self._count(product, quantity - old_quantity, 0)
+        if price is not None:
+            # Like any catalog price change, this cart picks it up from the
+            # catalog's log, after its quantity change above
+            self.catalog.set_price(item_name, price)
+        if changes and self._listeners:
+            self._notify("update", CatalogItem(self, item_name), changes)
+
+    def _catch_up(self):
+        """
+        Brings the cost totals up to date with the catalog's prices
+        Applies just the price changes made since they were computed, or
+        recomputes them when that is cheaper.
+        """
+        changes = self.catalog.changes_since(self._priced_version)
+        if changes is None or len(changes) > len(self._lines):
+            self._reprice()
+            return
+        lines = self._lines
+        for name, old_price, new_price in changes:
+            quantity = lines.get(name)
+            if quantity is not None:
+                self._total_cents += (new_price.cents - old_price.cents) * quantity
+                self._fractional_lines += old_price.whole - new_price.whole
+        self._priced_version = self.catalog.version
+
+    def _reprice(self):
+        """
+        Recomputes the cost totals from the catalog's current prices
+        """
+        products = self.catalog._products
+        cents = fractional = 0
+        for name, quantity in self._lines.items():
+            price = products[name].price
+            cents += price.cents * quantity
+            fractional += not price.whole
+        self._total_cents = cents
+        self._fractional_lines = fractional
+        self._priced_version = self.catalog.version
+
+    def get_cost_of_cart(self):
+        """
+        Returns the total cost of all items in the cart at catalog prices
+        After catalog price changes the totals are brought up to date by
+        applying just those changes, or by recomputing them when that is
+        cheaper; otherwise this is O(1).
+        """
+        if self._priced_version != self.catalog.version:
+            self._catch_up()
+        return Money.from_cents(self._total_cents, self._fractional_lines == 0)
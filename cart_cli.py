@@ -0,0 +1,253 @@
+"""
+Command line tool for one-shot operations on saved carts
+Each run loads what one operation needs, runs it and exits, so health
+checks and scheduled jobs do not pay for the interactive menu, NumPy, the
+journal or the network client unless they ask for them:
+
+    python cart_cli.py total SNAPSHOT [--report] [--numpy]
+        Prints the item count and total from the snapshot header, without
+        reading any lines; --report prints the full print_total report,
+        --numpy renders it with the vectorized path
+    python cart_cli.py describe SNAPSHOT
+        Prints the item descriptions
+    python cart_cli.py apply SNAPSHOT [COMMANDS] [--journal JOURNAL]
+        Runs menu commands from COMMANDS (or stdin), in the run_batch
+        format, and saves the cart back to SNAPSHOT; with --journal the
+        changes are appended to the cart's journal instead
+    python cart_cli.py import SNAPSHOT ORDERS [--format csv|jsonl]
+        Adds the items of a CSV or JSONL order file to the saved cart,
+        reporting bad rows on stderr
+    python cart_cli.py ping [--host H] [--port P | --unix PATH] [--timeout S]
+        Checks that a cart server answers a session
+
+Modules are imported inside the functions that use them, and the command
+line is parsed by hand because argparse alone takes longer to import than
+the cart modules. test_cart_cli checks that a run stays within
+STARTUP_BUDGET seconds of a bare interpreter.
+"""
+import sys
+
+# Most seconds "total" may add to the start-up of a bare interpreter
+STARTUP_BUDGET = 0.1
+
+USAGE = """usage: cart_cli.py total SNAPSHOT [--report] [--numpy]
+       cart_cli.py describe SNAPSHOT
+       cart_cli.py apply SNAPSHOT [COMMANDS] [--journal JOURNAL]
+       cart_cli.py import SNAPSHOT ORDERS [--format csv|jsonl]
+       cart_cli.py ping [--host H] [--port P | --unix PATH] [--timeout S]
+"""
+
+
+class UsageError(Exception):
+    """
+    Raised when the command line cannot be parsed
+    """
+
+
+def parse_args(argv, flags=(), options=()):
+    """
+    Splits command line arguments into positional arguments and options
+    Parameters:
+        argv: List of argument strings after the subcommand
+        flags: Names of options that take no value, such as "--report"
+        options: Names of options that take a value, such as "--host"
+    Returns:
+        Tuple (list of positional arguments, dictionary of options given),
+        with True as the value of each flag given
+    """
+    positional = []
+    given = {}
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument in flags:
+            given[argument] = True
+        elif argument in options:
+            value = next(arguments, None)
+            if value is None:
+                raise UsageError(f"{argument} needs a value")
+            given[argument] = value
+        elif argument.startswith("--"):
+            raise UsageError(f"unknown option {argument}")
+        else:
+            positional.append(argument)
+    return positional, given
+
+
+def _positional(positional, names):
+    # Checks the count of positional arguments; optional ones end in "?"
+    required = [name for name in names if not name.endswith("?")]
+    if not len(required) <= len(positional) <= len(names):
+        raise UsageError(f"expected {' '.join(names)}")
+    return positional + [None] * (len(names) - len(positional))
+
+
+def total(argv, file=None):
+    """
+    Runs "total": prints the item count and cost of a snapshot
+    """
+    positional, given = parse_args(argv, flags=("--report", "--numpy"))
+    path, = _positional(positional, ["SNAPSHOT"])
+    from cart_render import _header, write_report
+    from cart_snapshot import CartSnapshot
+    with CartSnapshot(path) as snapshot:
+        if not given.get("--report"):
+            write_report((f"{_header(snapshot)}Number of Items: {snapshot.get_num_items_in_cart()}\n"
+                          f"Total: ${snapshot.get_cost_of_cart()}\n",), file)
+            return 0
+        if given.get("--numpy"):
+            import cart_numpy
+            from cart_columnar import ColumnarShoppingCart
+            write_report(cart_numpy.render_total(snapshot.to_cart(ColumnarShoppingCart)), file)
+        else:
+            snapshot.to_cart().print_total(file)
+    return 0
+
+
+def describe(argv, file=None):
+    """
+    Runs "describe": prints the item descriptions of a snapshot
+    """
+    positional, _ = parse_args(argv)
+    path, = _positional(positional, ["SNAPSHOT"])
+    from cart_snapshot import load_cart
+    load_cart(path).print_descriptions(file)
+    return 0
+
+
+def apply(argv, file=None):
+    """
+    Runs "apply": runs menu commands against a saved cart and saves it
+    """
+    positional, given = parse_args(argv, options=("--journal",))
+    path, commands = _positional(positional, ["SNAPSHOT", "COMMANDS?"])
+    if commands is None or commands == "-":
+        return _apply(path, sys.stdin, given.get("--journal"), file)
+    with open(commands) as lines:
+        return _apply(path, lines, given.get("--journal"), file)
+
+
+def _apply(path, lines, journal_path, file):
+    from module8 import run_batch
+    if journal_path is not None:
+        from cart_journal import open_cart
+        cart, journal = open_cart(journal_path, path, background=False)
+        try:
+            run_batch(cart, lines, file)
+        finally:
+            journal.close()
+        return 0
+    from cart_snapshot import save_cart
+    cart = _load_or_create(path)
+    run_batch(cart, lines, file)
+    save_cart(cart, path)
+    return 0
+
+
+def _load_or_create(path):
+    import os
+    from cart_snapshot import load_cart
+    from module8 import ShoppingCart
+    return load_cart(path) if os.path.exists(path) else ShoppingCart()
+
+
+def import_orders(argv, file=None):
+    """
+    Runs "import": adds the items of an order file to a saved cart
+    Returns:
+        0 if every row was imported, 1 if some rows were rejected
+    """
+    positional, given = parse_args(argv, options=("--format",))
+    path, orders = _positional(positional, ["SNAPSHOT", "ORDERS"])
+    import cart_import
+    from cart_snapshot import save_cart
+    cart = _load_or_create(path)
+    result = cart_import.import_orders(cart, orders, given.get("--format"))
+    save_cart(cart, path)
+    for error in result.errors:
+        print(f"{orders}:{error.line}: {error.message}", file=sys.stderr)
+    if result.rejected > len(result.errors):
+        print(f"... and {result.rejected - len(result.errors)} more bad rows", file=sys.stderr)
+    print(f"Imported {result.imported} rows, rejected {result.rejected}", file=file)
+    return 1 if result.rejected else 0
+
+
+def ping(argv, file=None):
+    """
+    Runs "ping": opens and closes a session with a cart server
+    Returns:
+        0 if the server answered, 1 otherwise
+    """
+    _, given = parse_args(argv, options=("--host", "--port", "--unix", "--timeout"))
+    import socket
+    try:
+        timeout = float(given.get("--timeout", 5))
+        if "--unix" in given:
+            connection = socket.socket(socket.AF_UNIX)
+            try:
+                connection.settimeout(timeout)
+                connection.connect(given["--unix"])
+            except OSError:
+                connection.close()
+                raise
+        else:
+            connection = socket.create_connection(
+                (given.get("--host", "127.0.0.1"), int(given.get("--port", 8008))), timeout)
+        with connection, connection.makefile("rwb") as stream:
+            # The server answers the name and date with a reply ending in "."
+            stream.write(b"ping\nping\n")
+            stream.flush()
+            for line in stream:
+                if line == b".\n":
+                    break
+            else:
+                raise ConnectionError("server closed the connection")
+            stream.write(b"q\n")
+            stream.flush()
+    except (OSError, ValueError) as error:
+        print(f"cart server is not answering: {error}", file=sys.stderr)
+        return 1
+    print("ok", file=file)
+    return 0
+
+
+def _errors():
+    # Errors reported as a failed operation rather than a crash. The cart
+    # modules' own errors can only come from modules this run imported.
+    errors = (OSError, ValueError)
+    if "cart_snapshot" in sys.modules:
+        errors += (sys.modules["cart_snapshot"].SnapshotError,)
+    if "cart_journal" in sys.modules:
+        errors += (sys.modules["cart_journal"].JournalError,)
+    return errors
+
+
+COMMANDS = {"total": total, "describe": describe, "apply": apply, "import": import_orders,
+            "ping": ping}
+
+
+def main(argv=None):
+    """
+    Runs the subcommand named on the command line
+    Parameters:
+        argv: List of arguments without the program name; defaults to sys.argv[1:]
+    Returns:
+        Exit status: 0 on success, 1 if the operation failed, 2 on a usage error
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    command = COMMANDS.get(argv[0]) if argv else None
+    if command is None:
+        sys.stderr.write(USAGE)
+        return 2
+    try:
+        return command(argv[1:])
+    except UsageError as error:
+        sys.stderr.write(f"{USAGE}error: {error}\n")
+        return 2
+    except _errors() as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
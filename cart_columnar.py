@@ -0,0 +1,430 @@
+"""
+Columnar shopping cart backend for very large carts
+Instead of one ItemToPurchase object per line, ColumnarShoppingCart keeps
+prices (in cents) and quantities in typed array buffers, interns item names and stores
+each distinct description once in a string table. Items handed out by the
+cart are lightweight views over a line, so code written for ShoppingCart
+keeps working.
+"""
+import sys
+from array import array
+
+from module8 import BatchResult, ItemToPurchase, ShoppingCart, _reserve_added, _reserve_modified
+from money import Money
+
+
+class StringTable:
+    """
+    Class storing each distinct string once and referring to it by number
+    """
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self):
+        """
+        Constructor that initializes an empty string table
+        """
+        self.strings = []
+        self._ids = {}
+
+    def intern(self, text):
+        """
+        Returns the id of a string, adding it to the table if it is new
+        Parameters:
+            text: String to store
+        Returns:
+            Integer id of the string
+        """
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(sys.intern(text))
+            self._ids[text] = string_id
+        return string_id
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ItemView(ItemToPurchase):
+    """
+    ItemToPurchase-compatible view of one line of a ColumnarShoppingCart
+    Reads and writes go straight to the cart's columns. A view stays valid
+    while its line is in the cart.
+    """
+    __slots__ = ("_view_cart", "_view_name")
+
+    def __init__(self, cart, item_name):
+        """
+        Constructor that creates a view of a line in a columnar cart
+        Parameters:
+            cart: The ColumnarShoppingCart holding the line
+            item_name: String representing the name of the line
+        """
+        # The ItemToPurchase slots are left unset; the line's data lives in
+        # the cart. _cart is set so other carts copy the view when it is added.
+        self._cart = cart
+        self._view_cart = cart
+        self._view_name = item_name
+
+    @property
+    def item_name(self):
+        return self._view_name
+
+    @item_name.setter
+    def item_name(self, value):
+        self._view_cart._rename_line(self._view_name, value)
+        self._view_name = value
+
+    @property
+    def item_price(self):
+        return self._view_cart._get_price(self._view_cart._rows[self._view_name])
+
+    @item_price.setter
+    def item_price(self, value):
+        self._view_cart._set_line(self._view_name, price=value)
+
+    @property
+    def item_quantity(self):
+        return self._view_cart._quantities[self._view_cart._rows[self._view_name]]
+
+    @item_quantity.setter
+    def item_quantity(self, value):
+        cart = self._view_cart
+        if cart._inventory is not None:
+            cart._inventory.reserve(cart, self._view_name, value)
+        cart._set_line(self._view_name, quantity=value)
+
+    @property
+    def item_description(self):
+        cart = self._view_cart
+        return cart._strings.strings[cart._description_ids[cart._rows[self._view_name]]]
+
+    @item_description.setter
+    def item_description(self, value):
+        self._view_cart._set_line(self._view_name, description=value)
+
+
+class ColumnarShoppingCart(ShoppingCart):
+    """
+    ShoppingCart that stores its lines in columns instead of item objects
+    Behaves like ShoppingCart, including the duplicate-name policy and the
+    running totals, but uses far less memory per line.
+    """
+    # Removed lines leave holes in the columns; once more than half of the
+    # rows (and at least this many) are holes, the columns are compacted
+    COMPACT_MIN_HOLES = 1024
+
+    def __init__(self, customer_name="none", current_date="January 1, 2020"):
+        """
+        Constructor that initializes an empty columnar cart
+        Parameters:
+            customer_name: String representing the customer's name
+            current_date: String representing the current date
+        """
+        super().__init__(customer_name, current_date)
+        del self._items
+        self._rows = {}  # item_name -> row number, in insertion order
+        self._prices = array("q")  # cents
+        self._price_whole = bytearray()  # Money.whole of each price
+        self._quantities = array("q")
+        self._description_ids = array("l")
+        self._strings = StringTable()
+        self._holes = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        for name in self._rows:
+            yield ItemView(self, name)
+
+    def __reversed__(self):
+        for name in reversed(self._rows):
+            yield ItemView(self, name)
+
+    def __contains__(self, item_name):
+        return item_name in self._rows
+
+    def find_item(self, item_name):
+        """
+        Looks up an item by name
+        Parameters:
+            item_name: String representing the name of the item
+        Returns:
+            An ItemView of the line, or None if it is not in the cart
+        """
+        if item_name in self._rows:
+            return ItemView(self, item_name)
+        return None
+
+    def add_item(self, item):
+        """
+        Adds an item to the cart by copying its attributes into the columns
+        Adding a name already in the cart adds to that line's quantity.
+        Parameters:
+            item: An ItemToPurchase (or ItemView) object to add to the cart
+        """
+        name = item.item_name
+        row = self._rows.get(name)
+        if self._inventory is not None:
+            self._inventory.reserve(self, name, item.item_quantity
+                                    + (0 if row is None else self._quantities[row]))
+        if row is not None:
+            self._set_line(name, quantity=self._quantities[row] + item.item_quantity)
+            return
+        price = Money(item.item_price)
+        quantity = item.item_quantity
+        self._rows[sys.intern(name)] = len(self._quantities)
+        self._prices.append(price.cents)
+        self._price_whole.append(price.whole)
+        self._quantities.append(quantity)
+        self._description_ids.append(self._strings.intern(item.item_description))
+        self._total_quantity += quantity
+        self._total_cents += price.cents * quantity
+        self._fractional_lines += not price.whole
+        if self._listeners:
+            self._notify("add", ItemView(self, name))
+
+    def remove_item(self, item_name):
+        """
+        Removes a line from the cart based on the item name
+        Parameters:
+            item_name: String representing the name of item to remove
+        Returns:
+            True if the item was removed, False if it was not in the cart
+        """
+        row = self._rows.pop(item_name, None)
+        if row is None:
+            print("Item not found in cart. Nothing removed.")
+            return False
+        self._drop_row(row, item_name)
+        self._after_removal()
+        return True
+
+    def modify_item(self, item):
+        """
+        Modifies an existing line in the cart
+        Only modifies attributes that are not default values
+        Parameters:
+            item: An ItemToPurchase object with the same name as an existing item
+                 but with updated attributes
+        Returns:
+            True if the item was modified, False if it was not in the cart
+        """
+        if item.item_name not in self._rows:
+            print("Item not found in cart. Nothing modified.")
+            return False
+        if self._inventory is not None and item.item_quantity != 0:
+            self._inventory.reserve(self, item.item_name, item.item_quantity)
+        self._set_line(
+            item.item_name,
+            price=item.item_price if item.item_price != 0 else None,
+            quantity=item.item_quantity if item.item_quantity != 0 else None,
+            description=item.item_description if item.item_description != "none" else None,
+        )
+        return True
+
+    def add_items(self, items):
+        """
+        Adds many items to the cart in one pass
+        Parameters:
+            items: Iterable of ItemToPurchase objects
+        Returns:
+            BatchResult with the number of items added and no missing names
+        """
+        if self._inventory is not None:
+            items = _reserve_added(self, items)
+        rows = self._rows
+        prices = self._prices
+        price_whole = self._price_whole
+        quantities = self._quantities
+        description_ids = self._description_ids
+        intern_description = self._strings.intern
+        applied = quantity_total = cents = fractional = 0
+        for item in items:
+            applied += 1
+            name = item.item_name
+            quantity = item.item_quantity
+            if name in rows:
+                self._set_line(name, quantity=quantities[rows[name]] + quantity)
+                continue
+            price = Money(item.item_price)
+            rows[sys.intern(name)] = len(quantities)
+            prices.append(price.cents)
+            price_whole.append(price.whole)
+            quantities.append(quantity)
+            description_ids.append(intern_description(item.item_description))
+            quantity_total += quantity
+            cents += price.cents * quantity
+            fractional += not price.whole
+            if self._listeners:
+                self._notify("add", ItemView(self, name))
+        self._total_quantity += quantity_total
+        self._total_cents += cents
+        self._fractional_lines += fractional
+        return BatchResult(applied, [])
+
+    def remove_items(self, item_names):
+        """
+        Removes many lines from the cart in one pass
+        Parameters:
+            item_names: Iterable of item name strings
+        Returns:
+            BatchResult with the number removed and the list of missing names
+        """
+        rows = self._rows
+        applied = 0
+        missing = []
+        for item_name in item_names:
+            row = rows.pop(item_name, None)
+            if row is None:
+                missing.append(item_name)
+                continue
+            applied += 1
+            self._drop_row(row, item_name)
+        self._after_removal()
+        return BatchResult(applied, missing)
+
+    def modify_items(self, items):
+        """
+        Modifies many existing lines in the cart in one pass
+        Parameters:
+            items: Iterable of ItemToPurchase objects holding the updates
+        Returns:
+            BatchResult with the number modified and the list of missing names
+        """
+        if self._inventory is not None:
+            items = _reserve_modified(self, items)
+        rows = self._rows
+        applied = 0
+        missing = []
+        for item in items:
+            if item.item_name not in rows:
+                missing.append(item.item_name)
+                continue
+            applied += 1
+            self._set_line(
+                item.item_name,
+                price=item.item_price if item.item_price != 0 else None,
+                quantity=item.item_quantity if item.item_quantity != 0 else None,
+                description=item.item_description if item.item_description != "none" else None,
+            )
+        return BatchResult(applied, missing)
+
+    def _drop_row(self, row, item_name):
+        """
+        Takes a row that has just left _rows out of the totals and zeroes it
+        Listeners are given a detached ItemToPurchase copy of the line.
+        """
+        quantity = self._quantities[row]
+        self._total_quantity -= quantity
+        self._total_cents -= self._prices[row] * quantity
+        self._fractional_lines -= not self._price_whole[row]
+        self._holes += 1
+        if self._listeners:
+            self._notify("remove", ItemToPurchase(
+                item_name, self._get_price(row), quantity,
+                self._strings.strings[self._description_ids[row]]))
+        # Holes hold a zero line, so sums over whole columns stay exact
+        self._prices[row] = 0
+        self._price_whole[row] = 1
+        self._quantities[row] = 0
+
+    def _after_removal(self):
+        """
+        Resets or compacts the columns once enough lines have been removed
+        """
+        if not self._rows:
+            self._clear_columns()
+        elif self._holes >= self.COMPACT_MIN_HOLES and self._holes * 2 > len(self._quantities):
+            self._compact()
+
+    def _get_price(self, row):
+        """
+        Returns the price stored in a row as Money
+        """
+        return Money.from_cents(self._prices[row], bool(self._price_whole[row]))
+
+    def _set_line(self, item_name, price=None, quantity=None, description=None):
+        """
+        Updates the columns of one line and the running totals
+        Arguments left as None are not changed.
+        """
+        row = self._rows[item_name]
+        old_cents = self._prices[row]
+        old_whole = self._price_whole[row]
+        old_quantity = self._quantities[row]
+        changes = ()
+        if description is not None:
+            changes += (("item_description", self._strings.strings[self._description_ids[row]]),)
+            self._description_ids[row] = self._strings.intern(description)
+        if price is not None:
+            changes += (("item_price", self._get_price(row)),)
+            price = Money(price)
+            self._prices[row] = price.cents
+            self._price_whole[row] = price.whole
+        if quantity is not None:
+            changes += (("item_quantity", old_quantity),)
+            self._quantities[row] = quantity
+        new_quantity = self._quantities[row]
+        self._total_quantity += new_quantity - old_quantity
+        self._total_cents += self._prices[row] * new_quantity - old_cents * old_quantity
+        self._fractional_lines += old_whole - self._price_whole[row]
+        if changes and self._listeners:
+            self._notify("update", ItemView(self, item_name), changes)
+
+    def _rename_line(self, old_name, new_name):
+        """
+        Re-keys a line under a new name, keeping its place in the cart
+        """
+        if new_name == old_name:
+            return
+        if new_name in self._rows:
+            raise ValueError(f"An item named {new_name!r} is already in the cart")
+        if self._inventory is not None:
+            self._inventory.reserve(self, new_name, self._quantities[self._rows[old_name]])
+        new_name = sys.intern(new_name)
+        self._rows = {(new_name if name == old_name else name): line_row
+                      for name, line_row in self._rows.items()}
+        if self._listeners:
+            self._notify("update", ItemView(self, new_name), (("item_name", old_name),))
+
+    def _clear_columns(self):
+        """
+        Resets the columns and totals once the last line is removed
+        """
+        self._rows = {}
+        self._prices = array("q")
+        self._price_whole = bytearray()
+        self._quantities = array("q")
+        self._description_ids = array("l")
+        self._strings = StringTable()
+        self._holes = 0
+        self._total_quantity = 0
+        self._total_cents = 0
+        self._fractional_lines = 0
+
+    def _compact(self):
+        """
+        Rewrites the columns without the holes left by removed lines
+        """
+        old_strings = self._strings.strings
+        prices = array("q")
+        price_whole = bytearray()
+        quantities = array("q")
+        description_ids = array("l")
+        strings = StringTable()
+        rows = {}
+        for name, row in self._rows.items():
+            rows[name] = len(quantities)
+            prices.append(self._prices[row])
+            price_whole.append(self._price_whole[row])
+            quantities.append(self._quantities[row])
+            description_ids.append(strings.intern(old_strings[self._description_ids[row]]))
+        self._rows = rows
+        self._prices = prices
+        self._price_whole = price_whole
+        self._quantities = quantities
+        self._description_ids = description_ids
+        self._strings = strings
+        self._holes = 0
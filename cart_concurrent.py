@@ -0,0 +1,304 @@
+"""
+Thread-safe shopping cart
+ConcurrentShoppingCart lets several threads edit one cart at once, for
+example a web handler and a price-sync thread. Writers lock only the item
+they change (with striped locks), plus a short lock around the name index
+when a line is added or removed. Readers never wait for writers: the totals
+are published together as one tuple, and iteration works on a copy-on-write
+snapshot of the lines.
+"""
+import threading
+
+from module8 import (BatchResult, ItemToPurchase, ShoppingCart, _apply_modification,
+                     _reserve_added, _reserve_modified)
+from money import Money
+
+
+class ConcurrentShoppingCart(ShoppingCart):
+    """
+    ShoppingCart that is safe to change from several threads at once
+    Reading the totals is lock-free and always gives a matching quantity and
+    cost. Iterating gives the lines that were in the cart at one moment; it
+    may miss a line that another thread is adding at the same time. Writing
+    an item's price or quantity directly (item.item_price = ...) takes the
+    line's lock, like modify_item. A read-modify-write of one item (such as
+    item.item_quantity += 1) is still two steps; use adjust_quantity.
+    """
+
+    def __init__(self, customer_name="none", current_date="January 1, 2020", stripes=64):
+        """
+        Constructor that initializes an empty thread-safe cart
+        Parameters:
+            customer_name: String representing the customer's name
+            current_date: String representing the current date
+            stripes: Number of item locks; names are spread across them
+        """
+        super().__init__(customer_name, current_date)
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+        self._structure_lock = threading.Lock()
+        self._totals_lock = threading.Lock()
+        # (quantity, cents, fractional lines), replaced as a whole on change
+        self._totals = (0, 0, 0)
+        self._version = 0
+        self._snapshot = ((), 0)  # (items, version they were copied at)
+
+    def _stripe(self, item_name):
+        return self._stripes[hash(item_name) % len(self._stripes)]
+
+    def _adjust_totals(self, quantity, cents, fractional):
+        with self._totals_lock:
+            old_quantity, old_cents, old_fractional = self._totals
+            self._totals = (old_quantity + quantity, old_cents + cents,
+                            old_fractional + fractional)
+
+    def get_num_items_in_cart(self):
+        """
+        Returns the total quantity of all items in the cart, without locking
+        """
+        return self._totals[0]
+
+    def get_cost_of_cart(self):
+        """
+        Returns the total cost of all items in the cart, without locking
+        """
+        _, cents, fractional = self._totals
+        return Money.from_cents(cents, fractional == 0)
+
+    def get_totals(self):
+        """
+        Returns the quantity and cost from the same moment, without locking
+        Returns:
+            Tuple (total quantity, total cost as Money)
+        """
+        quantity, cents, fractional = self._totals
+        return quantity, Money.from_cents(cents, fractional == 0)
+
+    def _lines(self):
+        """
+        Returns a tuple of the cart's items, copying only after a change
+        """
+        items, version = self._snapshot
+        if version == self._version:
+            return items
+        with self._structure_lock:
+            version = self._version
+            items = tuple(self._items.values())
+        self._snapshot = (items, version)
+        return items
+
+    def __iter__(self):
+        return iter(self._lines())
+
+    def __reversed__(self):
+        return reversed(self._lines())
+
+    def _insert(self, item):
+        with self._structure_lock:
+            self._items[item.item_name] = item
+            self._version += 1
+
+    def add_item(self, item):
+        """
+        Adds an ItemToPurchase object to the cart, locking only its name
+        Parameters:
+            item: An ItemToPurchase object to add to the cart
+        """
+        self._add(item)
+
+    def _add(self, item, reserve=True):
+        """
+        Adds an item under its name's lock
+        Parameters:
+            item: An ItemToPurchase object to add to the cart
+            reserve: False if the caller has reserved the stock already
+        """
+        with self._stripe(item.item_name):
+            existing = self._items.get(item.item_name)
+            if reserve and self._inventory is not None:
+                self._inventory.reserve(self, item.item_name, item.item_quantity
+                                        + (0 if existing is None else existing._item_quantity))
+            if existing is not None:
+                self._write_item_quantity(existing, existing._item_quantity + item.item_quantity)
+                return
+            if item._cart is not None:
+                item = ItemToPurchase(item.item_name, item.item_price,
+                                      item.item_quantity, item.item_description)
+            item._cart = self
+            self._insert(item)
+            price = item._item_price
+            self._adjust_totals(item._item_quantity, price.cents * item._item_quantity,
+                                not price.whole)
+            if self._listeners:
+                self._notify("add", item)
+
+    def _pop(self, item_name):
+        """
+        Removes a line by name and takes it out of the totals
+        The caller holds the name's stripe lock.
+        Returns:
+            The removed item, or None if it was not in the cart
+        """
+        with self._structure_lock:
+            item = self._items.pop(item_name, None)
+            if item is None:
+                return None
+            self._version += 1
+        item._cart = None
+        price = item._item_price
+        self._adjust_totals(-item._item_quantity, -price.cents * item._item_quantity,
+                            -(not price.whole))
+        if self._listeners:
+            self._notify("remove", item)
+        return item
+
+    def remove_item(self, item_name):
+        """
+        Removes an item from the cart, locking only its name
+        Parameters:
+            item_name: String representing the name of item to remove
+        Returns:
+            True if the item was removed, False if it was not in the cart
+        """
+        with self._stripe(item_name):
+            if self._pop(item_name) is None:
+                print("Item not found in cart. Nothing removed.")
+                return False
+            return True
+
+    def _modify(self, item, reserve=True):
+        """
+        Applies the non-default attributes of item to the line with its name
+        Parameters:
+            item: An ItemToPurchase object holding the updates
+            reserve: False if the caller has reserved the stock already
+        Returns:
+            True if the item was modified, False if it was not in the cart
+        """
+        with self._stripe(item.item_name):
+            cart_item = self._items.get(item.item_name)
+            if cart_item is None:
+                return False
+            if reserve and self._inventory is not None and item.item_quantity != 0:
+                self._inventory.reserve(self, item.item_name, item.item_quantity)
+            old_price = cart_item._item_price
+            old_quantity = cart_item._item_quantity
+            changes = _apply_modification(cart_item, item)
+            if changes:
+                self._item_changed(cart_item, old_price, old_quantity, changes)
+            return True
+
+    def modify_item(self, item):
+        """
+        Modifies an existing item in the cart, locking only its name
+        Only modifies attributes that are not default values
+        Parameters:
+            item: An ItemToPurchase object with the same name as an existing item
+                 but with updated attributes
+        Returns:
+            True if the item was modified, False if it was not in the cart
+        """
+        if not self._modify(item):
+            print("Item not found in cart. Nothing modified.")
+            return False
+        return True
+
+    def adjust_quantity(self, item_name, delta):
+        """
+        Atomically adds delta to an item's quantity
+        Parameters:
+            item_name: String representing the name of the item
+            delta: Integer to add (negative to take away)
+        Returns:
+            The new quantity, or None if the item is not in the cart
+        """
+        with self._stripe(item_name):
+            item = self._items.get(item_name)
+            if item is None:
+                return None
+            if self._inventory is not None:
+                self._inventory.reserve(self, item_name, item._item_quantity + delta)
+            self._write_item_quantity(item, item._item_quantity + delta)
+            return item._item_quantity
+
+    # The batch methods lock one name at a time, so other threads can work
+    # on the rest of the cart while a large batch runs. Their stock is
+    # reserved for the whole batch up front, not line by line, so a name
+    # that appears twice cannot give back part of the batch's hold and then
+    # fail to get it again
+
+    def add_items(self, items):
+        if self._inventory is not None:
+            items = _reserve_added(self, items)
+        applied = 0
+        for item in items:
+            self._add(item, reserve=False)
+            applied += 1
+        return BatchResult(applied, [])
+
+    def remove_items(self, item_names):
+        applied = 0
+        missing = []
+        for item_name in item_names:
+            with self._stripe(item_name):
+                if self._pop(item_name) is None:
+                    missing.append(item_name)
+                else:
+                    applied += 1
+        return BatchResult(applied, missing)
+
+    def modify_items(self, items):
+        if self._inventory is not None:
+            items = _reserve_modified(self, items)
+        applied = 0
+        missing = []
+        for item in items:
+            if self._modify(item, reserve=False):
+                applied += 1
+            else:
+                missing.append(item.item_name)
+        return BatchResult(applied, missing)
+
+    # Direct writes to an item's attributes read the old value, write the
+    # new one and adjust the totals under the line's lock, so they cannot
+    # interleave with modify_item or adjust_quantity on the same line
+
+    def _set_item_price(self, item, price):
+        with self._stripe(item._item_name):
+            super()._set_item_price(item, price)
+
+    def _set_item_quantity(self, item, quantity):
+        with self._stripe(item._item_name):
+            super()._set_item_quantity(item, quantity)
+
+    def _item_changed(self, item, old_price, old_quantity, changes):
+        price = item._item_price
+        quantity = item._item_quantity
+        self._adjust_totals(quantity - old_quantity,
+                            price.cents * quantity - old_price.cents * old_quantity,
+                            old_price.whole - price.whole)
+        if self._listeners:
+            self._notify("update", item, changes)
+
+    def _rename_item(self, item, new_name):
+        old_name = item.item_name
+        if new_name == old_name:
+            return
+        # Take both names' locks in a fixed order so two renames cannot deadlock
+        locks = sorted({self._stripe(old_name), self._stripe(new_name)}, key=id)
+        for lock in locks:
+            lock.acquire()
+        try:
+            if new_name in self._items:
+                raise ValueError(f"An item named {new_name!r} is already in the cart")
+            if self._inventory is not None:
+                self._inventory.reserve(self, new_name, item._item_quantity)
+            with self._structure_lock:
+                self._items = {(new_name if name == old_name else name): cart_item
+                               for name, cart_item in self._items.items()}
+                self._version += 1
+            # Renamed before the locks are let go, so a write to the item
+            # that was waiting on them locks and reserves the new name
+            item._item_name = new_name
+        finally:
+            for lock in reversed(locks):
+                lock.release()
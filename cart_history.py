@@ -0,0 +1,214 @@
+"""
+Undo and redo for shopping cart changes
+A CartHistory listens to a cart and, for every add, remove and update,
+keeps the change that would reverse it, encoded as a cart_journal record:
+a removal keeps the removed line so undo can add it back, an update keeps
+only the old values of the attributes that changed, and an add keeps just
+the name. No copy of the cart is ever made, so recording a change costs the
+same on a cart of any size.
+
+Undoing a step applies its records to the cart. The changes that makes are
+recorded the same way onto the redo stack, so redo is undo in the other
+direction. Any other change to the cart clears the redo stack.
+
+Undo brings back a cart's lines and totals but not always their order: a
+line whose removal is undone is added back, so it comes back as the last
+line rather than where it was. Remembering its place would mean finding it
+among the other lines on every removal.
+
+Both stacks are bounded by a number of steps and by the bytes their records
+take up; the oldest steps are forgotten first.
+"""
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+from cart_journal import apply_record, encode_event
+from module8 import ItemToPurchase
+
+# Defaults for the bounds of each of the undo and redo stacks
+MAX_STEPS = 100
+MAX_BYTES = 1024 * 1024
+
+
+def inverse_record(event, item, changes):
+    """
+    Encodes the change that reverses one cart listener event
+    Parameters:
+        event: "add", "remove" or "update"
+        item: The ItemToPurchase the event is about
+        changes: Tuple of (attribute name, old value) pairs for updates
+    Returns:
+        Bytes holding a journal record payload
+    """
+    if event == "add":
+        return encode_event("remove", item, None)
+    if event == "remove":
+        return encode_event("add", item, None)
+    old = dict(changes)
+    # An update record changing these attributes back: the item holds the
+    # old values, and the changes the current ones (of which encode_event
+    # reads only the name, to find the line)
+    restore = ItemToPurchase(old.get("item_name", item.item_name), old.get("item_price", 0),
+                             old.get("item_quantity", 0), old.get("item_description", "none"))
+    return encode_event("update", restore,
+                        tuple((attribute, getattr(item, attribute)) for attribute in old))
+
+
+class CartHistory:
+    """
+    Class keeping undo and redo stacks of a cart's changes
+    Each change is one step; group several into one step with step().
+    """
+
+    def __init__(self, cart, max_steps=MAX_STEPS, max_bytes=MAX_BYTES):
+        """
+        Constructor that starts recording a cart's changes
+        Parameters:
+            cart: The ShoppingCart (or subclass) to record
+            max_steps: Most steps kept on each of the undo and redo stacks
+            max_bytes: Most bytes of records kept on each stack
+        """
+        self.cart = cart
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self._undo = deque()  # (records, bytes) of each step, latest last
+        self._redo = deque()
+        self._undo_bytes = 0
+        self._redo_bytes = 0
+        self._step = None  # records of the step() in progress
+        self._replayed = None  # records made while undoing or redoing
+        cart.add_listener(self._record)
+
+    def _record(self, cart, event, item, changes):
+        record = inverse_record(event, item, changes)
+        if self._replayed is not None:
+            self._replayed.append(record)
+        elif self._step is not None:
+            self._step.append(record)
+        else:
+            self._clear_redo()
+            self._undo_bytes = self._push(self._undo, self._undo_bytes, [record])
+
+    def _push(self, stack, stack_bytes, records):
+        """
+        Puts a step on a stack, then forgets the oldest steps over the bounds
+        Returns:
+            The new number of bytes on the stack
+        """
+        size = sys.getsizeof(records) + sum(map(sys.getsizeof, records))
+        stack.append((records, size))
+        stack_bytes += size
+        while stack and (len(stack) > self.max_steps or stack_bytes > self.max_bytes):
+            stack_bytes -= stack.popleft()[1]
+        return stack_bytes
+
+    def _clear_redo(self):
+        self._redo.clear()
+        self._redo_bytes = 0
+
+    @contextmanager
+    def step(self):
+        """
+        Context manager that makes every change inside it one undo step
+        """
+        if self._step is not None:
+            raise RuntimeError("history steps cannot be nested")
+        self._step = []
+        try:
+            yield self
+        finally:
+            records, self._step = self._step, None
+            if records:
+                self._clear_redo()
+                self._undo_bytes = self._push(self._undo, self._undo_bytes, records)
+
+    def _replay(self, records):
+        """
+        Applies a step's records, latest first
+        If a record cannot be applied (such as an add refused with
+        OutOfStock), the ones applied before it are reversed and the error
+        is raised, leaving the cart as it was.
+        Returns:
+            The records that reverse what was applied
+        """
+        if self._step is not None:
+            raise RuntimeError("cannot undo or redo inside a history step")
+        self._replayed = []
+        try:
+            for record in reversed(records):
+                apply_record(self.cart, record)
+            return self._replayed
+        except Exception:
+            # The reversing changes are recorded into a list that is thrown
+            # away, so they touch neither stack
+            applied, self._replayed = self._replayed, []
+            for record in reversed(applied):
+                apply_record(self.cart, record)
+            raise
+        finally:
+            self._replayed = None
+
+    def undo(self):
+        """
+        Reverses the latest step
+        Returns:
+            True if a step was undone, False if there was none to undo
+        """
+        if not self._undo:
+            return False
+        # The step stays on the stack until it has been replayed, so one
+        # that fails can be undone later
+        records, size = self._undo[-1]
+        replayed = self._replay(records)
+        self._undo.pop()
+        self._undo_bytes -= size
+        self._redo_bytes = self._push(self._redo, self._redo_bytes, replayed)
+        return True
+
+    def redo(self):
+        """
+        Makes the latest undone step again
+        Returns:
+            True if a step was redone, False if there was none to redo
+        """
+        if not self._redo:
+            return False
+        records, size = self._redo[-1]
+        replayed = self._replay(records)
+        self._redo.pop()
+        self._redo_bytes -= size
+        self._undo_bytes = self._push(self._undo, self._undo_bytes, replayed)
+        return True
+
+    def can_undo(self):
+        """
+        Returns True if there is a step to undo
+        """
+        return bool(self._undo)
+
+    def can_redo(self):
+        """
+        Returns True if there is a step to redo
+        """
+        return bool(self._redo)
+
+    def memory(self):
+        """
+        Returns the bytes of records held on the undo and redo stacks
+        """
+        return self._undo_bytes + self._redo_bytes
+
+    def clear(self):
+        """
+        Forgets every step
+        """
+        self._undo.clear()
+        self._undo_bytes = 0
+        self._clear_redo()
+
+    def close(self):
+        """
+        Stops recording the cart's changes
+        """
+        self.cart.remove_listener(self._record)
@@ -0,0 +1,233 @@
+"""
+Streaming import of order files into a shopping cart
+Orders arrive as CSV files with a header row, or as JSONL files holding one
+JSON object per line. Each row names an item and gives its price, quantity
+and, optionally, its description:
+
+    name,price,quantity,description
+    Nike Romaleos,189,2,"Volt color, Weightlifting shoes"
+
+    {"name": "Nike Romaleos", "price": 189, "quantity": 2, "description": "..."}
+
+The item_name, item_price, item_quantity and item_description spellings are
+accepted too. Rows are read, checked and turned into ItemToPurchase objects
+one at a time by generators, and added to the cart CHUNK_ROWS at a time
+with add_items, so a file of any size is imported in constant memory (apart
+from the cart itself). A bad row is recorded as a RowError and skipped
+rather than stopping the import. Files are read as UTF-8; a line holding
+bytes that are not is such a bad row too.
+"""
+import csv
+import json
+from collections import namedtuple
+from itertools import islice
+
+from module8 import ItemToPurchase
+from money import Money
+
+# Message of the RowError for a line holding bytes that are not UTF-8
+INVALID_UTF8 = "invalid UTF-8"
+
+# Rows added to the cart by each add_items call
+CHUNK_ROWS = 10_000
+
+# Most RowErrors an import keeps; later ones are only counted
+MAX_ERRORS = 1000
+
+# Where a bad row is in the file and what is wrong with it
+RowError = namedtuple("RowError", ["line", "message"])
+
+# Outcome of an import: rows added to the cart, rows skipped, and the first
+# MAX_ERRORS RowErrors
+ImportResult = namedtuple("ImportResult", ["imported", "rejected", "errors"])
+
+FIELDS = {
+    "name": "name", "item_name": "name",
+    "price": "price", "item_price": "price",
+    "quantity": "quantity", "item_quantity": "quantity",
+    "description": "description", "item_description": "description",
+}
+
+
+def _field(key):
+    # Canonical field name for a column name or JSON key, or None to ignore it
+    return FIELDS.get(key.strip().lower()) if isinstance(key, str) else None
+
+
+def _undecodable(text):
+    # True if text holds bytes that were not UTF-8, which surrogateescape
+    # decoding turns into lone surrogates
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+def read_csv(file):
+    """
+    Reads the rows of a CSV order file
+    Parameters:
+        file: Text file opened with newline="" (and errors="surrogateescape"
+              to report undecodable lines as bad rows)
+    Returns:
+        Generator of (line number, row) pairs, where a row is a dictionary
+        keyed by the fields in FIELDS' values, or an error message for a
+        row the reader cannot split
+    """
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+    # Work out once which field each column holds
+    columns = [(position, field) for position, field in enumerate(map(_field, header))
+               if field is not None]
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            yield reader.line_num, str(error)
+            continue
+        if not values:
+            continue
+        if any(map(_undecodable, values)):
+            yield reader.line_num, INVALID_UTF8
+            continue
+        count = len(values)
+        yield reader.line_num, {field: values[position] for position, field in columns
+                                if position < count}
+
+
+def read_jsonl(file):
+    """
+    Reads the rows of a JSONL order file
+    Parameters:
+        file: Text file (opened with errors="surrogateescape" to report
+              undecodable lines as bad rows)
+    Returns:
+        Generator of (line number, row) pairs, one per non-blank line, as
+        for read_csv; a line that is not a JSON object gives an error
+        message
+    """
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        if _undecodable(line):
+            yield number, INVALID_UTF8
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, f"invalid JSON: {error}"
+            continue
+        if not isinstance(row, dict):
+            yield number, "expected a JSON object"
+            continue
+        yield number, {field: value for field, value in zip(map(_field, row), row.values())
+                       if field is not None and value is not None}
+
+
+def to_item(row):
+    """
+    Checks one order row and turns it into an item
+    Raises ValueError describing the first problem found with the row.
+    Parameters:
+        row: Dictionary with the keys name, price, quantity and optionally
+             description, as read_csv and read_jsonl give
+    Returns:
+        An ItemToPurchase
+    """
+    name = row.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("missing item name")
+    price = row.get("price")
+    try:
+        price = Money(price.strip() if isinstance(price, str) else price)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {price!r}") from None
+    if price.cents < 0:
+        raise ValueError(f"negative price {price}")
+    quantity = row.get("quantity")
+    if isinstance(quantity, str) and quantity.strip().isdecimal():
+        quantity = int(quantity)
+    if type(quantity) is not int or quantity < 1:
+        raise ValueError(f"invalid quantity {quantity!r}")
+    description = row.get("description", "none")
+    if not isinstance(description, str):
+        raise ValueError(f"invalid description {description!r}")
+    return ItemToPurchase(name.strip(), price, quantity, description or "none")
+
+
+def parse_orders(rows, on_error):
+    """
+    Turns order rows into items, skipping bad rows
+    Parameters:
+        rows: Iterable of (line number, row or error message) pairs, as
+              read_csv and read_jsonl give
+        on_error: Function called with a RowError for each bad row
+    Returns:
+        Generator of ItemToPurchase objects
+    """
+    for line, row in rows:
+        if isinstance(row, str):
+            on_error(RowError(line, row))
+            continue
+        try:
+            yield to_item(row)
+        except ValueError as error:
+            on_error(RowError(line, str(error)))
+
+
+def import_orders(cart, path, file_format=None, chunk_rows=CHUNK_ROWS, max_errors=MAX_ERRORS):
+    """
+    Adds the items of an order file to a cart
+    Parameters:
+        cart: A ShoppingCart (or subclass) to add to
+        path: Path of the order file
+        file_format: "csv" or "jsonl"; by default taken from the file name
+                     (.jsonl and .ndjson are JSONL, anything else is CSV)
+        chunk_rows: Rows added with each add_items call
+        max_errors: Most RowErrors kept in the result
+    Returns:
+        ImportResult
+    """
+    if file_format is None:
+        file_format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    if file_format not in ("csv", "jsonl"):
+        raise ValueError(f"unknown order file format {file_format!r}")
+    with open(path, newline="" if file_format == "csv" else None, encoding="utf-8",
+              errors="surrogateescape") as file:
+        return import_stream(cart, read_csv(file) if file_format == "csv" else read_jsonl(file),
+                             chunk_rows, max_errors)
+
+
+def import_stream(cart, rows, chunk_rows=CHUNK_ROWS, max_errors=MAX_ERRORS):
+    """
+    Adds the items of a stream of order rows to a cart
+    Parameters:
+        cart: A ShoppingCart (or subclass) to add to
+        rows: Iterable of (line number, row or error message) pairs, as
+              read_csv and read_jsonl give
+        chunk_rows: Rows added with each add_items call
+        max_errors: Most RowErrors kept in the result
+    Returns:
+        ImportResult
+    """
+    errors = []
+    rejected = 0
+
+    def on_error(error):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors:
+            errors.append(error)
+
+    items = parse_orders(rows, on_error)
+    imported = 0
+    while True:
+        chunk = list(islice(items, chunk_rows))
+        if not chunk:
+            return ImportResult(imported, rejected, errors)
+        imported += cart.add_items(chunk).applied
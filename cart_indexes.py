@@ -0,0 +1,258 @@
+"""
+Secondary indexes over the lines of a shopping cart
+A CartIndex listens to a cart and keeps its lines sorted by price and by line
+total, and a token index over their descriptions, up to date with every
+change. Queries then find lines without scanning and sorting the whole cart:
+    top_n             most expensive lines, by price or by line total
+    price_range       lines with a price in a range, cheapest first
+    search            lines whose description contains a text
+The orderings are kept in chunked sorted lists, so a line change costs a
+binary search and an insert into one short chunk, and each query costs a
+binary search plus the lines it returns.
+
+Changes the cart does not report to its listeners are not seen: a catalog
+price changed through another CatalogShoppingCart, for instance.
+"""
+import re
+from bisect import bisect_left, insort
+from itertools import islice, takewhile
+
+from money import Money
+
+TOKEN = re.compile(r"\w+")
+
+
+class SortedKeys:
+    """
+    Class holding sorted keys in chunks of at most CHUNK keys
+    Inserting into one big sorted list moves everything after the insert
+    point; here only the rest of one chunk moves.
+    """
+    CHUNK = 512
+
+    def __init__(self, keys=()):
+        """
+        Constructor that sorts the initial keys
+        Parameters:
+            keys: Iterable of keys
+        """
+        keys = sorted(keys)
+        half = self.CHUNK // 2
+        self._chunks = [keys[start:start + half] for start in range(0, len(keys), half)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]  # last key of each chunk
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        """
+        Inserts a key
+        """
+        self._len += 1
+        chunks = self._chunks
+        if not chunks:
+            chunks.append([key])
+            self._maxes.append(key)
+            return
+        position = bisect_left(self._maxes, key)
+        if position == len(chunks):
+            position -= 1
+        chunk = chunks[position]
+        insort(chunk, key)
+        self._maxes[position] = chunk[-1]
+        if len(chunk) > self.CHUNK:
+            half = len(chunk) // 2
+            chunks.insert(position + 1, chunk[half:])
+            del chunk[half:]
+            self._maxes.insert(position, chunk[-1])
+
+    def remove(self, key):
+        """
+        Removes a key that is present
+        """
+        position = bisect_left(self._maxes, key)
+        chunk = self._chunks[position]
+        del chunk[bisect_left(chunk, key)]
+        self._len -= 1
+        if chunk:
+            self._maxes[position] = chunk[-1]
+        else:
+            del self._chunks[position]
+            del self._maxes[position]
+
+    def largest(self):
+        """
+        Returns an iterator over the keys, largest first
+        """
+        for chunk in reversed(self._chunks):
+            yield from reversed(chunk)
+
+    def from_key(self, low):
+        """
+        Returns an iterator over the keys not below low, smallest first
+        """
+        position = bisect_left(self._maxes, low)
+        if position == len(self._chunks):
+            return
+        chunk = self._chunks[position]
+        yield from chunk[bisect_left(chunk, low):]
+        for chunk in self._chunks[position + 1:]:
+            yield from chunk
+
+
+def tokenize(text):
+    """
+    Splits text into the lowercase words the description index uses
+    Parameters:
+        text: String to split
+    Returns:
+        Set of word strings
+    """
+    return set(TOKEN.findall(text.lower()))
+
+
+class CartIndex:
+    """
+    Class keeping price-ordered and description indexes of a cart's lines
+    """
+
+    def __init__(self, cart):
+        """
+        Constructor that indexes a cart and starts following its changes
+        Parameters:
+            cart: A ShoppingCart (or subclass) to index
+        """
+        self.cart = cart
+        self._tokens = {}  # word -> set of names whose description has it
+        self._entries = {}  # name -> (price cents, total cents, description)
+        for item in cart:
+            self._entries[item.item_name] = self._entry(item)
+        self._by_price = SortedKeys((entry[0], name) for name, entry in self._entries.items())
+        self._by_total = SortedKeys((entry[1], name) for name, entry in self._entries.items())
+        for name, entry in self._entries.items():
+            self._add_tokens(name, entry[2])
+        cart.add_listener(self._changed)
+
+    @staticmethod
+    def _entry(item):
+        price = item.item_price.cents
+        return price, price * item.item_quantity, item.item_description
+
+    def _add_tokens(self, name, description):
+        for token in tokenize(description):
+            self._tokens.setdefault(token, set()).add(name)
+
+    def _remove_tokens(self, name, description):
+        for token in tokenize(description):
+            names = self._tokens[token]
+            names.discard(name)
+            if not names:
+                del self._tokens[token]
+
+    def _changed(self, cart, event, item, changes):
+        name = item.item_name
+        if event == "add":
+            entry = self._entries[name] = self._entry(item)
+            self._by_price.add((entry[0], name))
+            self._by_total.add((entry[1], name))
+            self._add_tokens(name, entry[2])
+            return
+        if event == "remove":
+            entry = self._entries.pop(name)
+            self._by_price.remove((entry[0], name))
+            self._by_total.remove((entry[1], name))
+            self._remove_tokens(name, entry[2])
+            return
+        old_name = name
+        for attribute, old in changes:
+            if attribute == "item_name":
+                old_name = old
+        old_entry = self._entries.pop(old_name)
+        entry = self._entries[name] = self._entry(item)
+        # Only the orderings whose key changed need to move
+        for keys, old_key, key in ((self._by_price, (old_entry[0], old_name), (entry[0], name)),
+                                   (self._by_total, (old_entry[1], old_name), (entry[1], name))):
+            if key != old_key:
+                keys.remove(old_key)
+                keys.add(key)
+        if name != old_name or entry[2] != old_entry[2]:
+            self._remove_tokens(old_name, old_entry[2])
+            self._add_tokens(name, entry[2])
+
+    def close(self):
+        """
+        Stops following the cart's changes
+        """
+        self.cart.remove_listener(self._changed)
+
+    def _items(self, names):
+        find_item = self.cart.find_item
+        return [find_item(name) for name in names]
+
+    def top_n(self, n, by="price"):
+        """
+        Returns the most expensive lines, most expensive first
+        Parameters:
+            n: Integer number of lines to return
+            by: "price" for the unit price or "total" for price times quantity
+        Returns:
+            List of items
+        """
+        if by == "price":
+            keys = self._by_price
+        elif by == "total":
+            keys = self._by_total
+        else:
+            raise ValueError(f"unknown ordering {by!r}; expected 'price' or 'total'")
+        if n <= 0:
+            return []
+        return self._items(name for _, name in islice(keys.largest(), n))
+
+    def price_range(self, low=None, high=None):
+        """
+        Returns the lines priced between low and high, cheapest first
+        Parameters:
+            low: Lowest price to include as Money or a number, or None
+            high: Highest price to include as Money or a number, or None
+        Returns:
+            List of items
+        """
+        # (cents,) sorts before every (cents, name) key
+        keys = self._by_price.from_key(() if low is None else (Money(low).cents,))
+        if high is not None:
+            end = (Money(high).cents + 1,)
+            keys = takewhile(lambda key: key < end, keys)
+        return self._items(name for _, name in keys)
+
+    def search(self, text):
+        """
+        Returns the lines whose description contains text, ignoring case
+        Only words in the index that contain a word of text are looked at,
+        so the cost depends on the number of distinct words and matches
+        rather than on the number of lines.
+        Parameters:
+            text: String to look for
+        Returns:
+            List of items, cheapest first
+        """
+        needle = text.lower()
+        words = TOKEN.findall(needle)
+        if not words:
+            # Text with no word characters cannot use the token index
+            return [item for item in self.cart if needle in item.item_description.lower()]
+        candidates = None
+        for word in words:
+            names = set()
+            for token, token_names in self._tokens.items():
+                if word in token:
+                    names |= token_names
+            candidates = names if candidates is None else candidates & names
+            if not candidates:
+                return []
+        # A word of text may span several words of a description, so the
+        # candidates are checked against the whole description
+        entries = self._entries
+        matches = sorted((entries[name][0], name) for name in candidates
+                         if needle in entries[name][2].lower())
+        return self._items(name for _, name in matches)
@@ -0,0 +1,344 @@
+"""
+Stock reservations for shopping carts
+An Inventory is an in-process stock table, standing in for a real stock
+store. A cart with an inventory set (ShoppingCart.set_inventory) holds stock
+for its lines: add_item, modify_item, the batch methods, renames and
+quantities written straight to an item (item.item_quantity = n) reserve the
+line's new quantity before changing it, and raise OutOfStock, leaving the
+cart unchanged, when there is not enough. Removing a line releases its hold.
+A batch is reserved all or nothing, before any of it is applied.
+
+Holds expire ttl seconds after they were last reserved, so the stock held
+by abandoned carts comes back when release_expired() runs. The cart keeps
+its lines; changing a line reserves it again, and checkout() reserves any
+expired lines before selling.
+
+Stock is spread over striped locks, so carts on different threads that
+reserve different items rarely wait for each other. A batch takes the locks
+of all its items in a fixed order, so two batches cannot deadlock.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from module8 import OutOfStock
+
+# Seconds a hold lasts after it was last reserved
+DEFAULT_TTL = 15 * 60
+
+
+class _Stripe:
+    """
+    Lock of a share of the item names, with the expiry times of their holds
+    """
+    __slots__ = ("lock", "deadlines", "holds")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deadlines = []  # heap of (deadline, sequence, holder, name)
+        self.holds = 0
+
+    def compact(self, entries):
+        """
+        Drops the deadlines left behind by holds that were renewed or released
+        """
+        live = []
+        for deadline in self.deadlines:
+            hold = entries[deadline[3]][2].get(deadline[2])
+            if hold is not None and hold[1] == deadline[0]:
+                live.append(deadline)
+        heapq.heapify(live)
+        self.deadlines = live
+
+
+class Inventory:
+    """
+    Class holding stock levels and the holds carts have on them
+    Each item name has an entry [on hand, held, {holder: [quantity,
+    deadline]}]; an entry is only read or changed under its name's stripe
+    lock.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, stripes=64, clock=time.monotonic):
+        """
+        Constructor that creates an empty stock table
+        Parameters:
+            ttl: Seconds a hold lasts after it was last reserved, or None
+                 for holds that never expire
+            stripes: Number of locks; item names are spread across them
+            clock: Function returning the current time in seconds
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._entries = {}
+        self._sequence = itertools.count()
+
+    def _stripe(self, name):
+        return self._stripes[hash(name) % len(self._stripes)]
+
+    def _entry(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries.setdefault(name, [0, 0, {}])
+        return entry
+
+    def stock(self, name, quantity):
+        """
+        Sets the quantity of an item on hand, held or not
+        Parameters:
+            name: String representing the item name
+            quantity: Integer quantity on hand
+        """
+        with self._stripe(name).lock:
+            self._entry(name)[0] = quantity
+
+    def stock_many(self, quantities):
+        """
+        Sets the quantities on hand of many items
+        Parameters:
+            quantities: Dictionary or iterable of (item name, quantity) pairs
+        """
+        for name, quantity in dict(quantities).items():
+            self.stock(name, quantity)
+
+    def on_hand(self, name):
+        """
+        Returns the quantity of an item on hand, held or not
+        """
+        entry = self._entries.get(name)
+        return 0 if entry is None else entry[0]
+
+    def available(self, name):
+        """
+        Returns the quantity of an item on hand and not held by any cart
+        """
+        entry = self._entries.get(name)
+        return 0 if entry is None else entry[0] - entry[1]
+
+    def held(self, name, holder=None):
+        """
+        Returns the quantity of an item held by one holder, or by all of them
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            return 0
+        if holder is None:
+            return entry[1]
+        hold = entry[2].get(holder)
+        return 0 if hold is None else hold[0]
+
+    def _shortfall(self, entry, holder, quantity):
+        """
+        Returns the most holder can have of an entry if quantity is more,
+        else None; the caller holds the stripe lock
+        """
+        if entry is None:
+            return 0 if quantity > 0 else None
+        hold = entry[2].get(holder)
+        current = 0 if hold is None else hold[0]
+        if quantity > current and quantity - current > entry[0] - entry[1]:
+            return max(entry[0] - entry[1] + current, 0)
+        return None
+
+    def _set_hold(self, stripe, holder, name, quantity, now):
+        """
+        Makes holder's hold on name quantity, without checking the stock;
+        the caller holds the stripe lock
+        """
+        entry = self._entry(name)
+        holds = entry[2]
+        hold = holds.get(holder)
+        current = 0 if hold is None else hold[0]
+        entry[1] += quantity - current
+        if quantity <= 0:
+            if hold is not None:
+                del holds[holder]
+                stripe.holds -= 1
+            return
+        deadline = None if self.ttl is None else now + self.ttl
+        if hold is None:
+            holds[holder] = [quantity, deadline]
+            stripe.holds += 1
+        else:
+            hold[0] = quantity
+            if hold[1] == deadline:
+                return
+            hold[1] = deadline
+        if deadline is not None:
+            heapq.heappush(stripe.deadlines, (deadline, next(self._sequence), holder, name))
+            # Renewing a hold leaves its old deadline behind; keep those
+            # from outnumbering the holds
+            if len(stripe.deadlines) > 64 + 2 * stripe.holds:
+                stripe.compact(self._entries)
+
+    def reserve(self, holder, name, quantity):
+        """
+        Sets how much of an item a holder holds
+        Asking for less than the holder has releases the difference; asking
+        for the same renews the hold's expiry.
+        Parameters:
+            holder: Object holding the stock, such as a cart
+            name: String representing the item name
+            quantity: Integer quantity the holder should hold in all
+        Raises OutOfStock, changing nothing, if the item does not have
+        enough available.
+        """
+        stripe = self._stripes[hash(name) % len(self._stripes)]
+        with stripe.lock:
+            # _shortfall, inlined: this is the path every add_item takes
+            entry = self._entries.get(name)
+            if entry is None:
+                if quantity > 0:
+                    raise OutOfStock({name: 0})
+                return
+            hold = entry[2].get(holder)
+            current = 0 if hold is None else hold[0]
+            if quantity > current and quantity - current > entry[0] - entry[1]:
+                raise OutOfStock({name: max(entry[0] - entry[1] + current, 0)})
+            self._set_hold(stripe, holder, name, quantity, self._clock())
+
+    def _lock_all(self, names):
+        """
+        Takes the stripe locks of some names, in a fixed order
+        Returns:
+            List of the stripes locked, to pass to _unlock_all
+        """
+        stripes = sorted({self._stripe(name) for name in names}, key=id)
+        for stripe in stripes:
+            stripe.lock.acquire()
+        return stripes
+
+    @staticmethod
+    def _unlock_all(stripes):
+        for stripe in reversed(stripes):
+            stripe.lock.release()
+
+    def reserve_many(self, holder, quantities):
+        """
+        Sets how much a holder holds of many items, all or nothing
+        Parameters:
+            holder: Object holding the stock, such as a cart
+            quantities: Dictionary or iterable of (item name, quantity in
+                        all) pairs
+        Raises OutOfStock, changing nothing, naming every item that does not
+        have enough available.
+        """
+        quantities = dict(quantities)
+        entries = self._entries
+        stripes = self._lock_all(quantities)
+        try:
+            shortages = {}
+            for name, quantity in quantities.items():
+                short = self._shortfall(entries.get(name), holder, quantity)
+                if short is not None:
+                    shortages[name] = short
+            if shortages:
+                raise OutOfStock(shortages)
+            now = self._clock()
+            stripe = self._stripe
+            for name, quantity in quantities.items():
+                self._set_hold(stripe(name), holder, name, quantity, now)
+        finally:
+            self._unlock_all(stripes)
+
+    def release(self, holder, names):
+        """
+        Releases a holder's holds on some items
+        Parameters:
+            holder: Object holding the stock
+            names: Iterable of item names
+        """
+        now = self._clock()
+        for name in names:
+            stripe = self._stripe(name)
+            with stripe.lock:
+                if name in self._entries:
+                    self._set_hold(stripe, holder, name, 0, now)
+
+    def release_expired(self):
+        """
+        Releases every hold whose expiry time has passed
+        Returns:
+            Number of holds released
+        """
+        now = self._clock()
+        released = 0
+        for stripe in self._stripes:
+            if not stripe.deadlines or stripe.deadlines[0][0] > now:
+                continue
+            with stripe.lock:
+                deadlines = stripe.deadlines
+                while deadlines and deadlines[0][0] <= now:
+                    deadline, _, holder, name = heapq.heappop(deadlines)
+                    entry = self._entries.get(name)
+                    hold = None if entry is None else entry[2].get(holder)
+                    # Renewed holds leave their old deadlines behind
+                    if hold is not None and hold[1] == deadline:
+                        entry[1] -= hold[0]
+                        del entry[2][holder]
+                        stripe.holds -= 1
+                        released += 1
+        return released
+
+    def attach(self, cart):
+        """
+        Starts holding stock for a cart's lines, and following its changes
+        ShoppingCart.set_inventory calls this.
+        Raises OutOfStock, changing nothing, if the lines already in the cart
+        cannot all be held.
+        """
+        self.reserve_many(cart, ((item.item_name, item.item_quantity) for item in cart))
+        cart.add_listener(self._changed)
+
+    def detach(self, cart):
+        """
+        Releases a cart's holds and stops following its changes
+        """
+        cart.remove_listener(self._changed)
+        self.release(cart, [item.item_name for item in cart])
+
+    def _changed(self, cart, event, item, changes):
+        # The cart reserves new quantities and names before changing them,
+        # so all that is left is releasing the holds of removed lines and
+        # of the old names of renamed ones
+        if event == "remove":
+            self.release(cart, [item.item_name])
+            return
+        if changes:
+            for attribute, old in changes:
+                if attribute == "item_name":
+                    self.release(cart, [old])
+
+    def checkout(self, cart):
+        """
+        Sells a cart's lines, taking their quantities out of stock
+        Lines whose holds expired are reserved again first. The cart keeps
+        its lines, now without holds; empty or detach it afterwards.
+        Parameters:
+            cart: The ShoppingCart to sell
+        Raises OutOfStock, changing nothing, if any line cannot be held.
+        """
+        quantities = {item.item_name: item.item_quantity for item in cart}
+        entries = self._entries
+        stripes = self._lock_all(quantities)
+        try:
+            shortages = {}
+            for name, quantity in quantities.items():
+                short = self._shortfall(entries.get(name), cart, quantity)
+                if short is not None:
+                    shortages[name] = short
+            if shortages:
+                raise OutOfStock(shortages)
+            for name, quantity in quantities.items():
+                entry = entries.get(name)
+                if entry is None:
+                    continue
+                hold = entry[2].pop(cart, None)
+                if hold is not None:
+                    entry[1] -= hold[0]
+                    self._stripe(name).holds -= 1
+                entry[0] -= quantity
+        finally:
+            self._unlock_all(stripes)
@@ -0,0 +1,360 @@
+"""
+Write-ahead journal for shopping carts
+A CartJournal listens to a cart and appends a compact binary record for every
+add, remove and update. Records are collected in memory and written with one
+write and one fsync per group commit, either when commit_interval has passed
+or when max_pending records are waiting, so the mutation path never waits on
+the disk for a single operation.
+
+open_cart rebuilds a cart after a crash: it loads the latest snapshot, if
+there is one, and replays the journal records written after it. A checkpoint
+writes the emptied journal to a temporary file and renames it into place, so
+a crash during one never leaves the journal truncated.
+
+Journal file layout (all integers little-endian):
+    header      magic "CJNL", format version, sequence number of the first
+                record in the file, customer name and date
+    records     each framed as payload length, CRC-32 of the payload, payload
+A torn record at the end of the file (from a crash in the middle of a write)
+fails its length or CRC check; replay stops there and open_cart cuts it off.
+"""
+import os
+import struct
+import threading
+import zlib
+
+from cart_snapshot import CartSnapshot, save_cart
+from module8 import ItemToPurchase, ShoppingCart
+from money import Money
+
+MAGIC = b"CJNL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQII")
+FRAME = struct.Struct("<II")
+LENGTH = struct.Struct("<I")
+PRICE = struct.Struct("<qB")
+QUANTITY = struct.Struct("<q")
+
+ADD = b"A"
+REMOVE = b"R"
+UPDATE = b"U"
+
+# Bits of the update record mask, one per attribute that changed
+NAME_CHANGED = 1
+PRICE_CHANGED = 2
+QUANTITY_CHANGED = 4
+DESCRIPTION_CHANGED = 8
+
+
+class JournalError(Exception):
+    """
+    Raised when a journal cannot be used to recover a cart
+    """
+
+
+def _pack_text(text):
+    data = text.encode("utf-8")
+    return LENGTH.pack(len(data)) + data
+
+
+def _unpack_text(payload, position):
+    (length,) = LENGTH.unpack_from(payload, position)
+    position += LENGTH.size
+    return payload[position:position + length].decode("utf-8"), position + length
+
+
+def encode_event(event, item, changes):
+    """
+    Encodes one cart listener event as a journal record payload
+    Parameters:
+        event: "add", "remove" or "update"
+        item: The ItemToPurchase the event is about
+        changes: Tuple of (attribute name, old value) pairs for updates
+    Returns:
+        Bytes holding the record payload
+    """
+    if event == "add":
+        price = item.item_price
+        return b"".join((ADD, _pack_text(item.item_name), PRICE.pack(price.cents, price.whole),
+                         QUANTITY.pack(item.item_quantity), _pack_text(item.item_description)))
+    if event == "remove":
+        return REMOVE + _pack_text(item.item_name)
+    changed = dict(changes)
+    old_name = changed.get("item_name", item.item_name)
+    mask = 0
+    parts = [UPDATE, _pack_text(old_name), b""]
+    if "item_name" in changed:
+        mask |= NAME_CHANGED
+        parts.append(_pack_text(item.item_name))
+    if "item_price" in changed:
+        mask |= PRICE_CHANGED
+        parts.append(PRICE.pack(item.item_price.cents, item.item_price.whole))
+    if "item_quantity" in changed:
+        mask |= QUANTITY_CHANGED
+        parts.append(QUANTITY.pack(item.item_quantity))
+    if "item_description" in changed:
+        mask |= DESCRIPTION_CHANGED
+        parts.append(_pack_text(item.item_description))
+    parts[2] = bytes((mask,))
+    return b"".join(parts)
+
+
+def apply_record(cart, payload):
+    """
+    Applies one journal record payload to a cart
+    Parameters:
+        cart: The ShoppingCart being rebuilt
+        payload: Bytes written by encode_event
+    """
+    op = payload[:1]
+    name, position = _unpack_text(payload, 1)
+    if op == REMOVE:
+        cart.remove_items((name,))
+        return
+    if op == ADD:
+        cents, whole = PRICE.unpack_from(payload, position)
+        position += PRICE.size
+        (quantity,) = QUANTITY.unpack_from(payload, position)
+        position += QUANTITY.size
+        description, position = _unpack_text(payload, position)
+        cart.add_item(ItemToPurchase(name, Money.from_cents(cents, bool(whole)),
+                                     quantity, description))
+        return
+    if op != UPDATE:
+        raise JournalError(f"unknown journal record type {op!r}")
+    item = cart.find_item(name)
+    if item is None:
+        raise JournalError(f"journal updates {name!r}, which is not in the cart")
+    mask = payload[position]
+    position += 1
+    if mask & NAME_CHANGED:
+        new_name, position = _unpack_text(payload, position)
+        item.item_name = new_name
+    if mask & PRICE_CHANGED:
+        cents, whole = PRICE.unpack_from(payload, position)
+        position += PRICE.size
+        item.item_price = Money.from_cents(cents, bool(whole))
+    if mask & QUANTITY_CHANGED:
+        (item.item_quantity,) = QUANTITY.unpack_from(payload, position)
+        position += QUANTITY.size
+    if mask & DESCRIPTION_CHANGED:
+        item.item_description, position = _unpack_text(payload, position)
+
+
+def read_journal(path):
+    """
+    Reads a journal file
+    Parameters:
+        path: Path of the journal
+    Returns:
+        Tuple (base_seq, customer_name, current_date, payloads, good_size):
+        the sequence number of the first record, the cart details from the
+        header, the list of intact record payloads, and the file size up to
+        the end of the last intact record
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise JournalError("file is too short to be a cart journal")
+    magic, version, _, base_seq, name_length, date_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise JournalError("file is not a cart journal")
+    if version != VERSION:
+        raise JournalError(f"unsupported journal version {version}")
+    position = HEADER.size
+    customer_name = data[position:position + name_length].decode("utf-8")
+    position += name_length
+    current_date = data[position:position + date_length].decode("utf-8")
+    position += date_length
+    payloads = []
+    end = len(data)
+    while position + FRAME.size <= end:
+        length, checksum = FRAME.unpack_from(data, position)
+        start = position + FRAME.size
+        if start + length > end:
+            break
+        payload = data[start:start + length]
+        if zlib.crc32(payload) != checksum:
+            break
+        payloads.append(payload)
+        position = start + length
+    return base_seq, customer_name, current_date, payloads, position
+
+
+def _write_header(file, base_seq, customer_name, current_date):
+    name = customer_name.encode("utf-8")
+    date = current_date.encode("utf-8")
+    file.write(HEADER.pack(MAGIC, VERSION, 0, base_seq, len(name), len(date)))
+    file.write(name)
+    file.write(date)
+
+
+def _start_journal(path, base_seq, customer_name, current_date):
+    """
+    Replaces the journal at path with an empty one
+    The header is written and fsynced to a temporary file that is then
+    renamed over the journal, so a crash leaves either the old journal or
+    the complete new one, never a truncated file.
+    Returns:
+        The new journal, open for appending
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        _write_header(file, base_seq, customer_name, current_date)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    return open(path, "ab")
+
+
+class CartJournal:
+    """
+    Class that records every change to a cart in an append-only journal
+    Records are group-committed: a background thread writes and fsyncs the
+    pending records every commit_interval seconds, and a burst of
+    max_pending records is committed straight away. A crash can lose at most
+    the records of the last commit_interval.
+    """
+
+    def __init__(self, cart, path, seq=0, commit_interval=0.05, max_pending=4096,
+                 background=True):
+        """
+        Constructor that starts journaling a cart
+        Creates the journal file if it does not exist; otherwise appends to it.
+        Parameters:
+            cart: The ShoppingCart to journal
+            path: Path of the journal file
+            seq: Sequence number of the next record (the number of changes
+                 made to the cart since it was created)
+            commit_interval: Most seconds a record waits before it is fsynced
+            max_pending: Number of waiting records that forces a commit
+            background: False to commit only on max_pending, flush() and close()
+        """
+        self.cart = cart
+        self.path = path
+        self.seq = seq
+        self.commit_interval = commit_interval
+        self.max_pending = max_pending
+        self._pending = []
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._file = open(path, "ab")
+        else:
+            self._file = _start_journal(path, seq, cart.customer_name, cart.current_date)
+        self._closed = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._commit_loop, daemon=True)
+            self._thread.start()
+        cart.add_listener(self._record)
+
+    def _record(self, cart, event, item, changes):
+        payload = encode_event(event, item, changes)
+        with self._lock:
+            self._pending.append(FRAME.pack(len(payload), zlib.crc32(payload)))
+            self._pending.append(payload)
+            self.seq += 1
+            if len(self._pending) >= 2 * self.max_pending:
+                self._commit()
+
+    def _commit(self):
+        # Caller holds self._lock
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending = []
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _commit_loop(self):
+        while not self._closed.wait(self.commit_interval):
+            with self._lock:
+                self._commit()
+
+    def flush(self):
+        """
+        Writes and fsyncs every waiting record now
+        """
+        with self._lock:
+            self._commit()
+
+    def checkpoint(self, snapshot_path):
+        """
+        Saves a snapshot of the cart and empties the journal
+        After this, recovery loads the snapshot and replays only newer records.
+        Parameters:
+            snapshot_path: Path to write the snapshot to
+        """
+        with self._lock:
+            self._commit()
+            save_cart(self.cart, snapshot_path, stamp=self.seq)
+            # A crash from here on leaves old records in the journal; the
+            # snapshot's stamp tells recovery to skip them
+            self._file.close()
+            self._file = _start_journal(self.path, self.seq, self.cart.customer_name,
+                                        self.cart.current_date)
+
+    def close(self):
+        """
+        Commits waiting records, stops journaling the cart and closes the file
+        """
+        self.cart.remove_listener(self._record)
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._commit()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_cart(journal_path, snapshot_path=None, customer_name="none",
+              current_date="January 1, 2020", cart_class=ShoppingCart, **journal_options):
+    """
+    Recovers a journaled cart, or starts a new one, and keeps journaling it
+    Parameters:
+        journal_path: Path of the journal file
+        snapshot_path: Optional path of the snapshot written by checkpoints
+        customer_name: Customer name for a new cart
+        current_date: Date for a new cart
+        cart_class: ShoppingCart or a subclass to create
+        journal_options: Extra keyword arguments for CartJournal
+    Returns:
+        Tuple (cart, journal)
+    """
+    seq = 0
+    if snapshot_path is not None and os.path.exists(snapshot_path):
+        with CartSnapshot(snapshot_path) as snapshot:
+            cart = snapshot.to_cart(cart_class)
+            seq = snapshot.stamp
+    else:
+        cart = None
+    if os.path.exists(journal_path) and os.path.getsize(journal_path) < HEADER.size:
+        # An empty or torn header holds no records, so start the journal
+        # again after the snapshot, if there is one
+        os.remove(journal_path)
+    if os.path.exists(journal_path):
+        base_seq, name, date, payloads, good_size = read_journal(journal_path)
+        if cart is None:
+            if base_seq != 0:
+                raise JournalError("journal starts after a checkpoint but the snapshot is missing")
+            cart = cart_class(name, date)
+        elif base_seq > seq:
+            raise JournalError("snapshot is older than the start of the journal")
+        for payload in payloads[seq - base_seq:]:
+            apply_record(cart, payload)
+        seq = max(seq, base_seq + len(payloads))
+        if good_size < os.path.getsize(journal_path):
+            with open(journal_path, "r+b") as file:
+                file.truncate(good_size)
+    elif cart is None:
+        cart = cart_class(customer_name, current_date)
+    journal = CartJournal(cart, journal_path, seq, **journal_options)
+    return cart, journal
@@ -0,0 +1,262 @@
+"""
+Diff and merge of shopping carts
+diff() finds the adds, removals and changes that turn one cart into
+another, and merge() folds one cart into another, such as a guest's cart
+into the account cart they log in to. Both run in one pass over each cart,
+using name lookups rather than scans.
+
+Both produce a Changeset: the changes as journal records (the format
+CartJournal writes, see cart_journal), which can be applied to a cart,
+saved with to_bytes() and replayed elsewhere with from_bytes().
+
+Changeset file layout (all integers little-endian):
+    header      magic "CSET", format version, number of records
+    records     each framed as payload length, CRC-32 of the payload, payload
+"""
+import struct
+import zlib
+
+from cart_journal import FRAME, REMOVE, UPDATE, JournalError, apply_record, encode_event
+from module8 import ItemToPurchase
+
+MAGIC = b"CSET"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+
+def _sum(left, right):
+    return left + right
+
+
+def _prefer_left(left, right):
+    return left
+
+
+# Conflict policies for lines in both carts of a merge: each gives the
+# merged quantity from the target's (left) and the source's (right)
+POLICIES = {"sum": _sum, "max": max, "prefer-left": _prefer_left}
+
+
+class ChangesetError(Exception):
+    """
+    Raised when a changeset cannot be read or does not fit the cart it is applied to
+    """
+
+
+class Changeset:
+    """
+    Class holding a list of cart changes as journal record payloads
+    """
+
+    def __init__(self, records=()):
+        """
+        Constructor that creates a changeset from record payloads
+        Parameters:
+            records: Iterable of bytes written by cart_journal.encode_event
+        """
+        self.records = list(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __eq__(self, other):
+        if not isinstance(other, Changeset):
+            return NotImplemented
+        return self.records == other.records
+
+    def counts(self):
+        """
+        Returns the number of records of each kind
+        Returns:
+            Dictionary with the number of "add", "remove" and "update" records
+        """
+        removed = updated = 0
+        for record in self.records:
+            kind = record[:1]
+            removed += kind == REMOVE
+            updated += kind == UPDATE
+        return {"add": len(self.records) - removed - updated, "remove": removed,
+                "update": updated}
+
+    def apply(self, cart):
+        """
+        Applies the changes to a cart, in order
+        Parameters:
+            cart: A ShoppingCart (or subclass) to change
+        """
+        try:
+            for record in self.records:
+                apply_record(cart, record)
+        except JournalError as error:
+            raise ChangesetError(str(error)) from None
+
+    def to_bytes(self):
+        """
+        Serializes the changeset
+        Returns:
+            Bytes that from_bytes turns back into an equal changeset
+        """
+        parts = [HEADER.pack(MAGIC, VERSION, len(self.records))]
+        for record in self.records:
+            parts.append(FRAME.pack(len(record), zlib.crc32(record)))
+            parts.append(record)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reads a changeset serialized by to_bytes
+        Parameters:
+            data: Bytes-like object
+        Returns:
+            The Changeset
+        """
+        data = bytes(data)
+        if len(data) < HEADER.size:
+            raise ChangesetError("data is too short to be a changeset")
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ChangesetError("data is not a changeset")
+        if version != VERSION:
+            raise ChangesetError(f"unsupported changeset version {version}")
+        records = []
+        position = HEADER.size
+        for _ in range(count):
+            if position + FRAME.size > len(data):
+                raise ChangesetError("changeset is truncated")
+            length, crc = FRAME.unpack_from(data, position)
+            position += FRAME.size
+            record = data[position:position + length]
+            if len(record) != length or zlib.crc32(record) != crc:
+                raise ChangesetError("changeset record is truncated or corrupt")
+            records.append(record)
+            position += length
+        return cls(records)
+
+
+def _quantity_update(name, old_quantity, quantity):
+    return encode_event("update", ItemToPurchase(name, 0, quantity),
+                        (("item_quantity", old_quantity),))
+
+
+def diff(old, new):
+    """
+    Finds the changes that turn one cart into another
+    Lines are matched by name. Removals come first, then changes to lines
+    in both carts, then adds, each in cart order.
+    Parameters:
+        old: The cart to start from
+        new: The cart to end up with
+    Returns:
+        A Changeset that, applied to old (or a copy of it), makes its lines
+        equal to new's
+    """
+    records = [encode_event("remove", item, None) for item in old if item.item_name not in new]
+    added = []
+    find_old = old.find_item
+    for item in new:
+        old_item = find_old(item.item_name)
+        if old_item is None:
+            added.append(encode_event("add", item, None))
+            continue
+        changes = ()
+        price, old_price = item.item_price, old_item.item_price
+        # Compare the print style too, so "189" and "189.0" differ
+        if price.cents != old_price.cents or price.whole != old_price.whole:
+            changes += (("item_price", old_price),)
+        if item.item_quantity != old_item.item_quantity:
+            changes += (("item_quantity", old_item.item_quantity),)
+        if item.item_description != old_item.item_description:
+            changes += (("item_description", old_item.item_description),)
+        if changes:
+            records.append(encode_event("update", item, changes))
+    records += added
+    return Changeset(records)
+
+
+def _policy(policy):
+    if callable(policy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError(f"unknown merge policy {policy!r}; expected one of {', '.join(POLICIES)}")
+    return POLICIES[policy]
+
+
+def _merge_plan(target, source, policy):
+    """
+    Works out a merge in one pass over source
+    Returns:
+        Tuple (updates, added): (target's line, old quantity, merged
+        quantity) for each line whose quantity changes, and source's lines
+        that target lacks
+    """
+    policy = _policy(policy)
+    updates = []
+    added = []
+    find_target = target.find_item
+    for item in source:
+        existing = find_target(item.item_name)
+        if existing is None:
+            added.append(item)
+            continue
+        old_quantity = existing.item_quantity
+        quantity = policy(old_quantity, item.item_quantity)
+        if quantity != old_quantity:
+            updates.append((existing, old_quantity, quantity))
+    return updates, added
+
+
+def _merge_changeset(updates, added):
+    records = [_quantity_update(existing.item_name, old_quantity, quantity)
+               for existing, old_quantity, quantity in updates]
+    records += [encode_event("add", item, None) for item in added]
+    return Changeset(records)
+
+
+def merge_changes(target, source, policy="sum"):
+    """
+    Finds the changes that merge one cart into another, without making them
+    Lines only in source are added. For lines in both carts the quantity
+    comes from the policy; the target's price and description are kept.
+    Lines only in target are left alone.
+    Parameters:
+        target: The cart merged into, such as the account cart
+        source: The cart merged from, such as the guest cart
+        policy: "sum", "max" or "prefer-left" (keep target's quantity), or
+                a function taking the target's and source's quantities and
+                returning the merged quantity
+    Returns:
+        A Changeset
+    """
+    return _merge_changeset(*_merge_plan(target, source, policy))
+
+
+def merge(target, source, policy="sum"):
+    """
+    Merges one cart into another
+    Makes the changes merge_changes finds: quantities are set on target's
+    lines and the new lines are added with one add_items call. If target
+    has an inventory set, every merged quantity is reserved first, all or
+    nothing; OutOfStock is raised, leaving target unchanged, when there is
+    not enough.
+    Parameters:
+        target: The cart merged into; it is changed
+        source: The cart merged from; it is not changed
+        policy: Conflict policy, as for merge_changes
+    Returns:
+        The Changeset that was applied to target, which can be replayed on
+        copies of target elsewhere
+    """
+    updates, added = _merge_plan(target, source, policy)
+    changeset = _merge_changeset(updates, added)
+    if target._inventory is not None:
+        quantities = {existing.item_name: quantity for existing, _, quantity in updates}
+        quantities.update((item.item_name, item.item_quantity) for item in added)
+        target._inventory.reserve_many(target, quantities)
+    for existing, _, quantity in updates:
+        existing.item_quantity = quantity
+    target.add_items(added)
+    return changeset
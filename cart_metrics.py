@@ -0,0 +1,283 @@
+"""
+Opt-in metrics for cart operations
+enable() wraps the ShoppingCart methods (and those of its subclasses) and the
+menu command handlers so that every call is counted and timed; disable()
+puts the original functions back. Nothing is wrapped until enable() is
+called, so carts pay no cost while metrics are off.
+
+Recorded for each operation:
+    calls       number of calls
+    misses      calls that failed: calls that raised (a bad typed value,
+                OutOfStock), calls that found no such item (remove/modify
+                returning False, names missing from a batch), menu
+                commands that failed and invalid menu options
+    latency     histogram of call durations, with their sum
+Calls made from inside another operation are counted too: print_total
+renders through render_total, which calls get_num_items_in_cart and
+get_cost_of_cart, so each print_total of a non-empty cart also counts one
+call of each.
+Gauges hold the number of lines of the most recently used cart and the
+largest number seen.
+
+CartMetrics.dump_text() renders the metrics in the Prometheus text format;
+snapshot() and to_json() give the same data as a dictionary or JSON.
+"""
+import json
+import time
+from bisect import bisect_left
+from functools import wraps
+
+import module8
+from module8 import BatchResult, ShoppingCart
+
+# Upper bounds of the latency histogram buckets, in seconds; the last bucket
+# has no upper bound
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+# Cart methods that are instrumented when a class defines them
+CART_OPERATIONS = ("add_item", "remove_item", "modify_item", "add_items",
+                   "remove_items", "modify_items", "get_num_items_in_cart",
+                   "get_cost_of_cart", "print_total", "print_descriptions")
+
+_BUCKET_BOUNDS_NS = [int(bound * 1e9) for bound in LATENCY_BUCKETS]
+
+
+def _misses(result):
+    """
+    Returns how many misses a cart method's result reports
+    """
+    if result is False:
+        return 1
+    if isinstance(result, BatchResult):
+        return len(result.missing)
+    return 0
+
+
+class OperationStats:
+    """
+    Class holding the call count, misses and latency histogram of one operation
+    """
+    __slots__ = ("calls", "misses", "total_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.misses = 0
+        self.total_ns = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, elapsed_ns, misses=0):
+        """
+        Records one call
+        Parameters:
+            elapsed_ns: Duration of the call in nanoseconds
+            misses: Number of misses the call reported
+        """
+        self.calls += 1
+        self.misses += misses
+        self.total_ns += elapsed_ns
+        self.buckets[bisect_left(_BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+
+
+class CartMetrics:
+    """
+    Class collecting metrics for instrumented carts and menu commands
+    """
+
+    def __init__(self):
+        self.operations = {}  # operation name -> OperationStats
+        self.cart_lines = 0
+        self.cart_lines_max = 0
+
+    def stats(self, operation):
+        """
+        Returns the OperationStats of an operation, creating it if needed
+        """
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        return stats
+
+    def observe_cart(self, cart):
+        """
+        Updates the cart-size gauges from a cart that was just used
+        """
+        lines = len(cart)
+        self.cart_lines = lines
+        if lines > self.cart_lines_max:
+            self.cart_lines_max = lines
+
+    def reset(self):
+        """
+        Forgets everything recorded so far
+        """
+        # Instrumented functions hold on to their OperationStats, so clear
+        # them in place
+        for stats in self.operations.values():
+            stats.__init__()
+        self.cart_lines = 0
+        self.cart_lines_max = 0
+
+    def snapshot(self):
+        """
+        Returns the metrics as a dictionary of plain values
+        Returns:
+            Dictionary with "operations" (name -> calls, misses,
+            latency_seconds_sum and latency_buckets, a list of
+            [upper bound, cumulative count] pairs with None for no bound)
+            and "gauges"
+        """
+        operations = {}
+        for name, stats in sorted(self.operations.items()):
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(LATENCY_BUCKETS + (None,), stats.buckets):
+                cumulative += count
+                buckets.append([bound, cumulative])
+            operations[name] = {
+                "calls": stats.calls,
+                "misses": stats.misses,
+                "latency_seconds_sum": stats.total_ns / 1e9,
+                "latency_buckets": buckets,
+            }
+        return {
+            "operations": operations,
+            "gauges": {"cart_lines": self.cart_lines, "cart_lines_max": self.cart_lines_max},
+        }
+
+    def to_json(self, indent=None):
+        """
+        Returns the snapshot as a JSON string
+        """
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump_text(self):
+        """
+        Renders the metrics in the Prometheus text exposition format
+        Returns:
+            String with one metric sample per line
+        """
+        lines = ["# TYPE cart_calls_total counter"]
+        operations = sorted(self.operations.items())
+        lines += [f'cart_calls_total{{operation="{name}"}} {stats.calls}'
+                  for name, stats in operations]
+        lines.append("# TYPE cart_misses_total counter")
+        lines += [f'cart_misses_total{{operation="{name}"}} {stats.misses}'
+                  for name, stats in operations]
+        lines.append("# TYPE cart_latency_seconds histogram")
+        for name, stats in operations:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (None,), stats.buckets):
+                cumulative += count
+                le = "+Inf" if bound is None else repr(bound)
+                lines.append(f'cart_latency_seconds_bucket{{operation="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'cart_latency_seconds_sum{{operation="{name}"}} {stats.total_ns / 1e9!r}')
+            lines.append(f'cart_latency_seconds_count{{operation="{name}"}} {stats.calls}')
+        lines.append("# TYPE cart_lines gauge")
+        lines.append(f"cart_lines {self.cart_lines}")
+        lines.append("# TYPE cart_lines_max gauge")
+        lines.append(f"cart_lines_max {self.cart_lines_max}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = CartMetrics()
+
+# (owner, attribute name, original value) of everything enable() replaced
+_patched = []
+
+
+def _instrument_method(metrics, name, method):
+    stats = metrics.stats(name)
+    clock = time.perf_counter_ns
+
+    @wraps(method)
+    def wrapper(cart, *args, **kwargs):
+        start = clock()
+        misses = 1  # a call that raises is a miss
+        try:
+            result = method(cart, *args, **kwargs)
+            misses = _misses(result)
+            return result
+        finally:
+            stats.observe(clock() - start, misses)
+            metrics.observe_cart(cart)
+    return wrapper
+
+
+def _instrument_command(metrics, name, handler, always_miss=False):
+    # A menu handler fails by returning False or raising; always_miss counts
+    # every call
+    stats = metrics.stats(name)
+    clock = time.perf_counter_ns
+
+    @wraps(handler)
+    def wrapper(*args):
+        start = clock()
+        missed = True
+        try:
+            result = handler(*args)
+            missed = always_miss or result is False
+            return result
+        finally:
+            stats.observe(clock() - start, missed)
+    return wrapper
+
+
+def _cart_classes(root):
+    classes = [root]
+    for cart_class in classes:
+        classes += [subclass for subclass in cart_class.__subclasses__()
+                    if subclass not in classes]
+    return classes
+
+
+def enabled():
+    """
+    Returns True while metrics are being recorded
+    """
+    return bool(_patched)
+
+
+def enable(metrics=None):
+    """
+    Starts recording metrics for every cart and menu command
+    Covers ShoppingCart and every subclass defined so far. Each class's own
+    methods are wrapped, so an overriding method is timed as itself.
+    Parameters:
+        metrics: CartMetrics to record into; defaults to METRICS
+    Returns:
+        The CartMetrics being recorded into
+    """
+    if metrics is None:
+        metrics = METRICS
+    if _patched:
+        disable()
+    for cart_class in _cart_classes(ShoppingCart):
+        for name in CART_OPERATIONS:
+            method = cart_class.__dict__.get(name)
+            if method is not None:
+                _patched.append((cart_class, name, method))
+                setattr(cart_class, name, _instrument_method(metrics, name, method))
+    # The menu table is shared by print_menu, run_batch and the server, so
+    # its handlers are replaced in place
+    for option, (heading, prompts, handler) in list(module8.MENU_COMMANDS.items()):
+        _patched.append((module8.MENU_COMMANDS, option, (heading, prompts, handler)))
+        module8.MENU_COMMANDS[option] = (
+            heading, prompts, _instrument_command(metrics, f"menu_{option}", handler))
+    _patched.append((module8, "invalid_command", module8.invalid_command))
+    module8.invalid_command = _instrument_command(metrics, "menu_invalid",
+                                                  module8.invalid_command, always_miss=True)
+    return metrics
+
+
+def disable():
+    """
+    Stops recording metrics and restores the original methods
+    Recorded metrics are kept.
+    """
+    while _patched:
+        owner, name, original = _patched.pop()
+        if isinstance(owner, dict):
+            owner[name] = original
+        else:
+            setattr(owner, name, original)
@@ -0,0 +1,209 @@
+"""
+Vectorized totals for very large carts, using NumPy when it is installed
+The functions here work on any cart. For a ColumnarShoppingCart they read
+the price and quantity columns in place, as NumPy arrays sharing the same
+memory, and compute totals, per-line totals and filtered sums without a
+Python loop over the lines. Without NumPy, or for a plain ShoppingCart,
+the same results are computed in pure Python.
+
+All arithmetic is in integer cents, so results match get_cost_of_cart and
+print_total exactly. Columns whose products could overflow 64 bits are
+summed with Python integers instead.
+"""
+import itertools
+from array import array
+from operator import mul
+
+from cart_columnar import ColumnarShoppingCart
+from cart_render import _chunked, _header, render_breakdown, write_report
+from money import Money
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Largest absolute value a vectorized sum of products may reach
+INT64_SAFE = 2 ** 62
+
+
+def _columns(cart):
+    """
+    Returns the cart's lines as columns
+    Returns:
+        Tuple (prices, price_whole, quantities, rows): the price column in
+        cents, the whole-dollar flags, the quantity column, and the row of
+        each line in cart order, or None when every row is a line in order
+    """
+    if isinstance(cart, ColumnarShoppingCart):
+        rows = list(cart._rows.values()) if cart._holes else None
+        return cart._prices, cart._price_whole, cart._quantities, rows
+    prices = array("q")
+    price_whole = bytearray()
+    quantities = array("q")
+    for item in cart:
+        price = item.item_price
+        prices.append(price.cents)
+        price_whole.append(price.whole)
+        quantities.append(item.item_quantity)
+    return prices, price_whole, quantities, None
+
+
+def _vector_columns(prices, quantities):
+    """
+    Wraps the price and quantity columns as NumPy arrays without copying
+    Returns:
+        Tuple (price_column, quantity_column), or None if NumPy is not
+        installed or the int64 sums could overflow
+    """
+    if numpy is None or not prices:
+        return None
+    price_column = numpy.frombuffer(prices, dtype=numpy.int64)
+    quantity_column = numpy.frombuffer(quantities, dtype=numpy.int64)
+    largest = (float(numpy.abs(price_column).max()) * float(numpy.abs(quantity_column).max())
+               * len(prices))
+    if largest >= INT64_SAFE:
+        return None
+    return price_column, quantity_column
+
+
+def recompute_totals(cart):
+    """
+    Recomputes the cart's totals from its lines
+    Parameters:
+        cart: A ShoppingCart or ColumnarShoppingCart
+    Returns:
+        Tuple (total quantity, total cost as Money), equal to
+        get_num_items_in_cart() and get_cost_of_cart()
+    """
+    # Holes in the columns hold zero lines, so whole columns can be summed
+    prices, price_whole, quantities, _ = _columns(cart)
+    columns = _vector_columns(prices, quantities)
+    if columns is not None:
+        price_column, quantity_column = columns
+        quantity = int(quantity_column.sum())
+        cents = int(numpy.dot(price_column, quantity_column))
+        all_whole = bool(numpy.frombuffer(price_whole, dtype=numpy.uint8).all())
+    else:
+        quantity = sum(quantities)
+        cents = sum(map(mul, prices, quantities))
+        all_whole = all(price_whole)
+    return quantity, Money.from_cents(cents, all_whole)
+
+
+def line_totals(cart):
+    """
+    Computes the extended price (price times quantity) of every line
+    Parameters:
+        cart: A ShoppingCart or ColumnarShoppingCart
+    Returns:
+        array('q') of line totals in cents, in cart order
+    """
+    prices, _, quantities, rows = _columns(cart)
+    columns = _vector_columns(prices, quantities)
+    if columns is not None:
+        totals = columns[0] * columns[1]
+        if rows is not None:
+            totals = totals[numpy.array(rows, dtype=numpy.intp)]
+        return array("q", totals.tobytes())
+    totals = array("q", map(mul, prices, quantities))
+    if rows is not None:
+        totals = array("q", [totals[row] for row in rows])
+    return totals
+
+
+def totals_where(cart, min_price=None, max_price=None):
+    """
+    Sums the lines whose price is within a range
+    Parameters:
+        cart: A ShoppingCart or ColumnarShoppingCart
+        min_price: Lowest price to include, or None for no lower limit
+        max_price: Highest price to include, or None for no upper limit
+    Returns:
+        Tuple (quantity, cost as Money) of the matching lines
+    """
+    low = None if min_price is None else Money(min_price).cents
+    high = None if max_price is None else Money(max_price).cents
+    prices, price_whole, quantities, rows = _columns(cart)
+    columns = _vector_columns(prices, quantities)
+    if columns is not None:
+        price_column, quantity_column = columns
+        if rows is None:
+            selected = numpy.ones(len(prices), dtype=bool)
+        else:
+            # Leave out the holes, so only lines count toward the cost flag
+            selected = numpy.zeros(len(prices), dtype=bool)
+            selected[numpy.array(rows, dtype=numpy.intp)] = True
+        if low is not None:
+            selected &= price_column >= low
+        if high is not None:
+            selected &= price_column <= high
+        quantity = int(quantity_column[selected].sum())
+        cents = int(numpy.dot(price_column[selected], quantity_column[selected]))
+        all_whole = bool(numpy.frombuffer(price_whole, dtype=numpy.uint8)[selected].all())
+        return quantity, Money.from_cents(cents, all_whole)
+    quantity = cents = 0
+    all_whole = True
+    for row in (range(len(prices)) if rows is None else rows):
+        price = prices[row]
+        if (low is None or price >= low) and (high is None or price <= high):
+            quantity += quantities[row]
+            cents += price * quantities[row]
+            all_whole = all_whole and bool(price_whole[row])
+    return quantity, Money.from_cents(cents, all_whole)
+
+
+def render_total(cart):
+    """
+    Renders the print_total report with the line totals computed in one pass
+    Produces exactly the same text as cart_render.render_total.
+    Parameters:
+        cart: A ShoppingCart or ColumnarShoppingCart
+    Returns:
+        Generator of text chunks that together make up the report
+    """
+    if not len(cart):
+        yield _header(cart) + "SHOPPING CART IS EMPTY\n"
+        return
+    yield f"{_header(cart)}Number of Items: {cart.get_num_items_in_cart()}\n\n"
+    prices, price_whole, quantities, rows = _columns(cart)
+    totals = line_totals(cart)
+    names = cart._rows if isinstance(cart, ColumnarShoppingCart) else [item.item_name for item in cart]
+    if rows is None:
+        rows = range(len(totals))
+    from_cents = Money.from_cents
+    yield from _chunked(
+        f"{name} {quantities[row]} @ ${from_cents(prices[row], bool(price_whole[row]))} = "
+        f"${from_cents(total, bool(price_whole[row]))}\n"
+        for name, row, total in zip(names, rows, totals)
+    )
+    yield f"\nTotal: ${cart.get_cost_of_cart()}\n"
+
+
+class NumpyShoppingCart(ColumnarShoppingCart):
+    """
+    ColumnarShoppingCart whose report and analytics use the vectorized path
+    """
+
+    def print_total(self, file=None):
+        """
+        Prints the shopping cart report, computing line totals in one pass
+        Parameters:
+            file: Optional file-like object to write to instead of stdout
+        """
+        chunks = render_total(self)
+        if self._pricing is not None and len(self):
+            chunks = itertools.chain(chunks, render_breakdown(self._pricing.breakdown()))
+        write_report(chunks, file)
+
+    def line_totals(self):
+        """
+        Returns array('q') of line totals in cents, in cart order
+        """
+        return line_totals(self)
+
+    def totals_where(self, min_price=None, max_price=None):
+        """
+        Returns (quantity, cost) of the lines priced within a range
+        """
+        return totals_where(self, min_price, max_price)
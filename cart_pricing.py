@@ -0,0 +1,382 @@
+"""
+Promotions, coupons and tax on top of a cart's cost
+A PricingEngine is built once from a list of rules:
+    PercentOff          a percentage off lines
+    TieredDiscount      a percentage off lines that depends on the quantity
+    BuyXGetY            every buy + get units, get of them are free
+    Coupon              an amount or a percentage off the whole cart
+    Tax                 a percentage added to the whole cart
+The line rules (the first three) apply to the items they name, or to every
+line when they name none. Building the engine indexes them by item name, so
+pricing a line looks at only the rules that can apply to it.
+
+A CartPricing follows one cart through its listener and re-prices only the
+lines that changed since the last total. ShoppingCart.set_pricing attaches
+one so that print_total ends with the itemized breakdown.
+
+All amounts are in integer cents, and percentages are rounded half-up to
+the cent, like Money. The amounts print in the style of the cart's cost:
+in whole dollars for a cart of whole-dollar prices, unless they have cents.
+
+Discounts on a line stack, up to the line's cost. Coupons apply in the order given to the cost after line discounts; taxes
+apply last.
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from money import Money
+
+ONE = Decimal(1)
+
+# Itemized result of pricing a cart: its cost before promotions, the
+# (item name, rule label, amount) of every line discount, their sum, the
+# (label, amount) of every coupon (negative) and tax, and the amount due
+PriceBreakdown = namedtuple("PriceBreakdown", ["subtotal", "line_discounts", "discount",
+                                               "adjustments", "total"])
+
+
+def _percent(percent):
+    # Validates a percentage once, as an exact Decimal fraction
+    try:
+        fraction = Decimal(str(percent)) / 100
+    except ArithmeticError:
+        fraction = None
+    if fraction is None or not fraction.is_finite() or not 0 <= fraction <= 1:
+        raise ValueError(f"invalid percentage {percent!r}")
+    return fraction
+
+
+def _fraction_of(cents, fraction):
+    return int((cents * fraction).quantize(ONE, rounding=ROUND_HALF_UP))
+
+
+def _money(cents, whole):
+    # Money in the style of the cart's cost: whole dollars for a whole-dollar
+    # cart, as long as the amount has no cents, otherwise a decimal
+    return Money.from_cents(cents, whole and cents % 100 == 0)
+
+
+class LineRule(ABC):
+    """
+    Base class of rules that discount single lines
+    """
+
+    def __init__(self, names=None, label=None):
+        """
+        Constructor that sets which lines the rule applies to
+        Parameters:
+            names: Iterable of item names the rule applies to, or None for
+                   every line
+            label: Text shown in the breakdown
+        """
+        # A name given twice still applies the rule once
+        self.names = None if names is None else tuple(dict.fromkeys(names))
+        self.label = label
+
+    @abstractmethod
+    def discount(self, price_cents, quantity):
+        """
+        Returns the cents off one line
+        Parameters:
+            price_cents: Price of one unit in cents
+            quantity: Quantity of the line
+        """
+
+
+class PercentOff(LineRule):
+    """
+    Rule taking a percentage off lines
+    """
+
+    def __init__(self, percent, names=None, label=None):
+        super().__init__(names, label or f"{percent}% off")
+        self._fraction = _percent(percent)
+
+    def discount(self, price_cents, quantity):
+        return _fraction_of(price_cents * quantity, self._fraction)
+
+
+class TieredDiscount(LineRule):
+    """
+    Rule taking a percentage off lines, larger for larger quantities
+    """
+
+    def __init__(self, tiers, names=None, label=None):
+        """
+        Constructor that compiles the tiers
+        Parameters:
+            tiers: Iterable of (minimum quantity, percentage) pairs; a line
+                   gets the percentage of the highest minimum it reaches
+            names: Item names the rule applies to, or None for every line
+            label: Text shown in the breakdown
+        """
+        tiers = sorted(tiers)
+        super().__init__(names, label or "quantity discount")
+        self._minimums = [minimum for minimum, _ in tiers]
+        self._fractions = [_percent(percent) for _, percent in tiers]
+
+    def discount(self, price_cents, quantity):
+        tier = bisect_right(self._minimums, quantity)
+        if tier == 0:
+            return 0
+        return _fraction_of(price_cents * quantity, self._fractions[tier - 1])
+
+
+class BuyXGetY(LineRule):
+    """
+    Rule making get units free out of every buy + get units of a line
+    """
+
+    def __init__(self, buy, get, names=None, label=None):
+        if buy < 1 or get < 1:
+            raise ValueError("buy and get must be at least 1")
+        super().__init__(names, label or f"buy {buy} get {get} free")
+        self._group = buy + get
+        self._free = get
+
+    def discount(self, price_cents, quantity):
+        return quantity // self._group * self._free * price_cents
+
+
+class Coupon:
+    """
+    Rule taking an amount or a percentage off the whole cart
+    """
+
+    def __init__(self, code, amount=None, percent=None, minimum=0, label=None):
+        """
+        Constructor that defines a coupon
+        Parameters:
+            code: String the coupon is known by
+            amount: Amount off, as anything Money accepts
+            percent: Percentage off, instead of an amount
+            minimum: Least cost, after line discounts, the coupon needs
+            label: Text shown in the breakdown
+        """
+        if (amount is None) == (percent is None):
+            raise ValueError("a coupon takes either an amount or a percent off")
+        self.code = code
+        self.label = label or f"Coupon {code}"
+        self._cents = None if amount is None else Money(amount).cents
+        self._fraction = None if percent is None else _percent(percent)
+        self._minimum = Money(minimum).cents
+
+    def adjustment(self, cents):
+        """
+        Returns the change to the cost, in cents (negative for a discount)
+        Parameters:
+            cents: Cost the coupon applies to
+        """
+        if cents < self._minimum or cents <= 0:
+            return 0
+        if self._cents is not None:
+            return -min(self._cents, cents)
+        return -_fraction_of(cents, self._fraction)
+
+
+class Tax:
+    """
+    Rule adding a percentage of the cost, applied after every coupon
+    """
+
+    def __init__(self, percent, label=None):
+        self.label = label or f"Tax {percent}%"
+        self._fraction = _percent(percent)
+
+    def adjustment(self, cents):
+        """
+        Returns the tax on a cost, in cents
+        """
+        return _fraction_of(max(cents, 0), self._fraction)
+
+
+class PricingEngine:
+    """
+    Class holding compiled pricing rules
+    """
+
+    def __init__(self, rules):
+        """
+        Constructor that indexes the rules
+        Parameters:
+            rules: Iterable of LineRule, Coupon and Tax objects
+        """
+        every_line = []
+        named = {}  # item name -> rules naming it
+        coupons = []
+        taxes = []
+        for rule in rules:
+            if isinstance(rule, Tax):
+                taxes.append(rule)
+            elif isinstance(rule, Coupon):
+                coupons.append(rule)
+            elif rule.names is None:
+                every_line.append(rule)
+            else:
+                for name in rule.names:
+                    named.setdefault(name, []).append(rule)
+        self._every_line = tuple(every_line)
+        self._by_name = {name: self._every_line + tuple(rules) for name, rules in named.items()}
+        self._cart_rules = tuple(coupons + taxes)
+
+    def rules_for(self, item_name):
+        """
+        Returns the line rules that apply to an item name
+        """
+        return self._by_name.get(item_name, self._every_line)
+
+    def price_line(self, item_name, price_cents, quantity):
+        """
+        Works out the discounts on one line
+        Returns:
+            Tuple of (rule label, cents off) pairs, empty when no rule takes
+            anything off; the cents add up to at most the line's cost
+        """
+        rules = self._by_name.get(item_name, self._every_line)
+        if not rules:
+            return ()
+        left = price_cents * quantity
+        discounts = []
+        for rule in rules:
+            cents = min(rule.discount(price_cents, quantity), left)
+            if cents > 0:
+                discounts.append((rule.label, cents))
+                left -= cents
+        return tuple(discounts)
+
+    def adjustments(self, cents):
+        """
+        Works out the coupons and taxes on a cost
+        Parameters:
+            cents: Cost after line discounts
+        Returns:
+            List of (label, cents) pairs, each applied to the cost left by
+            the ones before it
+        """
+        adjustments = []
+        for rule in self._cart_rules:
+            change = rule.adjustment(cents)
+            if change:
+                adjustments.append((rule.label, change))
+                cents += change
+        return adjustments
+
+
+class CartPricing:
+    """
+    Class keeping the line discounts of one cart up to date
+    Lines are re-priced only after they change. For a catalog cart that
+    includes catalog price changes made through other carts: the lines
+    whose products changed since the catalog version last priced are
+    priced again.
+    """
+
+    def __init__(self, cart, engine):
+        """
+        Constructor that starts following a cart
+        Parameters:
+            cart: The ShoppingCart (or subclass) to price
+            engine: The PricingEngine to price it with
+        """
+        self.cart = cart
+        self.engine = engine
+        self._lines = {}  # item name -> discounts, for lines with any
+        self._discount_cents = 0
+        self._dirty = set(item.item_name for item in cart)
+        self._catalog = getattr(cart, "catalog", None)
+        self._catalog_version = None if self._catalog is None else self._catalog.version
+        cart.add_listener(self._changed)
+
+    def _changed(self, cart, event, item, changes):
+        name = item.item_name
+        if event == "remove":
+            self._drop(name)
+            self._dirty.discard(name)
+            return
+        self._dirty.add(name)
+        if changes:
+            for attribute, old in changes:
+                if attribute == "item_name":
+                    self._drop(old)
+                    self._dirty.discard(old)
+
+    def _drop(self, name):
+        discounts = self._lines.pop(name, None)
+        if discounts is not None:
+            self._discount_cents -= sum(cents for _, cents in discounts)
+
+    def _refresh(self):
+        """
+        Re-prices the lines that changed since the last refresh
+        """
+        catalog = self._catalog
+        if catalog is not None and catalog.version != self._catalog_version:
+            # Prices changed in the catalog, which the cart does not report
+            changes = catalog.changes_since(self._catalog_version)
+            if changes is None:
+                self._dirty.update(item.item_name for item in self.cart)
+            else:
+                self._dirty.update(name for name, _, _ in changes)
+            self._catalog_version = catalog.version
+        find_item = self.cart.find_item
+        price_line = self.engine.price_line
+        for name in self._dirty:
+            self._drop(name)
+            item = find_item(name)
+            if item is None:
+                continue
+            discounts = price_line(name, item.item_price.cents, item.item_quantity)
+            if discounts:
+                self._lines[name] = discounts
+                self._discount_cents += sum(cents for _, cents in discounts)
+        self._dirty.clear()
+
+    def reprice(self, engine=None):
+        """
+        Prices every line again, optionally with a different engine
+        """
+        if engine is not None:
+            self.engine = engine
+        self._lines.clear()
+        self._discount_cents = 0
+        self._dirty = set(item.item_name for item in self.cart)
+
+    def total(self):
+        """
+        Returns the amount due after discounts, coupons and taxes, as Money
+        Costs O(lines changed since the last call), plus the cart rules.
+        """
+        self._refresh()
+        subtotal = self.cart.get_cost_of_cart()
+        cents = subtotal.cents - self._discount_cents
+        return _money(cents + sum(change for _, change in self.engine.adjustments(cents)),
+                      subtotal.whole)
+
+    def breakdown(self):
+        """
+        Returns the itemized PriceBreakdown, with the line discounts in cart order
+        """
+        self._refresh()
+        subtotal = self.cart.get_cost_of_cart()
+        whole = subtotal.whole
+        lines = self._lines
+        line_discounts = []
+        for item in self.cart:
+            discounts = lines.get(item.item_name)
+            if discounts is not None:
+                line_discounts += [(item.item_name, label, _money(cents, whole))
+                                   for label, cents in discounts]
+        cents = subtotal.cents - self._discount_cents
+        adjustments = self.engine.adjustments(cents)
+        total = cents + sum(change for _, change in adjustments)
+        return PriceBreakdown(subtotal, line_discounts, _money(self._discount_cents, whole),
+                              [(label, _money(change, whole)) for label, change in adjustments],
+                              _money(total, whole))
+
+    def close(self):
+        """
+        Stops following the cart
+        """
+        self.cart.remove_listener(self._changed)
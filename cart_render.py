@@ -0,0 +1,223 @@
+"""
+Report rendering for the shopping cart
+The reports printed by ShoppingCart.print_total and print_descriptions are
+built here as a generator of text chunks, so a large cart can be streamed
+to any file-like object in a few big writes instead of one print per line.
+
+A ReportCache keeps the rendered lines of one cart between reports, so
+printing a report again only formats the lines that changed since.
+"""
+import sys
+
+# Number of item lines joined into each chunk a render generator yields
+CHUNK_LINES = 512
+
+# Bytes of text collected before write_report writes to its sink
+BUFFER_SIZE = 64 * 1024
+
+# Largest cart whose rendered lines a ReportCache keeps
+MAX_CACHED_LINES = 100_000
+
+
+def _header(cart):
+    return f"{cart.customer_name}'s Shopping Cart - {cart.current_date}\n"
+
+
+def _total_line(item):
+    return f"{item.item_name} {item.item_quantity} @ ${item.item_price} = ${item.item_quantity * item.item_price}\n"
+
+
+def _description_line(item):
+    return f"{item.item_name}: {item.item_description}\n"
+
+
+def _chunked(lines):
+    """
+    Joins an iterable of text lines into chunks of CHUNK_LINES lines
+    """
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) == CHUNK_LINES:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def render_total(cart, lines=None):
+    """
+    Renders the shopping cart report printed by print_total
+    Parameters:
+        cart: A ShoppingCart object
+        lines: Optional iterable of the item lines, already rendered
+    Returns:
+        Generator of text chunks that together make up the report
+    """
+    if not len(cart):
+        yield _header(cart) + "SHOPPING CART IS EMPTY\n"
+        return
+    yield f"{_header(cart)}Number of Items: {cart.get_num_items_in_cart()}\n\n"
+    yield from _chunked(map(_total_line, cart) if lines is None else lines)
+    yield f"\nTotal: ${cart.get_cost_of_cart()}\n"
+
+
+def render_descriptions(cart, lines=None):
+    """
+    Renders the item descriptions report printed by print_descriptions
+    Parameters:
+        cart: A ShoppingCart object
+        lines: Optional iterable of the item lines, already rendered
+    Returns:
+        Generator of text chunks that together make up the report
+    """
+    if not len(cart):
+        yield _header(cart) + "SHOPPING CART IS EMPTY\n"
+        return
+    yield _header(cart) + "Item Descriptions\n"
+    yield from _chunked(map(_description_line, cart) if lines is None else lines)
+
+
+def render_breakdown(breakdown):
+    """
+    Renders the discounts, coupons and taxes that print_total adds to the
+    report of a cart with pricing attached
+    Parameters:
+        breakdown: A cart_pricing.PriceBreakdown
+    Returns:
+        Generator of text chunks
+    """
+    yield "\n"
+    if breakdown.line_discounts:
+        yield "Discounts:\n"
+        yield from _chunked(f"{name} ({label}): -${amount}\n"
+                            for name, label, amount in breakdown.line_discounts)
+    for label, amount in breakdown.adjustments:
+        if amount.cents < 0:
+            yield f"{label}: -${-amount}\n"
+        else:
+            yield f"{label}: ${amount}\n"
+    yield f"Amount Due: ${breakdown.total}\n"
+
+
+def write_report(chunks, file=None, buffer_size=BUFFER_SIZE):
+    """
+    Writes rendered text chunks to a file-like object in large blocks
+    Parameters:
+        chunks: Iterable of text chunks, such as render_total(cart)
+        file: Object with a write(str) method; defaults to sys.stdout
+        buffer_size: Number of characters to collect before each write
+    """
+    if file is None:
+        file = sys.stdout
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= buffer_size:
+            file.write("".join(pending))
+            pending = []
+            pending_size = 0
+    if pending:
+        file.write("".join(pending))
+
+
+class ReportCache:
+    """
+    Class that keeps the rendered report lines of one cart between reports
+    A listener on the cart drops the lines of items that change, so the next
+    report formats only those lines again; a report of an unchanged cart is
+    returned as the text saved last time. Carts with more than max_lines
+    lines are rendered without caching, so the memory held stays
+    proportional to max_lines.
+    """
+
+    def __init__(self, cart, max_lines=MAX_CACHED_LINES):
+        """
+        Constructor that starts caching a cart's reports
+        Parameters:
+            cart: A ShoppingCart object
+            max_lines: Largest number of cart lines to cache
+        """
+        self.cart = cart
+        self.max_lines = max_lines
+        # Bumped by every change to the cart
+        self.version = 0
+        self._lines = {"total": {}, "descriptions": {}}  # item name -> line
+        self._reports = {}  # report kind -> (key, text)
+        cart.add_listener(self._changed)
+
+    def _changed(self, cart, event, item, changes):
+        self.version += 1
+        names = [item.item_name]
+        if changes:
+            names += [old for attribute, old in changes if attribute == "item_name"]
+        for lines in self._lines.values():
+            for name in names:
+                lines.pop(name, None)
+
+    def _key(self):
+        # The header is not covered by cart events, and a catalog cart's
+        # prices change with its catalog
+        catalog = getattr(self.cart, "catalog", None)
+        return (self.version, self.cart.customer_name, self.cart.current_date,
+                None if catalog is None else catalog.version)
+
+    def _render(self, kind, format_line, render):
+        cart = self.cart
+        if len(cart) > self.max_lines:
+            self.clear()
+            return render(cart)
+        key = self._key()
+        saved = self._reports.get(kind)
+        if saved is not None and saved[0] == key:
+            return iter((saved[1],))
+        lines = self._lines[kind]
+        if saved is not None and saved[0][3] != key[3]:
+            # Catalog prices changed; any line may be out of date
+            lines.clear()
+        text = "".join(render(cart, self._cached_lines(lines, format_line)))
+        self._reports[kind] = (key, text)
+        return iter((text,))
+
+    def _cached_lines(self, lines, format_line):
+        # Yields each item's line, formatting only those not in lines
+        for item in self.cart:
+            name = item.item_name
+            line = lines.get(name)
+            if line is None:
+                line = lines[name] = format_line(item)
+            yield line
+
+    def render_total(self):
+        """
+        Renders the print_total report, reusing unchanged lines
+        Returns:
+            Iterator of text chunks, like render_total(cart)
+        """
+        return self._render("total", _total_line, render_total)
+
+    def render_descriptions(self):
+        """
+        Renders the print_descriptions report, reusing unchanged lines
+        Returns:
+            Iterator of text chunks, like render_descriptions(cart)
+        """
+        return self._render("descriptions", _description_line, render_descriptions)
+
+    def clear(self):
+        """
+        Drops everything cached
+        """
+        for lines in self._lines.values():
+            lines.clear()
+        self._reports.clear()
+
+    def close(self):
+        """
+        Stops caching and frees the cached text
+        """
+        self.cart.remove_listener(self._changed)
+        self.clear()
+
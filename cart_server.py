@@ -0,0 +1,280 @@
+"""
+Network front end for the shopping cart menu
+serve() runs an asyncio server that speaks the menu protocol over TCP or a
+Unix socket, so one process can serve many shoppers at once. Each connection
+gets its own ShoppingCart.
+
+A session sends exactly what would be typed at the menu, one value per line:
+the customer's name and today's date, then an option letter followed by one
+line per value the option asks for. After the date and after every option
+the server sends the output the menu would print (without the menu, headings
+and prompts), ending with a line holding a single ".". Output lines that
+start with "." get a second "." in front, which the client removes. Option q
+gets an empty reply and ends the session.
+
+Run a server with:   python cart_server.py serve [--host H] [--port P | --unix PATH]
+Generate load with:  python cart_server.py load [--connections N] [--commands M] ...
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import module8
+from module8 import MENU_COMMANDS, ShoppingCart
+
+END = "."
+
+
+def _reply(text):
+    """
+    Frames command output as a reply: dot-stuffed lines and the end line
+    """
+    lines = text.splitlines()
+    lines = [("." + line) if line.startswith(".") else line for line in lines]
+    lines.append(END)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def run_command(cart, choice, values):
+    """
+    Runs one menu option on a cart and returns what it printed
+    Parameters:
+        cart: The session's ShoppingCart
+        choice: Option letter other than q
+        values: List of typed values, one per prompt of the option
+    Returns:
+        String of output, as the menu would print it
+    """
+    command = MENU_COMMANDS.get(choice)
+    output = io.StringIO()
+    # Handlers print; they run to completion without awaiting, so no other
+    # session can write to the redirected stdout in between
+    with contextlib.redirect_stdout(output):
+        if command is None:
+            # Looked up on the module, so metrics see it as menu_invalid
+            module8.invalid_command(choice)
+            return output.getvalue()
+        try:
+            command[2](cart, *values)
+        except ValueError as error:
+            print(f"Error: {error}")
+    return output.getvalue()
+
+
+class CartServer:
+    """
+    Class holding the sessions of a running cart server
+    """
+
+    def __init__(self, cart_class=ShoppingCart):
+        """
+        Constructor that initializes a server with no sessions
+        Parameters:
+            cart_class: ShoppingCart or a subclass to create for each session
+        """
+        self.cart_class = cart_class
+        self.sessions = 0
+        self.commands = 0
+
+    async def handle(self, reader, writer):
+        """
+        Serves one connection until option q or until the client hangs up
+        """
+        self.sessions += 1
+
+        async def read_line():
+            line = await reader.readline()
+            if not line:
+                raise EOFError
+            return line.decode("utf-8").rstrip("\r\n")
+
+        try:
+            customer_name = await read_line()
+            current_date = await read_line()
+            cart = self.cart_class(customer_name, current_date)
+            writer.write(_reply(f"Customer name: {customer_name}\nToday's date: {current_date}\n"))
+            while True:
+                await writer.drain()
+                choice = await read_line()
+                if choice == 'q':
+                    writer.write(_reply(""))
+                    break
+                command = MENU_COMMANDS.get(choice)
+                values = [await read_line() for _ in command[1]] if command else []
+                writer.write(_reply(run_command(cart, choice, values)))
+                self.commands += 1
+            await writer.drain()
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host="127.0.0.1", port=8008, path=None):
+        """
+        Starts listening
+        Parameters:
+            host: Host for TCP
+            port: Port for TCP, or 0 to pick a free one
+            path: Path of a Unix socket to listen on instead of TCP
+        Returns:
+            The asyncio Server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path, backlog=4096)
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+
+async def serve(host="127.0.0.1", port=8008, path=None, cart_class=ShoppingCart):
+    """
+    Runs a cart server until it is cancelled
+    Parameters:
+        host: Host for TCP
+        port: Port for TCP
+        path: Path of a Unix socket to listen on instead of TCP
+        cart_class: ShoppingCart or a subclass to create for each session
+    """
+    server = await CartServer(cart_class).start(host, port, path)
+    async with server:
+        await server.serve_forever()
+
+
+class CartClient:
+    """
+    Class for talking to a cart server from asyncio code
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, customer_name, current_date, host="127.0.0.1", port=8008, path=None):
+        """
+        Opens a session
+        Parameters:
+            customer_name: String representing the customer's name
+            current_date: String representing the current date
+            host, port, path: Where the server listens, as for serve()
+        Returns:
+            Tuple (client, greeting text)
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        client = cls(reader, writer)
+        greeting = await client.send(customer_name, current_date)
+        return client, greeting
+
+    async def send(self, *lines):
+        """
+        Sends lines and waits for the reply
+        Parameters:
+            lines: An option letter and its values (or the name and date)
+        Returns:
+            String of the reply text, without the end line
+        """
+        self.writer.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+        reply = []
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            line = line.decode("utf-8").rstrip("\n")
+            if line == END:
+                return "".join(f"{text}\n" for text in reply)
+            reply.append(line[1:] if line.startswith(".") else line)
+
+    async def close(self):
+        """
+        Sends option q and closes the connection
+        """
+        await self.send('q')
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def generate_load(connections=100, commands=100, host="127.0.0.1", port=8008, path=None):
+    """
+    Opens many sessions at once and sends commands as fast as replies come
+    Each session adds items, changes quantities and prints the cart, waiting
+    for each reply before sending the next command.
+    Parameters:
+        connections: Number of concurrent sessions
+        commands: Number of commands each session sends
+        host, port, path: Where the server listens, as for serve()
+    Returns:
+        Dictionary with the command count, seconds, commands per second and
+        the p50 and p99 latency in seconds
+    """
+    latencies = []
+
+    async def session(number):
+        client, _ = await CartClient.connect(f"Customer {number}", "May 11, 2025", host, port, path)
+        for i in range(commands):
+            if i % 10 == 9:
+                lines = ('o',)
+            elif i % 2:
+                lines = ('c', f"Item {i // 2 % 20}", str(i % 7 + 1))
+            else:
+                lines = ('a', f"Item {i // 2 % 20}", "Load test", "2.50", "1")
+            start = time.perf_counter()
+            await client.send(*lines)
+            latencies.append(time.perf_counter() - start)
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(number) for number in range(connections)))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "commands": len(latencies),
+        "seconds": seconds,
+        "commands_per_second": len(latencies) / seconds,
+        "p50": _percentile(latencies, 0.50),
+        "p99": _percentile(latencies, 0.99),
+    }
+
+
+def print_load(results):
+    """
+    Prints the results of generate_load
+    """
+    print(f"{results['commands']} commands in {results['seconds']:.2f} s: "
+          f"{results['commands_per_second']:.0f} commands/s, "
+          f"p50 {results['p50'] * 1000:.2f} ms, p99 {results['p99'] * 1000:.2f} ms")
+
+
+def main():
+    """
+    Parses the command line and runs a server or the load generator
+    """
+    parser = argparse.ArgumentParser(description="Shopping cart server")
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--unix", help="path of a Unix socket to use instead of TCP")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=100)
+    args = parser.parse_args()
+    if args.mode == "serve":
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(serve(args.host, args.port, args.unix))
+    else:
+        print_load(asyncio.run(generate_load(args.connections, args.commands,
+                                             args.host, args.port, args.unix)))
+
+
+if __name__ == "__main__":
+    main()
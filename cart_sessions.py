@@ -0,0 +1,175 @@
+"""
+Registry of shopping carts for many customers in one process
+CartRegistry keeps recently used carts in memory, keyed by customer, and
+moves the least recently used ones out to snapshot files when it goes over
+its budget. Asking for an evicted cart loads it back from its snapshot.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from functools import partial
+
+from cart_snapshot import CartSnapshot, save_cart
+from module8 import ShoppingCart
+
+
+class CartRegistry:
+    """
+    Class holding one ShoppingCart per customer with LRU eviction to disk
+    The budget is a number of carts, a number of cart lines, or both. A cart
+    handed out by get() may be evicted by a later get(), so callers should
+    not keep carts across calls; ask the registry again instead.
+    """
+
+    def __init__(self, directory, max_carts=1000, max_lines=None, cart_class=ShoppingCart):
+        """
+        Constructor that initializes an empty registry
+        Parameters:
+            directory: Directory for the snapshots of evicted carts
+            max_carts: Most carts to keep in memory, or None for no limit
+            max_lines: Most cart lines to keep in memory, or None for no limit
+            cart_class: ShoppingCart or a subclass to create carts with
+        """
+        self.directory = directory
+        self.max_carts = max_carts
+        self.max_lines = max_lines
+        self.cart_class = cart_class
+        os.makedirs(directory, exist_ok=True)
+        self._carts = OrderedDict()  # customer -> cart, least recently used first
+        self._dirty = set()
+        self._listeners = {}  # customer -> listener registered on their cart
+        self._lines = 0
+        self.hits = 0
+        self.misses = 0
+        self.faults = 0
+        self.evictions = 0
+
+    def _path(self, customer_name):
+        digest = hashlib.sha1(customer_name.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.snap")
+
+    def _track(self, customer_name, cart, event, item, changes):
+        # Listener on every resident cart: keeps the line count and dirty set
+        if event == "add":
+            self._lines += 1
+        elif event == "remove":
+            self._lines -= 1
+        self._dirty.add(customer_name)
+
+    def _release(self, customer_name):
+        # Stops tracking a cart that is leaving memory and returns it
+        cart = self._carts.pop(customer_name)
+        cart.remove_listener(self._listeners.pop(customer_name))
+        self._lines -= len(cart)
+        return cart
+
+    def get(self, customer_name, current_date="January 1, 2020"):
+        """
+        Returns the cart for a customer, loading or creating it if needed
+        Parameters:
+            customer_name: String identifying the customer
+            current_date: Date for a newly created cart
+        Returns:
+            The customer's ShoppingCart
+        """
+        carts = self._carts
+        cart = carts.get(customer_name)
+        if cart is not None:
+            self.hits += 1
+            carts.move_to_end(customer_name)
+            # The carts may have grown since the last call
+            self._enforce_budget()
+            return cart
+        self.misses += 1
+        path = self._path(customer_name)
+        if os.path.exists(path):
+            self.faults += 1
+            with CartSnapshot(path) as snapshot:
+                cart = snapshot.to_cart(self.cart_class)
+        else:
+            cart = self.cart_class(customer_name, current_date)
+            self._dirty.add(customer_name)
+        carts[customer_name] = cart
+        self._lines += len(cart)
+        listener = self._listeners[customer_name] = partial(self._track, customer_name)
+        cart.add_listener(listener)
+        self._enforce_budget()
+        return cart
+
+    def __contains__(self, customer_name):
+        """
+        Returns True if the customer's cart is in memory
+        """
+        return customer_name in self._carts
+
+    def __len__(self):
+        """
+        Returns the number of carts in memory
+        """
+        return len(self._carts)
+
+    @property
+    def lines(self):
+        """
+        Number of cart lines held in memory
+        """
+        return self._lines
+
+    def _over_budget(self):
+        return ((self.max_carts is not None and len(self._carts) > self.max_carts)
+                or (self.max_lines is not None and self._lines > self.max_lines))
+
+    def _enforce_budget(self):
+        # The most recently used cart is always kept, even if it alone is
+        # over the line budget
+        while len(self._carts) > 1 and self._over_budget():
+            self.evict(next(iter(self._carts)))
+
+    def evict(self, customer_name):
+        """
+        Moves a cart out of memory, saving it first if it changed
+        Parameters:
+            customer_name: String identifying the customer
+        """
+        cart = self._release(customer_name)
+        if customer_name in self._dirty:
+            save_cart(cart, self._path(customer_name))
+            self._dirty.discard(customer_name)
+        self.evictions += 1
+
+    def discard(self, customer_name):
+        """
+        Forgets a customer's cart, in memory and on disk
+        Parameters:
+            customer_name: String identifying the customer
+        """
+        if customer_name in self._carts:
+            self._release(customer_name)
+        self._dirty.discard(customer_name)
+        path = self._path(customer_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def flush(self):
+        """
+        Saves every changed cart in memory without evicting it
+        """
+        for customer_name in list(self._dirty):
+            save_cart(self._carts[customer_name], self._path(customer_name))
+        self._dirty.clear()
+
+    def stats(self):
+        """
+        Returns the registry counters
+        Returns:
+            Dictionary with hits, misses, faults (misses loaded from disk),
+            evictions, and the carts and lines in memory
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "faults": self.faults,
+            "evictions": self.evictions,
+            "carts": len(self._carts),
+            "lines": self._lines,
+        }
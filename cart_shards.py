@@ -0,0 +1,255 @@
+"""
+Sharded cart engine spread over worker processes
+ShardedCartEngine keeps the carts of many customers in several worker
+processes, so cart arithmetic runs on several cores instead of behind one
+interpreter lock. Each customer belongs to one shard, chosen from a stable
+hash of the customer's name, and every command for that customer goes to
+that shard. Commands are sent in batches: one message per shard per batch,
+not one per command.
+
+A command is a tuple (customer name, operation, arguments...):
+    ("Ann", "add", item_name, price, quantity, description)
+    ("Ann", "remove", item_name)              -> True or False
+    ("Ann", "modify", item_name, price, quantity, description)
+                                              -> True or False; default
+                                                 values leave an attribute
+                                                 as it is, like modify_item
+    ("Ann", "quantity")                       -> total quantity
+    ("Ann", "cost")                           -> total cost as Money
+    ("Ann", "report")                         -> print_total text
+    ("Ann", "close")                          -> forgets the cart
+
+Only "add" opens a cart. The other operations on a customer without one
+answer as for an empty cart (False, 0, Money 0 or an empty report) and
+leave no cart behind.
+"""
+import io
+import multiprocessing
+import zlib
+
+from module8 import ItemToPurchase, ShoppingCart
+from money import Money
+
+
+class ShardError(Exception):
+    """
+    Raised when a worker process cannot run a batch
+    """
+
+
+def shard_of(customer_name, shards):
+    """
+    Returns the shard number that owns a customer
+    The hash is stable across processes and runs, unlike hash().
+    Parameters:
+        customer_name: String identifying the customer
+        shards: Number of shards
+    """
+    return zlib.crc32(customer_name.encode("utf-8")) % shards
+
+
+def _run(carts, cart_class, command):
+    """
+    Runs one command in a worker and returns its result
+    """
+    customer_name, operation = command[0], command[1]
+    if operation == "close":
+        return carts.pop(customer_name, None) is not None
+    cart = carts.get(customer_name)
+    if operation == "add":
+        if cart is None:
+            cart = carts[customer_name] = cart_class(customer_name)
+        cart.add_item(ItemToPurchase(*command[2:]))
+        return None
+    if cart is None:
+        # Only an add opens a cart; the other operations answer for an
+        # empty cart without keeping one
+        if operation in ("remove", "modify"):
+            return False
+        if operation not in ("quantity", "cost", "report"):
+            raise ValueError(f"unknown cart operation {operation!r}")
+        cart = cart_class(customer_name)
+    if operation == "remove":
+        return cart.remove_items(command[2:3]).applied == 1
+    if operation == "modify":
+        return cart.modify_items((ItemToPurchase(*command[2:]),)).applied == 1
+    if operation == "quantity":
+        return cart.get_num_items_in_cart()
+    if operation == "cost":
+        return cart.get_cost_of_cart()
+    if operation == "report":
+        output = io.StringIO()
+        cart.print_total(output)
+        return output.getvalue()
+    raise ValueError(f"unknown cart operation {operation!r}")
+
+
+def _worker(connection, cart_class):
+    """
+    Main loop of a worker process: runs batches until it gets None
+    A batch is a list of commands; the reply is the list of their results.
+    A command that fails puts its exception in its result's place.
+    """
+    carts = {}
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        if batch == "stats":
+            quantity = cents = fractional = 0
+            for cart in carts.values():
+                quantity += cart.get_num_items_in_cart()
+                cost = cart.get_cost_of_cart()
+                cents += cost.cents
+                fractional += not cost.whole
+            connection.send((len(carts), quantity, cents, fractional))
+            continue
+        results = []
+        for command in batch:
+            try:
+                results.append(_run(carts, cart_class, command))
+            except Exception as error:
+                results.append(error)
+        connection.send(results)
+    connection.close()
+
+
+class ShardedCartEngine:
+    """
+    Class that routes cart commands to worker processes by customer
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, workers=None, cart_class=ShoppingCart, batch_size=2000):
+        """
+        Constructor that starts the worker processes
+        Parameters:
+            workers: Number of worker processes; defaults to the CPU count
+            cart_class: ShoppingCart or a subclass the workers create carts with
+            batch_size: Most commands sent to a shard in one message
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self._connections = []
+        self._processes = []
+        self._pending = []
+        for _ in range(self.workers):
+            parent_end, worker_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, args=(worker_end, cart_class),
+                                              daemon=True)
+            process.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+
+    def _receive(self, shard):
+        try:
+            return self._connections[shard].recv()
+        except EOFError:
+            raise ShardError(f"worker for shard {shard} exited") from None
+
+    def execute(self, commands):
+        """
+        Runs commands on their shards, all shards working at the same time
+        Commands for one customer run in the order given.
+        Parameters:
+            commands: Iterable of command tuples (see the module docstring)
+        Returns:
+            List of results in the order of the commands. A command that
+            failed has its exception in its place instead of a result.
+        """
+        shards = self.workers
+        batches = [[] for _ in range(shards)]
+        positions = [[] for _ in range(shards)]
+        count = 0
+        for command in commands:
+            shard = shard_of(command[0], shards)
+            batches[shard].append(command)
+            positions[shard].append(count)
+            count += 1
+        results = [None] * count
+        # Send one batch to every shard before waiting on any of them, so
+        # the workers run in parallel
+        offset = 0
+        while True:
+            sent = []
+            for shard in range(shards):
+                batch = batches[shard][offset:offset + self.batch_size]
+                if batch:
+                    self._connections[shard].send(batch)
+                    sent.append(shard)
+            if not sent:
+                return results
+            for shard in sent:
+                for position, result in zip(positions[shard][offset:offset + self.batch_size],
+                                            self._receive(shard)):
+                    results[position] = result
+            offset += self.batch_size
+
+    def submit(self, customer_name, operation, *arguments):
+        """
+        Queues one command whose result is not needed
+        Queued commands are sent once a full batch for every shard is
+        waiting, and by flush() and stats().
+        """
+        self._pending.append((customer_name, operation) + arguments)
+        if len(self._pending) >= self.batch_size * self.workers:
+            self.flush()
+
+    def flush(self):
+        """
+        Runs the queued commands
+        Returns:
+            List of the results of the commands still queued
+        """
+        pending, self._pending = self._pending, []
+        return self.execute(pending)
+
+    def stats(self):
+        """
+        Gathers totals across every shard
+        Queued commands are run first.
+        Returns:
+            Dictionary with the number of open carts, the total quantity and
+            the total revenue (cost of every open cart, as Money)
+        """
+        self.flush()
+        for connection in self._connections:
+            connection.send("stats")
+        carts = quantity = cents = fractional = 0
+        for shard in range(self.workers):
+            shard_carts, shard_quantity, shard_cents, shard_fractional = self._receive(shard)
+            carts += shard_carts
+            quantity += shard_quantity
+            cents += shard_cents
+            fractional += shard_fractional
+        return {"carts": carts, "quantity": quantity,
+                "revenue": Money.from_cents(cents, fractional == 0)}
+
+    def total_revenue(self):
+        """
+        Returns the total cost of every open cart, as Money
+        """
+        return self.stats()["revenue"]
+
+    def close(self):
+        """
+        Stops the worker processes; their carts are lost
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,246 @@
+"""
+Binary snapshots of shopping carts
+save_cart writes a ShoppingCart to a compact binary file. CartSnapshot opens
+such a file with mmap and reads lines only when they are asked for, so the
+totals of a large saved cart are available without loading its lines.
+
+File layout (all integers little-endian):
+    header      magic "CART", format version, line count, stamp, the cart's
+                running totals, and the lengths of the customer name and date
+    strings     customer name and date, UTF-8
+    records     one fixed-size record per line: price in cents, quantity,
+                offset and length of the name and description in the heap,
+                and whether the price prints as whole dollars
+    heap        UTF-8 names and descriptions; repeated descriptions are
+                stored once
+"""
+import mmap
+import os
+import struct
+
+from module8 import ItemToPurchase, ShoppingCart
+from money import Money
+
+MAGIC = b"CART"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQqqQII")
+RECORD = struct.Struct("<qqIIIIB")
+RECORD_NAME = struct.Struct("<II")  # name offset and length, 16 bytes into a record
+RECORD_NAME_POSITION = 16
+MAX_HEAP = 2 ** 32 - 1
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a file is not a cart snapshot this module can read
+    """
+
+
+def save_cart(cart, path, stamp=0):
+    """
+    Writes a shopping cart to a snapshot file
+    The file is written under a temporary name and then renamed, so a crash
+    never leaves a half-written snapshot at path.
+    Parameters:
+        cart: A ShoppingCart (or subclass) to save
+        path: Path of the snapshot file
+        stamp: Integer stored in the header for the caller's own use, such as
+               the journal position the snapshot reflects
+    """
+    records = bytearray()
+    heap = []
+    heap_size = 0
+    description_offsets = {}
+
+    def store(data):
+        nonlocal heap_size
+        offset = heap_size
+        heap.append(data)
+        heap_size += len(data)
+        if heap_size > MAX_HEAP:
+            raise ValueError("cart is too large for the snapshot format")
+        return offset, len(data)
+
+    pack = RECORD.pack
+    for item in cart:
+        price = item.item_price
+        name_offset, name_length = store(item.item_name.encode("utf-8"))
+        # Names are unique in a cart, but descriptions repeat and are shared
+        description = description_offsets.get(item.item_description)
+        if description is None:
+            description = description_offsets[item.item_description] = store(
+                item.item_description.encode("utf-8"))
+        records += pack(price.cents, item.item_quantity, name_offset, name_length,
+                        description[0], description[1], price.whole)
+
+    customer_name = cart.customer_name.encode("utf-8")
+    current_date = cart.current_date.encode("utf-8")
+    cost = cart.get_cost_of_cart()
+    header = HEADER.pack(MAGIC, VERSION, 0, len(cart), stamp,
+                         cart.get_num_items_in_cart(), cost.cents, not cost.whole,
+                         len(customer_name), len(current_date))
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header)
+        file.write(customer_name)
+        file.write(current_date)
+        file.write(records)
+        file.writelines(heap)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class CartSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file
+    Lines are decoded only when they are read. Use as a context manager, or
+    call close() when done.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor that opens and maps a snapshot file
+        Parameters:
+            path: Path of a file written by save_cart
+        """
+        with open(path, "rb") as file:
+            # mmap cannot map an empty file, and no shorter file is a snapshot
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise SnapshotError("file is too short to be a cart snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except Exception:
+            self._map.close()
+            raise
+        self._rows = None
+
+    def _read_header(self):
+        if len(self._map) < HEADER.size:
+            raise SnapshotError("file is too short to be a cart snapshot")
+        (magic, version, _, self._line_count, self.stamp, self._total_quantity,
+         self._total_cents, fractional, name_length, date_length) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError("file is not a cart snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        self._total_whole = not fractional
+        position = HEADER.size
+        self.customer_name = self._map[position:position + name_length].decode("utf-8")
+        position += name_length
+        self.current_date = self._map[position:position + date_length].decode("utf-8")
+        self._records_start = position + date_length
+        self._heap_start = self._records_start + self._line_count * RECORD.size
+        if self._heap_start > len(self._map):
+            raise SnapshotError("snapshot is truncated")
+
+    def close(self):
+        """
+        Unmaps the file
+        """
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._line_count
+
+    def get_num_items_in_cart(self):
+        """
+        Returns the total quantity saved in the header, without reading lines
+        """
+        return self._total_quantity
+
+    def get_cost_of_cart(self):
+        """
+        Returns the total cost saved in the header, without reading lines
+        """
+        return Money.from_cents(self._total_cents, self._total_whole)
+
+    def _text(self, offset, length):
+        start = self._heap_start + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def line(self, index):
+        """
+        Decodes one line of the snapshot
+        Parameters:
+            index: Integer position of the line, in cart order
+        Returns:
+            A new ItemToPurchase holding the line
+        """
+        if not 0 <= index < self._line_count:
+            raise IndexError("snapshot line index out of range")
+        (cents, quantity, name_offset, name_length, description_offset,
+         description_length, whole) = RECORD.unpack_from(self._map, self._records_start + index * RECORD.size)
+        return ItemToPurchase(self._text(name_offset, name_length),
+                              Money.from_cents(cents, bool(whole)), quantity,
+                              self._text(description_offset, description_length))
+
+    __getitem__ = line
+
+    def __iter__(self):
+        view = memoryview(self._map)
+        records = view[self._records_start:self._heap_start]
+        heap = view[self._heap_start:]
+        try:
+            for (cents, quantity, name_offset, name_length, description_offset,
+                 description_length, whole) in RECORD.iter_unpack(records):
+                yield ItemToPurchase(
+                    str(heap[name_offset:name_offset + name_length], "utf-8"),
+                    Money.from_cents(cents, bool(whole)), quantity,
+                    str(heap[description_offset:description_offset + description_length], "utf-8"))
+        finally:
+            heap.release()
+            records.release()
+            view.release()
+
+    def find_item(self, item_name):
+        """
+        Looks up a line by name
+        The first lookup builds a name index by reading only the names.
+        Parameters:
+            item_name: String representing the name of the item
+        Returns:
+            A new ItemToPurchase holding the line, or None if it is not saved
+        """
+        if self._rows is None:
+            self._rows = {}
+            position = self._records_start
+            for index in range(self._line_count):
+                name_offset, name_length = RECORD_NAME.unpack_from(
+                    self._map, position + RECORD_NAME_POSITION)
+                self._rows[self._text(name_offset, name_length)] = index
+                position += RECORD.size
+        index = self._rows.get(item_name)
+        return None if index is None else self.line(index)
+
+    def to_cart(self, cart_class=ShoppingCart):
+        """
+        Loads every line into a new cart
+        Parameters:
+            cart_class: ShoppingCart or a subclass to create
+        Returns:
+            The new cart
+        """
+        cart = cart_class(self.customer_name, self.current_date)
+        cart.add_items(self)
+        return cart
+
+
+def load_cart(path, cart_class=ShoppingCart):
+    """
+    Reads a snapshot file into a new cart
+    Parameters:
+        path: Path of a file written by save_cart
+        cart_class: ShoppingCart or a subclass to create
+    Returns:
+        The loaded cart
+    """
+    with CartSnapshot(path) as snapshot:
+        return snapshot.to_cart(cart_class)
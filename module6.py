@@ -1,6 +1,8 @@
 # This program implements a shopping cart system allowing users to add, remove, 
 # and modify items in their cart
 
+from money import parse_price
+
 class ItemToPurchase:
     # This class represents an item that can be purchased
     def __init__(self, item_name="none", item_price=0, item_quantity=0, item_description="none"):
@@ -128,7 +130,7 @@ q - Quit
                 print("\nADD ITEM TO CART")
                 item_name = input("Enter the item name: ")
                 item_description = input("Enter the item description: ")
-                item_price = int(input("Enter the item price: "))
+                item_price = parse_price(input("Enter the item price: "))
                 item_quantity = int(input("Enter the item quantity: "))
                 item = ItemToPurchase(item_name, item_price, item_quantity, item_description)
                 cart.add_item(item)
@@ -8,24 +8,164 @@ This program implements a complete shopping cart system that allows users to:
 - View item descriptions
 - View the complete shopping cart
 """
+import contextlib
+import io
+import itertools
+import sys
+from collections import namedtuple
+from collections.abc import Sequence
+
+from cart_pricing import CartPricing
+from cart_render import ReportCache, render_breakdown, render_descriptions, render_total, write_report
+from money import Money, parse_price
+
+
+# Result of a batch operation: how many items were applied, and the names
+# that were not in the cart
+BatchResult = namedtuple("BatchResult", ["applied", "missing"])
+
+
+class CartItemsView(Sequence):
+    """
+    Read-only sequence of the items in a cart, in the order they were added
+    The view follows the cart as it changes. len() is O(1). Indexing and
+    slicing walk the cart from whichever end is nearer, so the first and
+    last items are O(1) and a slice costs its length plus its distance from
+    that end; nothing is copied but the items asked for. It has no append,
+    remove or clear, so code that tries to change the cart through it fails
+    instead of changing a copy.
+    """
+    __slots__ = ("_cart",)
+
+    def __init__(self, cart):
+        self._cart = cart
+
+    def __len__(self):
+        return len(self._cart)
+
+    def __iter__(self):
+        return iter(self._cart)
+
+    def __getitem__(self, index):
+        length = len(self._cart)
+        if isinstance(index, slice):
+            return self._walk(range(*index.indices(length)), length)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("cart index out of range")
+        return self._walk(range(index, index + 1), length)[0]
+
+    def _walk(self, positions, length):
+        """
+        Returns the items at a range of positions as a tuple, walking the
+        cart forwards or backwards, whichever reaches them sooner
+        """
+        if not positions:
+            return ()
+        low = min(positions[0], positions[-1])
+        high = max(positions[0], positions[-1])
+        step = abs(positions.step)
+        if low <= length - 1 - high:
+            items = tuple(itertools.islice(self._cart, low, high + 1, step))
+            forwards = True
+        else:
+            items = tuple(itertools.islice(reversed(self._cart), length - 1 - high, length - low,
+                                           step))
+            forwards = False
+        return items if (positions.step > 0) == forwards else items[::-1]
+
+    def __repr__(self):
+        return f"CartItemsView({list(self._cart)!r})"
+
+
+class OutOfStock(ValueError):
+    """
+    Raised when a cart with an inventory set asks for more of an item than
+    is available (see cart_inventory)
+    The shortages attribute maps each short item name to the most the cart
+    can have.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__("Not enough stock: " + ", ".join(
+            f"{name} ({available} available)" for name, available in shortages.items()))
+
 
 class ItemToPurchase:
     """
     Class representing an item that can be purchased
+    Uses __slots__ instead of a per-instance __dict__ to keep large carts small
     """
+    __slots__ = ("_cart", "_item_name", "_item_price", "_item_quantity", "_item_description")
+    
     def __init__(self, item_name="none", item_price=0, item_quantity=0, item_description="none"):
         """
         Constructor that initializes an item with default values if not provided
         Parameters:
             item_name: String representing the name of the item
-            item_price: Integer or float representing the price of the item
+            item_price: Money, integer or float representing the price of the item
+                        (stored as Money)
             item_quantity: Integer representing how many of this item
             item_description: String describing the item
         """
-        self.item_name = item_name
-        self.item_price = item_price
-        self.item_quantity = item_quantity
-        self.item_description = item_description
+        self._cart = None  # ShoppingCart holding this item, if any
+        self._item_name = item_name
+        # Items with equal prices share one Money, which keeps large carts small
+        self._item_price = Money.shared(item_price)
+        self._item_quantity = item_quantity
+        self._item_description = item_description
+    
+    # The attributes are properties so that a cart holding the item hears
+    # about direct writes and can keep its index, totals and listeners up
+    # to date.
+    
+    @property
+    def item_name(self):
+        return self._item_name
+    
+    @item_name.setter
+    def item_name(self, value):
+        old_name = self._item_name
+        if self._cart is not None:
+            self._cart._rename_item(self, value)
+        self._item_name = value
+        if self._cart is not None and self._cart._listeners:
+            self._cart._notify("update", self, (("item_name", old_name),))
+    
+    @property
+    def item_price(self):
+        return self._item_price
+    
+    @item_price.setter
+    def item_price(self, value):
+        if self._cart is None:
+            self._item_price = Money.shared(value)
+        else:
+            self._cart._set_item_price(self, Money.shared(value))
+    
+    @property
+    def item_quantity(self):
+        return self._item_quantity
+    
+    @item_quantity.setter
+    def item_quantity(self, value):
+        if self._cart is None:
+            self._item_quantity = value
+        else:
+            self._cart._set_item_quantity(self, value)
+    
+    @property
+    def item_description(self):
+        return self._item_description
+    
+    @item_description.setter
+    def item_description(self, value):
+        old_description = self._item_description
+        self._item_description = value
+        if self._cart is not None and self._cart._listeners:
+            self._cart._notify("update", self, (("item_description", old_description),))
     
     def print_item_cost(self):
         """
@@ -49,30 +189,141 @@ class ShoppingCart:
         """
         self.customer_name = customer_name
         self.current_date = current_date
-        self.cart_items = []  # Empty list to store items in the cart
+        # Items keyed by item_name. Dicts keep insertion order, so this is both
+        # the O(1) lookup index and the ordered list of cart lines.
+        self._items = {}
+        # Running totals, kept up to date by every change to the cart. The cost
+        # is kept in cents; _fractional_lines counts lines whose price prints
+        # as a decimal, which decides how the total prints.
+        self._total_quantity = 0
+        self._total_cents = 0
+        self._fractional_lines = 0
+        self._listeners = []
+        self._report_cache = None
+        self._pricing = None
+        self._inventory = None
+    
+    def add_listener(self, listener):
+        """
+        Registers a function to be called after every change to the cart
+        The function is called as listener(cart, event, item, changes), where
+        event is one of:
+            "add": item was added to the cart; changes is None
+            "remove": item was removed from the cart; changes is None
+            "update": item in the cart changed; changes is a tuple of
+                      (attribute name, old value) pairs
+        Adding a name that is already in the cart is reported as an update
+        of its quantity.
+        Parameters:
+            listener: Function to call
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """
+        Unregisters a function added with add_listener
+        Parameters:
+            listener: Function to stop calling
+        """
+        self._listeners.remove(listener)
+    
+    def _notify(self, event, item, changes=None):
+        """
+        Calls every listener with a change to the cart
+        """
+        for listener in self._listeners:
+            listener(self, event, item, changes)
+    
+    @property
+    def cart_items(self):
+        """
+        Read-only CartItemsView of the items in the cart, in the order they
+        were added; use add_item/remove_item to change the cart
+        """
+        return CartItemsView(self)
+    
+    def __len__(self):
+        """
+        Returns the number of distinct items (lines) in the cart
+        """
+        return len(self._items)
+    
+    def __iter__(self):
+        """
+        Iterates over the items in the cart, in the order they were added
+        """
+        return iter(self._items.values())
+    
+    def __reversed__(self):
+        """
+        Iterates over the items in the cart, the most recently added first
+        """
+        return reversed(self._items.values())
+    
+    def __contains__(self, item_name):
+        """
+        Returns True if an item with this name is in the cart
+        """
+        return item_name in self._items
+    
+    def find_item(self, item_name):
+        """
+        Looks up an item by name
+        Parameters:
+            item_name: String representing the name of the item
+        Returns:
+            The ItemToPurchase in the cart, or None if it is not in the cart
+        """
+        return self._items.get(item_name)
     
     def add_item(self, item):
         """
-        Adds an ItemToPurchase object to the cart_items list
+        Adds an ItemToPurchase object to the cart
+        Item names are unique within a cart. Adding an item whose name is
+        already in the cart adds its quantity to the existing item; the
+        existing price and description are kept.
         Parameters:
             item: An ItemToPurchase object to add to the cart
         """
-        self.cart_items.append(item)
+        existing = self._items.get(item.item_name)
+        if self._inventory is not None:
+            self._inventory.reserve(self, item.item_name, item.item_quantity
+                                    + (0 if existing is None else existing.item_quantity))
+        if existing is not None:
+            self._write_item_quantity(existing, existing._item_quantity + item.item_quantity)
+            return
+        if item._cart is not None:
+            # An item can only report changes to one cart, so another cart's
+            # item is added as a copy
+            item = ItemToPurchase(item.item_name, item.item_price,
+                                  item.item_quantity, item.item_description)
+        item._cart = self
+        self._items[item.item_name] = item
+        self._total_quantity += item.item_quantity
+        self._total_cents += item.item_price.cents * item.item_quantity
+        self._fractional_lines += not item.item_price.whole
+        if self._listeners:
+            self._notify("add", item)
     
     def remove_item(self, item_name):
         """
-        Removes an item from cart_items list based on the item name
+        Removes an item from the cart based on the item name
         Parameters:
             item_name: String representing the name of item to remove
+        Returns:
+            True if the item was removed, False if it was not in the cart
         """
-        found = False
-        for item in self.cart_items:
-            if item.item_name == item_name:
-                self.cart_items.remove(item)
-                found = True
-                break
-        if not found:
+        item = self._items.pop(item_name, None)
+        if item is None:
             print("Item not found in cart. Nothing removed.")
+            return False
+        item._cart = None
+        self._total_quantity -= item.item_quantity
+        self._total_cents -= item.item_price.cents * item.item_quantity
+        self._fractional_lines -= not item.item_price.whole
+        if self._listeners:
+            self._notify("remove", item)
+        return True
     
     def modify_item(self, item):
         """
@@ -81,84 +332,366 @@ class ShoppingCart:
         Parameters:
             item: An ItemToPurchase object with the same name as an existing item
                  but with updated attributes
+        Returns:
+            True if the item was modified, False if it was not in the cart
         """
-        found = False
-        for cart_item in self.cart_items:
-            if cart_item.item_name == item.item_name:
-                found = True
-                if item.item_description != "none":
-                    cart_item.item_description = item.item_description
-                if item.item_price != 0:
-                    cart_item.item_price = item.item_price
-                if item.item_quantity != 0:
-                    cart_item.item_quantity = item.item_quantity
-                break
-        if not found:
+        cart_item = self._items.get(item.item_name)
+        if cart_item is None:
             print("Item not found in cart. Nothing modified.")
+            return False
+        if self._inventory is not None and item.item_quantity != 0:
+            self._inventory.reserve(self, item.item_name, item.item_quantity)
+        old_price = cart_item._item_price
+        old_quantity = cart_item._item_quantity
+        changes = _apply_modification(cart_item, item)
+        if changes:
+            self._item_changed(cart_item, old_price, old_quantity, changes)
+        return True
+    
+    def add_items(self, items):
+        """
+        Adds many ItemToPurchase objects to the cart in one pass
+        Follows the same rules as add_item, but updates the totals once.
+        Parameters:
+            items: Iterable of ItemToPurchase objects
+        Returns:
+            BatchResult with the number of items added and no missing names
+        """
+        if self._inventory is not None:
+            items = _reserve_added(self, items)
+        entries = self._items
+        applied = quantity = cents = fractional = 0
+        for item in items:
+            applied += 1
+            existing = entries.get(item.item_name)
+            if existing is not None:
+                # Reserved with the whole batch above
+                self._write_item_quantity(existing, existing._item_quantity + item.item_quantity)
+                continue
+            if item._cart is not None:
+                item = ItemToPurchase(item.item_name, item.item_price,
+                                      item.item_quantity, item.item_description)
+            item._cart = self
+            entries[item._item_name] = item
+            price = item._item_price
+            quantity += item._item_quantity
+            cents += price.cents * item._item_quantity
+            fractional += not price.whole
+            if self._listeners:
+                self._notify("add", item)
+        self._total_quantity += quantity
+        self._total_cents += cents
+        self._fractional_lines += fractional
+        return BatchResult(applied, [])
+    
+    def remove_items(self, item_names):
+        """
+        Removes many items from the cart in one pass
+        Names that are not in the cart are reported in the result instead
+        of printing a message for each one.
+        Parameters:
+            item_names: Iterable of item name strings
+        Returns:
+            BatchResult with the number removed and the list of missing names
+        """
+        entries = self._items
+        applied = quantity = cents = fractional = 0
+        missing = []
+        for item_name in item_names:
+            item = entries.pop(item_name, None)
+            if item is None:
+                missing.append(item_name)
+                continue
+            applied += 1
+            item._cart = None
+            price = item._item_price
+            quantity += item._item_quantity
+            cents += price.cents * item._item_quantity
+            fractional += not price.whole
+            if self._listeners:
+                self._notify("remove", item)
+        self._total_quantity -= quantity
+        self._total_cents -= cents
+        self._fractional_lines -= fractional
+        return BatchResult(applied, missing)
+    
+    def modify_items(self, items):
+        """
+        Modifies many existing items in the cart in one pass
+        Follows the same rules as modify_item. Names that are not in the cart
+        are reported in the result instead of printing a message for each one.
+        Parameters:
+            items: Iterable of ItemToPurchase objects holding the updates
+        Returns:
+            BatchResult with the number modified and the list of missing names
+        """
+        if self._inventory is not None:
+            items = _reserve_modified(self, items)
+        entries = self._items
+        applied = quantity = cents = fractional = 0
+        missing = []
+        for item in items:
+            cart_item = entries.get(item.item_name)
+            if cart_item is None:
+                missing.append(item.item_name)
+                continue
+            applied += 1
+            old_price = cart_item._item_price
+            old_quantity = cart_item._item_quantity
+            changes = _apply_modification(cart_item, item)
+            if not changes:
+                continue
+            price = cart_item._item_price
+            quantity += cart_item._item_quantity - old_quantity
+            cents += price.cents * cart_item._item_quantity - old_price.cents * old_quantity
+            fractional += old_price.whole - price.whole
+            if self._listeners:
+                self._notify("update", cart_item, changes)
+        self._total_quantity += quantity
+        self._total_cents += cents
+        self._fractional_lines += fractional
+        return BatchResult(applied, missing)
+    
+    def _set_item_price(self, item, price):
+        """
+        Called by an item in this cart to change its price
+        Parameters:
+            item: The ItemToPurchase to change
+            price: The new price, as Money
+        """
+        old_price = item._item_price
+        item._item_price = price
+        self._item_changed(item, old_price, item._item_quantity, (("item_price", old_price),))
+
+    def _set_item_quantity(self, item, quantity):
+        """
+        Called by an item in this cart to change its quantity
+        With an inventory set, the new quantity is reserved first; if there
+        is not enough stock, OutOfStock is raised and nothing changes.
+        Parameters:
+            item: The ItemToPurchase to change
+            quantity: The new quantity
+        """
+        if self._inventory is not None:
+            self._inventory.reserve(self, item._item_name, quantity)
+        self._write_item_quantity(item, quantity)
+
+    def _write_item_quantity(self, item, quantity):
+        """
+        Changes the quantity of an item in this cart without reserving stock,
+        for callers that have reserved it already
+        Parameters:
+            item: The ItemToPurchase to change
+            quantity: The new quantity
+        """
+        old_quantity = item._item_quantity
+        item._item_quantity = quantity
+        self._item_changed(item, item._item_price, old_quantity,
+                           (("item_quantity", old_quantity),))
+
+    def _item_changed(self, item, old_price, old_quantity, changes):
+        """
+        Called after the price or quantity of an item in this cart changes
+        Parameters:
+            item: The ItemToPurchase that changed
+            old_price: The item's price before the change
+            old_quantity: The item's quantity before the change
+            changes: Tuple of (attribute name, old value) pairs for listeners
+        """
+        price = item.item_price
+        self._total_quantity += item.item_quantity - old_quantity
+        self._total_cents += price.cents * item.item_quantity - old_price.cents * old_quantity
+        self._fractional_lines += old_price.whole - price.whole
+        if self._listeners:
+            self._notify("update", item, changes)
+    
+    def _rename_item(self, item, new_name):
+        """
+        Called by an item in this cart before its name changes
+        Re-keys the item under its new name, keeping its place in the cart
+        Parameters:
+            item: The ItemToPurchase being renamed
+            new_name: String representing the item's new name
+        """
+        old_name = item.item_name
+        if new_name == old_name:
+            return
+        if new_name in self._items:
+            raise ValueError(f"An item named {new_name!r} is already in the cart")
+        if self._inventory is not None:
+            self._inventory.reserve(self, new_name, item._item_quantity)
+        self._items = {(new_name if name == old_name else name): cart_item
+                       for name, cart_item in self._items.items()}
     
     def get_num_items_in_cart(self):
         """
-        Calculates and returns the total quantity of all items in the cart
+        Returns the total quantity of all items in the cart
+        The total is kept up to date as the cart changes, so this is O(1)
         Returns:
             Integer representing the total quantity of all items
         """
-        total_quantity = 0
-        for item in self.cart_items:
-            total_quantity += item.item_quantity
-        return total_quantity
+        return self._total_quantity
     
     def get_cost_of_cart(self):
         """
-        Calculates and returns the total cost of all items in the cart
+        Returns the total cost of all items in the cart
+        The total is kept up to date as the cart changes, so this is O(1)
         Returns:
-            Float or integer representing the total cost
+            Money representing the total cost
         """
-        total_cost = 0
-        for item in self.cart_items:
-            total_cost += item.item_price * item.item_quantity
-        return total_cost
+        return Money.from_cents(self._total_cents, self._fractional_lines == 0)
     
-    def print_total(self):
+    def print_total(self, file=None):
         """
         Prints the total cost and details of all items in the cart
-        If the cart is empty, prints a message indicating that
+        If the cart is empty, prints a message indicating that. With pricing
+        set (see set_pricing), the discounts, coupons, taxes and amount due
+        follow the total.
+        Parameters:
+            file: Optional file-like object to write to instead of stdout
         """
-        print(f"{self.customer_name}'s Shopping Cart - {self.current_date}")
-        
-        if not self.cart_items:
-            print("SHOPPING CART IS EMPTY")
-            return
-            
-        print(f"Number of Items: {self.get_num_items_in_cart()}")
-        print()
-        for item in self.cart_items:
-            print(f"{item.item_name} {item.item_quantity} @ ${item.item_price} = ${item.item_quantity * item.item_price}")
-        print()
-        print(f"Total: ${self.get_cost_of_cart()}")
+        if self._report_cache is not None:
+            chunks = self._report_cache.render_total()
+        else:
+            chunks = render_total(self)
+        if self._pricing is not None and len(self):
+            chunks = itertools.chain(chunks, render_breakdown(self._pricing.breakdown()))
+        write_report(chunks, file)
     
-    def print_descriptions(self):
+    def print_descriptions(self, file=None):
         """
         Prints the descriptions of all items in the cart
         If the cart is empty, prints a message indicating that
+        Parameters:
+            file: Optional file-like object to write to instead of stdout
         """
-        print(f"{self.customer_name}'s Shopping Cart - {self.current_date}")
-        
-        if not self.cart_items:
-            print("SHOPPING CART IS EMPTY")
-            return
-            
-        print("Item Descriptions")
-        for item in self.cart_items:
-            print(f"{item.item_name}: {item.item_description}")
+        if self._report_cache is not None:
+            write_report(self._report_cache.render_descriptions(), file)
+        else:
+            write_report(render_descriptions(self), file)
+    
+    def cache_reports(self, max_lines=None):
+        """
+        Keeps rendered report lines between calls to the print methods
+        Printing a report again then formats only the lines that changed.
+        Parameters:
+            max_lines: Largest cart to cache, or None for the default; larger
+                       carts are rendered in full each time
+        """
+        if self._report_cache is None:
+            if max_lines is None:
+                self._report_cache = ReportCache(self)
+            else:
+                self._report_cache = ReportCache(self, max_lines)
+
+    def set_pricing(self, engine):
+        """
+        Prices the cart with promotions, coupons and taxes
+        Lines are re-priced as they change, so print_total and pricing()
+        stay cheap on large carts.
+        Parameters:
+            engine: A cart_pricing.PricingEngine, or None to stop pricing
+        """
+        if engine is None:
+            if self._pricing is not None:
+                self._pricing.close()
+                self._pricing = None
+        elif self._pricing is None:
+            self._pricing = CartPricing(self, engine)
+        else:
+            self._pricing.reprice(engine)
 
+    def set_inventory(self, inventory):
+        """
+        Holds stock for the cart's lines in an inventory
+        add_item, modify_item, the batch methods, renames and quantities
+        written straight to an item then reserve each line's new quantity
+        before changing it, and raise OutOfStock, leaving the cart
+        unchanged, when there is not enough.
+        Parameters:
+            inventory: A cart_inventory.Inventory, or None to release the
+                       cart's holds and stop checking stock
+        """
+        if self._inventory is not None:
+            self._inventory.detach(self)
+            self._inventory = None
+        if inventory is not None:
+            inventory.attach(self)
+            self._inventory = inventory
 
-def print_menu(cart):
+    def pricing(self):
+        """
+        Returns the itemized cart_pricing.PriceBreakdown of the cart, or None
+        if no pricing is set
+        """
+        if self._pricing is None:
+            return None
+        return self._pricing.breakdown()
+
+
+def _reserve_added(cart, items):
     """
-    Displays a menu of options for the user to interact with the shopping cart
+    Reserves the quantities a cart's lines will have once items are added,
+    all or nothing
     Parameters:
-        cart: A ShoppingCart object to perform operations on
+        cart: A ShoppingCart (or subclass) with an inventory set
+        items: Iterable of ItemToPurchase objects about to be added
+    Returns:
+        List of the items
+    """
+    items = list(items)
+    quantities = {}
+    for item in items:
+        name = item.item_name
+        if name not in quantities:
+            existing = cart.find_item(name)
+            quantities[name] = 0 if existing is None else existing.item_quantity
+        quantities[name] += item.item_quantity
+    cart._inventory.reserve_many(cart, quantities)
+    return items
+
+
+def _reserve_modified(cart, items):
+    """
+    Reserves the quantities a cart's lines will have once items modify them,
+    all or nothing
+    Parameters:
+        cart: A ShoppingCart (or subclass) with an inventory set
+        items: Iterable of ItemToPurchase objects holding the updates
+    Returns:
+        List of the items
+    """
+    items = list(items)
+    cart._inventory.reserve_many(cart, {item.item_name: item.item_quantity for item in items
+                                        if item.item_quantity != 0 and item.item_name in cart})
+    return items
+
+
+def _apply_modification(cart_item, item):
+    """
+    Copies the non-default attributes of item onto cart_item
+    Writes the private fields directly, so the caller must update the cart
+    totals and notify listeners.
+    Parameters:
+        cart_item: ItemToPurchase in a cart
+        item: ItemToPurchase holding the updates
+    Returns:
+        Tuple of (attribute name, old value) pairs that were changed
     """
-    menu = """
+    changes = ()
+    if item.item_description != "none":
+        changes += (("item_description", cart_item._item_description),)
+        cart_item._item_description = item.item_description
+    if item.item_price.cents != 0:
+        changes += (("item_price", cart_item._item_price),)
+        cart_item._item_price = Money.shared(item.item_price)
+    if item.item_quantity != 0:
+        changes += (("item_quantity", cart_item._item_quantity),)
+        cart_item._item_quantity = item.item_quantity
+    return changes
+
+
+MENU = """
 MENU
 a - Add item to cart
 r - Remove item from cart
@@ -167,46 +700,145 @@ i - Output items' descriptions
 o - Output shopping cart
 q - Quit
 """
+
+
+def add_command(cart, item_name, item_description, item_price, item_quantity):
+    """
+    Handles menu option a: adds an item built from the typed values
+    Returns:
+        False if there was not enough stock
+    """
+    try:
+        cart.add_item(ItemToPurchase(item_name, parse_price(item_price),
+                                     int(item_quantity), item_description))
+    except OutOfStock as error:
+        print(f"{error}. Nothing added.")
+        return False
+
+
+def remove_command(cart, item_name):
+    """
+    Handles menu option r: removes an item by name
+    Returns:
+        False if the item was not in the cart
+    """
+    return cart.remove_item(item_name)
+
+
+def change_command(cart, item_name, new_quantity):
+    """
+    Handles menu option c: changes an item's quantity
+    Returns:
+        False if the item was not in the cart or there was not enough stock
+    """
+    # Create a temporary item with default values but the new quantity
+    try:
+        return cart.modify_item(ItemToPurchase(item_name, 0, int(new_quantity), "none"))
+    except OutOfStock as error:
+        print(f"{error}. Nothing modified.")
+        return False
+        return False
+
+
+def descriptions_command(cart):
+    """
+    Handles menu option i: prints the item descriptions
+    """
+    cart.print_descriptions()
+
+
+def total_command(cart):
+    """
+    Handles menu option o: prints the shopping cart
+    """
+    cart.print_total()
+
+
+# Menu options other than q: option -> (heading, prompts, handler). The
+# handler is called with the cart and one typed value per prompt.
+MENU_COMMANDS = {
+    'a': ("ADD ITEM TO CART",
+          ("Enter the item name:\n", "Enter the item description:\n",
+           "Enter the item price:\n", "Enter the item quantity:\n"),
+          add_command),
+    'r': ("REMOVE ITEM FROM CART", ("Enter name of item to remove:\n",), remove_command),
+    'c': ("CHANGE ITEM QUANTITY",
+          ("Enter the item name:\n", "Enter the new quantity:\n"),
+          change_command),
+    'o': ("OUTPUT SHOPPING CART", (), total_command),
+    'i': ("OUTPUT ITEMS' DESCRIPTIONS", (), descriptions_command),
+}
+
+
+def invalid_command(choice):
+    """
+    Handles a menu option that does not exist
+    """
+    print("Invalid option. Please try again.")
+
+
+def print_menu(cart):
+    """
+    Displays a menu of options for the user to interact with the shopping cart
+    Parameters:
+        cart: A ShoppingCart object to perform operations on
+    """
     while True:
-        print(menu)
+        print(MENU)
         choice = input("Choose an option: ")
-        
-        if choice == 'a':
-            print("\nADD ITEM TO CART")
-            item_name = input("Enter the item name:\n")
-            item_description = input("Enter the item description:\n")
-            item_price = float(input("Enter the item price:\n"))
-            item_quantity = int(input("Enter the item quantity:\n"))
-            item = ItemToPurchase(item_name, item_price, item_quantity, item_description)
-            cart.add_item(item)
-                
-        elif choice == 'r':
-            print("\nREMOVE ITEM FROM CART")
-            item_name = input("Enter name of item to remove:\n")
-            cart.remove_item(item_name)
-                
-        elif choice == 'c':
-            print("\nCHANGE ITEM QUANTITY")
-            item_name = input("Enter the item name:\n")
-            new_quantity = int(input("Enter the new quantity:\n"))
-                
-            # Create a temporary item with default values but the new quantity
-            item = ItemToPurchase(item_name, 0, new_quantity, "none")
-            cart.modify_item(item)
-                
-        elif choice == 'o':
-            print("\nOUTPUT SHOPPING CART")
-            cart.print_total()
-            
-        elif choice == 'i':
-            print("\nOUTPUT ITEMS' DESCRIPTIONS")
-            cart.print_descriptions()
-            
-        elif choice == 'q':
+        if choice == 'q':
             break
-            
-        else:
-            print("Invalid option. Please try again.")
+        command = MENU_COMMANDS.get(choice)
+        if command is None:
+            invalid_command(choice)
+            continue
+        heading, prompts, handler = command
+        print(f"\n{heading}")
+        handler(cart, *[input(prompt) for prompt in prompts])
+
+
+def run_batch(cart, lines, file=None):
+    """
+    Runs menu commands from a stream of lines, without prompting
+    The stream holds exactly what would be typed at the menu: an option
+    letter on one line, then one line per value the option asks for. The
+    menu, headings and prompts are not printed; reports and messages are
+    collected and written once at the end. A command with a bad value
+    prints "Error: ..." and the rest still run.
+    Stops at option q or at the end of the stream.
+    Parameters:
+        cart: A ShoppingCart object to perform operations on
+        lines: Iterable of lines, such as an open file or sys.stdin
+        file: Optional file-like object for the output instead of stdout
+    Returns:
+        Number of commands run, not counting q
+    """
+    output = io.StringIO()
+    commands = MENU_COMMANDS
+    count = 0
+    lines = iter(lines)
+    try:
+        with contextlib.redirect_stdout(output):
+            for choice in lines:
+                choice = choice.rstrip("\r\n")
+                if choice == 'q':
+                    break
+                command = commands.get(choice)
+                if command is None:
+                    invalid_command(choice)
+                    continue
+                values = [next(lines, "").rstrip("\r\n") for _ in command[1]]
+                count += 1
+                try:
+                    command[2](cart, *values)
+                except ValueError as error:
+                    # A bad typed value, such as a price of "abc": report it
+                    # the way the cart server does and go on to the next one
+                    print(f"Error: {error}")
+    finally:
+        # Whatever ran before an unexpected error still gets written
+        write_report((output.getvalue(),), file)
+    return count
 
 
 def main():
@@ -222,10 +854,40 @@ def main():
     
     # Create a shopping cart with the customer's information
     cart = ShoppingCart(customer_name, current_date)
+    # Shoppers print the same cart repeatedly; reuse the rendered lines
+    cart.cache_reports()
     
     # Show the menu to the user
     print_menu(cart)
 
 
+def batch_main(lines, file=None):
+    """
+    Non-interactive version of main
+    Reads the customer's name and date from the first two lines, then runs
+    the remaining lines as menu commands with run_batch.
+    Parameters:
+        lines: Iterable of lines, such as an open file or sys.stdin
+        file: Optional file-like object for the output instead of stdout
+    Returns:
+        The ShoppingCart that was built
+    """
+    lines = iter(lines)
+    customer_name = next(lines, "").rstrip("\r\n")
+    current_date = next(lines, "").rstrip("\r\n")
+    write_report((f"Customer name: {customer_name}\nToday's date: {current_date}\n",), file)
+    cart = ShoppingCart(customer_name, current_date)
+    run_batch(cart, lines, file)
+    return cart
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python module8.py --batch [FILE] runs commands from FILE (or stdin)
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        if len(sys.argv) > 2 and sys.argv[2] != "-":
+            with open(sys.argv[2]) as commands_file:
+                batch_main(commands_file)
+        else:
+            batch_main(sys.stdin)
+    else:
+        main()
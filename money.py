@@ -0,0 +1,224 @@
+"""
+Exact money type for the shopping cart
+Money stores an amount as a whole number of cents, so adding up prices and
+line totals never drifts the way float arithmetic does. Ints, floats, strings
+and Decimals are all accepted where a price is expected and converted once,
+rounding half-up to the nearest cent.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+from operator import attrgetter, mul
+
+CENT = Decimal("0.01")
+
+# Most distinct amounts Money.shared keeps before starting afresh
+MAX_SHARED = 1 << 16
+_shared = {}
+_get_cents = attrgetter("cents")
+_get_whole = attrgetter("whole")
+
+
+@total_ordering
+class Money:
+    """
+    Class representing an amount of money as an integer number of cents
+    Money prints the way the number it was made from used to print: amounts
+    made from ints print as whole dollars ("189"), everything else prints as
+    a decimal ("10.99", "5.0"). Arithmetic keeps that style the same way int
+    and float arithmetic did, so existing output does not change.
+    """
+    __slots__ = ("cents", "whole")
+
+    def __init__(self, amount=0):
+        """
+        Constructor that converts an amount to Money
+        Parameters:
+            amount: Money, int, float, Decimal or string amount in dollars
+        """
+        if type(amount) is int:
+            self.cents = amount * 100
+            self.whole = True
+        elif isinstance(amount, Money):
+            self.cents = amount.cents
+            self.whole = amount.whole
+        elif isinstance(amount, int) and not isinstance(amount, bool):
+            self.cents = amount * 100
+            self.whole = True
+        elif isinstance(amount, (float, str, Decimal)):
+            if isinstance(amount, float):
+                # repr gives the shortest decimal that round-trips, so 10.99
+                # becomes 1099 cents rather than 1098.999... rounded
+                amount = repr(amount)
+            if isinstance(amount, str):
+                # Fast path for plain amounts such as "12" or "10.99", which
+                # need no rounding
+                dollars, _, cents = amount.partition(".")
+                if (dollars.isascii() and dollars.isdecimal() and len(cents) <= 2
+                        and (not cents or cents.isascii() and cents.isdecimal())):
+                    self.cents = int(dollars) * 100 + int(cents.ljust(2, "0"))
+                    self.whole = False
+                    return
+            try:
+                value = Decimal(amount)
+            except InvalidOperation:
+                raise ValueError(f"invalid money amount: {amount!r}") from None
+            if not value.is_finite():
+                raise ValueError(f"invalid money amount: {amount!r}")
+            self.cents = int(value.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+            self.whole = False
+        else:
+            raise TypeError(f"cannot convert {type(amount).__name__} to Money")
+
+    @classmethod
+    def from_cents(cls, cents, whole=False):
+        """
+        Creates Money directly from a number of cents, without any parsing
+        Parameters:
+            cents: Integer number of cents
+            whole: True if the amount should print as whole dollars
+        Returns:
+            A Money object
+        """
+        money = object.__new__(cls)
+        money.cents = cents
+        money.whole = whole
+        return money
+
+    @classmethod
+    def shared(cls, amount):
+        """
+        Returns Money for an amount, the same object for every equal amount
+        printed the same way
+        Money is never changed in place, so the items of a cart can share
+        one object per distinct price instead of keeping one each.
+        Parameters:
+            amount: Money, int, float, Decimal or string amount in dollars
+        Returns:
+            A Money object that must not be changed
+        """
+        money = amount if type(amount) is cls else cls(amount)
+        key = (money.cents, money.whole)
+        shared = _shared.get(key)
+        if shared is None:
+            if len(_shared) >= MAX_SHARED:
+                _shared.clear()
+            shared = _shared[key] = money
+        return shared
+
+    @staticmethod
+    def total(prices, quantities):
+        """
+        Adds up price * quantity over many lines using integer arithmetic only
+        This is the fast path for summing large numbers of line totals.
+        Parameters:
+            prices: Iterable of Money prices
+            quantities: Iterable of integer quantities, in the same order
+        Returns:
+            Money holding the sum of the line totals
+        """
+        prices = prices if isinstance(prices, (list, tuple)) else list(prices)
+        cents = sum(map(mul, map(_get_cents, prices), quantities))
+        return Money.from_cents(cents, all(map(_get_whole, prices)))
+
+    def __str__(self):
+        cents = abs(self.cents)
+        sign = "-" if self.cents < 0 else ""
+        dollars, cents = divmod(cents, 100)
+        if self.whole:
+            return f"{sign}{dollars}"
+        if cents % 10 == 0:
+            return f"{sign}{dollars}.{cents // 10}"
+        return f"{sign}{dollars}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        if not spec:
+            return self.__str__()
+        return format(self.to_decimal(), spec)
+
+    def to_decimal(self):
+        """
+        Returns the amount as an exact Decimal number of dollars
+        """
+        return Decimal(self.cents).scaleb(-2)
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __hash__(self):
+        # Equal Money, ints and floats must hash alike
+        if self.cents % 100 == 0:
+            return hash(self.cents // 100)
+        return hash(self.cents / 100)
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        if isinstance(other, int):
+            return self.cents == other * 100
+        if isinstance(other, float):
+            return self.cents / 100 == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        # Compare exactly the way __eq__ does, so the ordering and equality
+        # agree; rounding other to cents would make 10.99 > 10.994
+        if isinstance(other, int):
+            return self.cents < other * 100
+        if isinstance(other, float):
+            return self.cents / 100 < other
+        return NotImplemented
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            if not isinstance(other, (int, float)):
+                return NotImplemented
+            other = Money(other)
+        return Money.from_cents(self.cents + other.cents, self.whole and other.whole)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            if not isinstance(other, (int, float)):
+                return NotImplemented
+            other = Money(other)
+        return Money.from_cents(self.cents - other.cents, self.whole and other.whole)
+
+    def __rsub__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Money(other) - self
+
+    def __neg__(self):
+        return Money.from_cents(-self.cents, self.whole)
+
+    def __mul__(self, quantity):
+        if not isinstance(quantity, int):
+            return NotImplemented
+        return Money.from_cents(self.cents * quantity, self.whole)
+
+    __rmul__ = __mul__
+
+
+ZERO = Money(0)
+
+
+def parse_price(text):
+    """
+    Converts a price typed by the user to Money
+    Typed prices print as decimals ("5" prints as "5.0"), matching what the
+    menus printed when they parsed prices with float().
+    Parameters:
+        text: String such as "10.99"
+    Returns:
+        A Money object
+    """
+    return Money(text.strip())
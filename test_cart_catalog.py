@@ -0,0 +1,109 @@
+import io
+import random
+import sys
+import unittest
+from cart_catalog import Catalog, CatalogItem, CatalogShoppingCart
+from module8 import ItemToPurchase
+
+class TestCatalogShoppingCart(unittest.TestCase):
+    """Test carts whose lines refer to a shared catalog"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.catalog = Catalog()
+        self.catalog.define("Nike Romaleos", 189, "Volt color, Weightlifting shoes")
+        self.cart = CatalogShoppingCart("John Doe", "May 11, 2025", self.catalog)
+        self.cart.add_product("Nike Romaleos", 2)
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+
+    def test_behaves_like_shopping_cart(self):
+        """Test totals, lookups and the report"""
+        self.assertEqual(self.cart.get_num_items_in_cart(), 7)
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+        self.assertIsInstance(self.cart.find_item("Chocolate Chips"), CatalogItem)
+        self.assertIn("Chocolate Chips", self.catalog)
+        output = io.StringIO()
+        self.cart.print_total(output)
+        self.assertIn("Nike Romaleos 2 @ $189 = $378\n", output.getvalue())
+        self.assertTrue(self.cart.remove_item("Chocolate Chips"))
+        self.assertEqual(self.cart.get_cost_of_cart(), 378)
+        self.assertEqual(self.cart.remove_items(["Nike Romaleos", "Hat"]).missing, ["Hat"])
+        self.assertEqual(self.cart.get_num_items_in_cart(), 0)
+
+    def test_lines_share_catalog_strings(self):
+        """Test that carts hold the catalog's name object, not copies"""
+        other = CatalogShoppingCart("Jane Doe", "May 12, 2025", self.catalog)
+        other.add_item(ItemToPurchase("".join(["Nike ", "Romaleos"]), 999, 1, "ignored"))
+        name = next(iter(other._lines))
+        self.assertIs(name, self.catalog["Nike Romaleos"].name)
+        self.assertEqual(other.get_cost_of_cart(), 189)
+        self.assertEqual(other.find_item("Nike Romaleos").item_description,
+                         "Volt color, Weightlifting shoes")
+
+    def test_price_change_propagates_to_every_cart(self):
+        """Test that a catalog price change reaches each cart's cost"""
+        other = CatalogShoppingCart("Jane Doe", "May 12, 2025", self.catalog)
+        other.add_product("Nike Romaleos", 1)
+        self.assertEqual(other.get_cost_of_cart(), 189)
+        self.catalog.set_price("Nike Romaleos", 150)
+        self.assertEqual(other.get_cost_of_cart(), 150)
+        self.assertEqual(self.cart.get_cost_of_cart().cents, 30000 + 1750)
+        # Changes made while the totals are stale are picked up as well
+        self.catalog.set_price("Chocolate Chips", 4)
+        self.cart.find_item("Chocolate Chips").item_quantity = 1
+        self.assertEqual(self.cart.get_cost_of_cart(), 304)
+        self.assertEqual(self.cart.get_num_items_in_cart(), 3)
+
+    def test_modify_item_writes_prices_to_catalog(self):
+        """Test that modify_item changes the product for every cart"""
+        other = CatalogShoppingCart("Jane Doe", "May 12, 2025", self.catalog)
+        other.add_product("Chocolate Chips", 2)
+        events = []
+        self.cart.add_listener(lambda cart, event, item, changes: events.append((event, changes)))
+        self.cart.modify_item(ItemToPurchase("Chocolate Chips", 2, 3, "Dark"))
+        self.assertEqual(other.get_cost_of_cart(), 4)
+        self.assertEqual(other.find_item("Chocolate Chips").item_description, "Dark")
+        self.assertEqual(self.cart.get_num_items_in_cart(), 5)
+        self.assertEqual([name for name, _ in events[0][1]],
+                         ["item_description", "item_price", "item_quantity"])
+
+    def test_random_changes_keep_costs_exact(self):
+        """Test cart costs against a recount after random changes and price updates"""
+        rng = random.Random(17)
+        self.catalog.MAX_CHANGES = 8
+        carts = [CatalogShoppingCart(f"Customer {n}", "May 11, 2025", self.catalog) for n in range(5)]
+        names = [f"Product {n}" for n in range(12)]
+        for _ in range(2000):
+            cart = rng.choice(carts)
+            name = rng.choice(names)
+            action = rng.randrange(5)
+            if action == 0:
+                cart.add_item(ItemToPurchase(name, rng.choice((1, 2.5, 3)), rng.randrange(1, 4)))
+            elif action == 1:
+                cart.remove_items([name])
+            elif action == 2 and name in self.catalog:
+                self.catalog.set_price(name, rng.choice((1, 2.25, 4)))
+            elif action == 3:
+                cart.modify_items([ItemToPurchase(name, rng.choice((0, 5)), rng.randrange(0, 3))])
+            else:
+                cart = rng.choice(carts)
+                cost = cart.get_cost_of_cart()
+                self.assertEqual(cost.cents, sum(item.item_price.cents * item.item_quantity
+                                                 for item in cart))
+                self.assertEqual(cost.whole, all(item.item_price.whole for item in cart))
+
+    def test_rename_and_missing_items(self):
+        """Test that lines cannot be renamed and missing names are reported"""
+        with self.assertRaises(ValueError):
+            self.cart.find_item("Nike Romaleos").item_name = "Romaleos 4"
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertFalse(self.cart.modify_item(ItemToPurchase("Hat", 0, 1)))
+            self.assertFalse(self.cart.remove_item("Hat"))
+        finally:
+            sys.stdout = old_stdout
+
+
+if __name__ == "__main__":
+    unittest.main()
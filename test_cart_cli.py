@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import cart_cli
+from cart_server import CartServer
+from cart_snapshot import load_cart, save_cart
+from module8 import ItemToPurchase, ShoppingCart
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class TestCartCli(unittest.TestCase):
+    """Test the one-shot command line tool"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cart.snap")
+        cart = ShoppingCart("John Doe", "May 11, 2025")
+        cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        save_cart(cart, self.path)
+        self.cart = cart
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_cli(self, *argv):
+        """Helper method returning (exit status, stdout, stderr) of a run"""
+        output = io.StringIO()
+        errors = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            status = cart_cli.main(list(argv))
+        return status, output.getvalue(), errors.getvalue()
+
+    def test_total_and_describe(self):
+        """Test the summary, the full report and the descriptions"""
+        self.assertEqual(self.run_cli("total", self.path),
+                         (0, "John Doe's Shopping Cart - May 11, 2025\n"
+                             "Number of Items: 7\nTotal: $395.5\n", ""))
+        report = io.StringIO()
+        self.cart.print_total(report)
+        self.assertEqual(self.run_cli("total", self.path, "--report"), (0, report.getvalue(), ""))
+        self.assertEqual(self.run_cli("total", "--report", "--numpy", self.path),
+                         (0, report.getvalue(), ""))
+        descriptions = io.StringIO()
+        self.cart.print_descriptions(descriptions)
+        self.assertEqual(self.run_cli("describe", self.path), (0, descriptions.getvalue(), ""))
+
+    def test_apply(self):
+        """Test running menu commands against the snapshot and the journal"""
+        commands = os.path.join(self.directory.name, "commands.txt")
+        with open(commands, "w") as file:
+            file.write("r\nChocolate Chips\nc\nNike Romaleos\n3\nr\nHat\n")
+        self.assertEqual(self.run_cli("apply", self.path, commands),
+                         (0, "Item not found in cart. Nothing removed.\n", ""))
+        self.assertEqual(load_cart(self.path).get_cost_of_cart(), 567)
+        journal = os.path.join(self.directory.name, "cart.journal")
+        with open(commands, "w") as file:
+            file.write("a\nHat\nWool\n20\n1\n")
+        self.assertEqual(self.run_cli("apply", self.path, commands, "--journal", journal)[0], 0)
+        self.assertEqual(self.run_cli("apply", self.path, commands, "--journal", journal)[0], 0)
+        # The snapshot is left alone; the journal holds both runs
+        self.assertEqual(load_cart(self.path).get_num_items_in_cart(), 3)
+        from cart_journal import open_cart
+        cart, opened = open_cart(journal, self.path, background=False)
+        opened.close()
+        self.assertEqual(cart.find_item("Hat").item_quantity, 2)
+
+    def test_import(self):
+        """Test importing an order file into the snapshot"""
+        orders = os.path.join(self.directory.name, "orders.csv")
+        with open(orders, "w") as file:
+            file.write("name,price,quantity\nHat,20,1\nSocks,free,2\n")
+        self.assertEqual(self.run_cli("import", self.path, orders),
+                         (1, "Imported 1 rows, rejected 1\n", f"{orders}:3: invalid price 'free'\n"))
+        self.assertEqual(load_cart(self.path).get_cost_of_cart(), 415.5)
+
+    def test_errors(self):
+        """Test usage errors and failed operations"""
+        self.assertEqual(self.run_cli()[0], 2)
+        self.assertEqual(self.run_cli("shout")[0], 2)
+        self.assertIn("unknown option --fast", self.run_cli("total", self.path, "--fast")[2])
+        self.assertIn("expected SNAPSHOT", self.run_cli("describe")[2])
+        status, _, errors = self.run_cli("total", os.path.join(self.directory.name, "missing"))
+        self.assertEqual(status, 1)
+        self.assertTrue(errors.startswith("error: "))
+        not_a_snapshot = os.path.join(self.directory.name, "commands.txt")
+        with open(not_a_snapshot, "w") as file:
+            file.write("x" * 100)
+        self.assertEqual(self.run_cli("describe", not_a_snapshot),
+                         (1, "", "error: file is not a cart snapshot\n"))
+
+    def test_ping(self):
+        """Test the health check against a running server and a closed port"""
+        async def main():
+            server = await CartServer().start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, self.run_cli, "ping", "--port", str(port))
+        self.assertEqual(asyncio.run(main()), (0, "ok\n", ""))
+        with tempfile.TemporaryDirectory() as directory:
+            status, _, errors = self.run_cli("ping", "--unix", os.path.join(directory, "none.sock"))
+        self.assertEqual(status, 1)
+        self.assertIn("not answering", errors)
+
+    def test_startup(self):
+        """Test that total imports no optional backend and stays within the budget"""
+        check = ("import sys, cart_cli; status = cart_cli.main(sys.argv[1:]); "
+                 "print(*sorted(sys.modules), file=sys.stderr); sys.exit(status)")
+        result = subprocess.run([sys.executable, "-c", check, "total", self.path],
+                                cwd=HERE, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        modules = set(result.stderr.split())
+        for module in ("numpy", "cart_numpy", "cart_journal", "cart_server", "asyncio",
+                       "socket", "argparse", "threading"):
+            self.assertNotIn(module, modules)
+
+        def best_run(*argv):
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *argv], cwd=HERE, check=True,
+                               stdout=subprocess.DEVNULL)
+                best = min(best, time.perf_counter() - start)
+            return best
+        overhead = best_run("cart_cli.py", "total", self.path) - best_run("-c", "pass")
+        self.assertLess(overhead, cart_cli.STARTUP_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
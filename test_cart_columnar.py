@@ -0,0 +1,107 @@
+import io
+import sys
+import unittest
+from cart_columnar import ColumnarShoppingCart, ItemView
+from module8 import ItemToPurchase, ShoppingCart
+
+class TestColumnarShoppingCart(unittest.TestCase):
+    """Test that ColumnarShoppingCart behaves like ShoppingCart"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ColumnarShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3, 5, "Semi-sweet"))
+
+    def capture_output(self, function, *args, **kwargs):
+        """Helper method to capture printed output from functions"""
+        captured_output = io.StringIO()
+        old_stdout = sys.stdout
+        sys.stdout = captured_output
+        try:
+            function(*args, **kwargs)
+        finally:
+            sys.stdout = old_stdout
+        return captured_output.getvalue()
+
+    def test_items_are_views(self):
+        """Test that the cart hands out ItemToPurchase-compatible views"""
+        item = self.cart.find_item("Nike Romaleos")
+        self.assertIsInstance(item, ItemView)
+        self.assertIsInstance(item, ItemToPurchase)
+        self.assertEqual(item.item_price, 189)
+        self.assertEqual(str(item.item_price), "189")
+        self.assertEqual(item.item_quantity, 2)
+        self.assertEqual(item.item_description, "Volt color, Weightlifting shoes")
+        self.assertEqual([i.item_name for i in self.cart.cart_items],
+                         ["Nike Romaleos", "Chocolate Chips"])
+
+    def test_totals(self):
+        """Test totals through add, modify, view writes and remove"""
+        self.assertEqual(self.cart.get_num_items_in_cart(), 7)
+        self.assertEqual(self.cart.get_cost_of_cart(), 393)
+        self.cart.modify_item(ItemToPurchase("Nike Romaleos", 200, 3, "none"))
+        self.cart.find_item("Chocolate Chips").item_quantity = 1
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3, 1, "none"))
+        self.assertEqual(self.cart.get_num_items_in_cart(), 5)
+        self.assertEqual(self.cart.get_cost_of_cart(), 606)
+        self.cart.remove_item("Nike Romaleos")
+        self.assertEqual(self.cart.get_cost_of_cart(), 6)
+        self.assertEqual(self.cart.find_item("Chocolate Chips").item_description, "Semi-sweet")
+
+    def test_not_found_messages(self):
+        """Test that misses print the same messages as ShoppingCart"""
+        output = self.capture_output(self.cart.remove_item, "NonExistentItem")
+        self.assertIn("Item not found in cart. Nothing removed.", output)
+        output = self.capture_output(self.cart.modify_item, ItemToPurchase("NonExistentItem", 1, 1))
+        self.assertIn("Item not found in cart. Nothing modified.", output)
+
+    def test_print_total_matches_shopping_cart(self):
+        """Test that printing gives the same text as ShoppingCart"""
+        cart = ShoppingCart("John Doe", "May 11, 2025")
+        cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        cart.add_item(ItemToPurchase("Chocolate Chips", 3, 5, "Semi-sweet"))
+        self.assertEqual(self.capture_output(self.cart.print_total),
+                         self.capture_output(cart.print_total))
+        self.assertEqual(self.capture_output(self.cart.print_descriptions),
+                         self.capture_output(cart.print_descriptions))
+
+    def test_compaction_keeps_order_and_totals(self):
+        """Test that compacting the columns after many removals keeps the cart intact"""
+        cart = ColumnarShoppingCart()
+        for i in range(3000):
+            cart.add_item(ItemToPurchase(f"item{i}", 2, 1, f"desc{i % 7}"))
+        for i in range(0, 3000, 3):
+            cart.remove_item(f"item{i}")
+        for i in range(1, 3000, 3):
+            cart.remove_item(f"item{i}")
+        self.assertLess(len(cart._quantities), 3000)
+        self.assertEqual(len(cart), 1000)
+        self.assertEqual(cart.get_cost_of_cart(), 2000)
+        self.assertEqual(cart.cart_items[0].item_name, "item2")
+        self.assertEqual(cart.find_item("item5").item_description, "desc5")
+
+    def test_batch_operations(self):
+        """Test the batch add, modify and remove methods"""
+        result = self.cart.add_items(ItemToPurchase(f"item{i}", 1.5, 2) for i in range(10))
+        self.assertEqual(result.applied, 10)
+        result = self.cart.modify_items([ItemToPurchase("item0", 0, 4), ItemToPurchase("X", 0, 1)])
+        self.assertEqual(result, (1, ["X"]))
+        result = self.cart.remove_items(["item1", "item2", "Y"])
+        self.assertEqual(result, (2, ["Y"]))
+        self.assertEqual(len(self.cart), 10)
+        self.assertEqual(self.cart.get_num_items_in_cart(), 7 + 4 + 7 * 2)
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "420.0")
+
+    def test_rename_view(self):
+        """Test renaming a line through its view"""
+        item = self.cart.find_item("Nike Romaleos")
+        item.item_name = "Romaleos 4"
+        self.assertIn("Romaleos 4", self.cart)
+        self.assertEqual(item.item_quantity, 2)
+        with self.assertRaises(ValueError):
+            item.item_name = "Chocolate Chips"
+
+
+if __name__ == "__main__":
+    unittest.main()
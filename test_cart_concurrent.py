@@ -0,0 +1,187 @@
+import io
+import sys
+import threading
+import unittest
+from cart_concurrent import ConcurrentShoppingCart
+from cart_inventory import Inventory
+from module8 import ItemToPurchase
+
+class TestConcurrentShoppingCart(unittest.TestCase):
+    """Test ConcurrentShoppingCart alone and under many threads"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ConcurrentShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+
+    def assert_totals_match_lines(self, cart):
+        """Helper method checking the published totals against the lines"""
+        quantity, cost = cart.get_totals()
+        self.assertEqual(quantity, sum(item.item_quantity for item in cart))
+        self.assertEqual(cost.cents, sum(item.item_price.cents * item.item_quantity for item in cart))
+
+    def test_single_thread_behaviour(self):
+        """Test that the cart behaves like ShoppingCart in one thread"""
+        self.assertEqual(self.cart.get_num_items_in_cart(), 7)
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+        self.cart.modify_item(ItemToPurchase("Nike Romaleos", 0, 3))
+        self.assertTrue(self.cart.remove_item("Chocolate Chips"))
+        self.assertEqual(self.cart.get_totals(), (3, 567))
+        self.assertEqual([item.item_name for item in self.cart], ["Nike Romaleos"])
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertFalse(self.cart.remove_item("Missing"))
+            self.assertFalse(self.cart.modify_item(ItemToPurchase("Missing", 0, 1)))
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = old_stdout
+        self.assertIn("Nothing removed.", output)
+        self.assertIn("Nothing modified.", output)
+
+    def test_rename_keeps_order_and_rejects_duplicates(self):
+        """Test renaming items in a concurrent cart"""
+        self.cart.find_item("Nike Romaleos").item_name = "Romaleos 4"
+        self.assertEqual([item.item_name for item in self.cart], ["Romaleos 4", "Chocolate Chips"])
+        with self.assertRaises(ValueError):
+            self.cart.find_item("Romaleos 4").item_name = "Chocolate Chips"
+
+    def test_adjust_quantity(self):
+        """Test atomic quantity changes"""
+        self.assertEqual(self.cart.adjust_quantity("Chocolate Chips", -2), 3)
+        self.assertIsNone(self.cart.adjust_quantity("Missing", 1))
+        self.assertEqual(self.cart.get_num_items_in_cart(), 5)
+
+    def test_snapshot_is_copied_only_after_changes(self):
+        """Test that iteration reuses the line snapshot until the cart changes"""
+        first = self.cart._lines()
+        self.assertIs(self.cart._lines(), first)
+        self.cart.add_item(ItemToPurchase("Socks", 4, 1))
+        self.assertEqual(len(self.cart._lines()), 3)
+
+    def test_concurrent_stress(self):
+        """Test many writer threads and a reader thread on one cart"""
+        cart = ConcurrentShoppingCart()
+        threads_count = 8
+        rounds = 300
+        errors = []
+        done = threading.Event()
+
+        def writer(number):
+            try:
+                for i in range(rounds):
+                    own = f"Item {number}-{i}"
+                    cart.add_item(ItemToPurchase(own, 1.25, 2))
+                    cart.add_item(ItemToPurchase("Shared", 2, 1))
+                    cart.adjust_quantity("Shared", 1)
+                    cart.modify_items([ItemToPurchase(own, 3, 4)])
+                    if i % 2:
+                        cart.remove_items([own])
+            except Exception as error:
+                errors.append(error)
+
+        def reader():
+            try:
+                while not done.is_set():
+                    quantity, cost = cart.get_totals()
+                    self.assertGreaterEqual(quantity, 0)
+                    self.assertGreaterEqual(cost.cents, 0)
+                    for item in cart:
+                        item.item_name
+            except Exception as error:
+                errors.append(error)
+
+        # Switch threads often so that unsafe interleavings would show up
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            reader_thread = threading.Thread(target=reader)
+            reader_thread.start()
+            writers = [threading.Thread(target=writer, args=(n,)) for n in range(threads_count)]
+            for thread in writers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+            done.set()
+            reader_thread.join()
+        finally:
+            sys.setswitchinterval(old_interval)
+
+        self.assertEqual(errors, [])
+        kept = threads_count * rounds // 2
+        self.assertEqual(len(cart), kept + 1)
+        self.assertEqual(cart.find_item("Shared").item_quantity, threads_count * rounds * 2)
+        self.assertEqual(cart.get_num_items_in_cart(), kept * 4 + threads_count * rounds * 2)
+        self.assert_totals_match_lines(cart)
+
+    def test_direct_writes_and_modify(self):
+        """Test direct attribute writes racing modify_item and adjust_quantity on one line"""
+        cart = ConcurrentShoppingCart()
+        cart.add_item(ItemToPurchase("Shared", 1, 1))
+        item = cart.find_item("Shared")
+        rounds = 20_000
+
+        def write_prices():
+            for i in range(rounds):
+                item.item_price = 8 if i % 2 else 1
+
+        def write_quantities():
+            for i in range(rounds):
+                item.item_quantity = 3 if i % 2 else 1
+
+        def modify():
+            for i in range(rounds):
+                cart.modify_item(ItemToPurchase("Shared", 0, 2 if i % 2 else 1))
+                cart.adjust_quantity("Shared", 1)
+
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=target)
+                       for target in (write_prices, write_quantities, modify)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(old_interval)
+        self.assert_totals_match_lines(cart)
+
+    def test_rename_and_direct_writes(self):
+        """Test that writes racing a rename reserve stock under the line's current name"""
+        cart = ConcurrentShoppingCart()
+        inventory = Inventory()
+        inventory.stock_many({"Hat": 1000, "Cap": 1000})
+        cart.set_inventory(inventory)
+        cart.add_item(ItemToPurchase("Hat", 1, 1))
+        item = cart.find_item("Hat")
+        rounds = 5_000
+
+        def rename():
+            for i in range(rounds):
+                item.item_name = "Cap" if i % 2 == 0 else "Hat"
+
+        def write_quantities():
+            for i in range(rounds):
+                item.item_quantity = 3 if i % 2 else 1
+
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=target) for target in (rename, write_quantities)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(old_interval)
+        other = "Cap" if item.item_name == "Hat" else "Hat"
+        self.assertIs(cart.find_item(item.item_name), item)
+        self.assertEqual(inventory.held(item.item_name, cart), item.item_quantity)
+        self.assertEqual(inventory.held(other, cart), 0)
+        self.assert_totals_match_lines(cart)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import random
+import unittest
+from cart_columnar import ColumnarShoppingCart
+from cart_history import CartHistory
+from cart_inventory import Inventory
+from module8 import ItemToPurchase, OutOfStock, ShoppingCart
+from test_cart_merge import lines_of
+
+class TestCartHistory(unittest.TestCase):
+    """Test undo and redo of cart changes"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        self.history = CartHistory(self.cart)
+
+    def test_undo_remove(self):
+        """Test getting a removed item back, and redoing the removal"""
+        self.assertFalse(self.history.undo())
+        self.cart.remove_item("Nike Romaleos")
+        self.assertTrue(self.history.undo())
+        item = self.cart.find_item("Nike Romaleos")
+        self.assertEqual((str(item.item_price), item.item_quantity, item.item_description),
+                         ("189", 2, "Volt color, Weightlifting shoes"))
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+        self.assertTrue(self.history.redo())
+        self.assertNotIn("Nike Romaleos", self.cart)
+        self.assertFalse(self.history.redo())
+
+    def test_undone_removal_comes_back_last(self):
+        """Test that an undone removal adds the line back at the end"""
+        self.cart.add_item(ItemToPurchase("Hat", 20, 1, "Wool"))
+        self.cart.remove_item("Nike Romaleos")
+        self.cart.find_item("Hat").item_name = "Cap"
+        self.history.undo()
+        self.history.undo()
+        self.assertEqual([item.item_name for item in self.cart],
+                         ["Chocolate Chips", "Hat", "Nike Romaleos"])
+        self.history.redo()
+        self.assertEqual([item.item_name for item in self.cart], ["Chocolate Chips", "Hat"])
+
+    def test_failed_undo_changes_nothing(self):
+        """Test that an undo refused part way through is rolled back and kept"""
+        inventory = Inventory()
+        inventory.stock_many({"Nike Romaleos": 2, "Chocolate Chips": 5})
+        self.cart.set_inventory(inventory)
+        with self.history.step():
+            self.cart.remove_item("Nike Romaleos")
+            self.cart.remove_item("Chocolate Chips")
+        self.history.undo()
+        self.history.redo()
+        other = ShoppingCart()
+        other.set_inventory(inventory)
+        other.add_item(ItemToPurchase("Nike Romaleos", 189, 1))
+        with self.assertRaises(OutOfStock):
+            self.history.undo()
+        self.assertEqual(len(self.cart), 0)
+        self.assertEqual(inventory.held("Chocolate Chips"), 0)
+        self.assertTrue(self.history.can_undo())
+        self.assertFalse(self.history.can_redo())
+        other.remove_item("Nike Romaleos")
+        self.assertTrue(self.history.undo())
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+        self.assertTrue(self.history.redo())
+        self.assertEqual(len(self.cart), 0)
+
+    def test_undo_add_and_modify(self):
+        """Test undoing adds, quantity increases, modifications and renames"""
+        before = lines_of(self.cart)
+        self.cart.add_item(ItemToPurchase("Hat", 20, 1, "Wool"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 2, "Semi-sweet"))
+        self.cart.modify_item(ItemToPurchase("Nike Romaleos", 150, 0, "On sale"))
+        self.cart.find_item("Hat").item_name = "Cap"
+        after = lines_of(self.cart)
+        for _ in range(4):
+            self.assertTrue(self.history.undo())
+        self.assertEqual(lines_of(self.cart), before)
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+        for _ in range(4):
+            self.assertTrue(self.history.redo())
+        self.assertEqual(lines_of(self.cart), after)
+        self.history.undo()
+        self.cart.add_item(ItemToPurchase("Socks", 4, 1, "Wool"))
+        self.assertFalse(self.history.can_redo())
+
+    def test_steps_and_bounds(self):
+        """Test grouped steps, the step limit and the memory ceiling"""
+        with self.history.step():
+            self.cart.add_items(ItemToPurchase(f"Item {i}", 1, 1, "none") for i in range(50))
+            self.cart.remove_item("Nike Romaleos")
+        self.assertEqual(len(self.cart), 51)
+        self.history.undo()
+        self.assertEqual(len(self.cart), 2)
+        self.history.redo()
+        self.assertEqual(len(self.cart), 51)
+
+        history = CartHistory(self.cart, max_steps=3)
+        for i in range(5):
+            self.cart.remove_item(f"Item {i}")
+        self.assertEqual(sum(history.undo() for _ in range(5)), 3)
+        self.assertNotIn("Item 1", self.cart)
+        self.assertIn("Item 2", self.cart)
+        history.close()
+
+        history = CartHistory(self.cart, max_bytes=2000)
+        for i in range(10, 50):
+            self.cart.remove_item(f"Item {i}")
+        self.assertLessEqual(history.memory(), 2000)
+        undone = 0
+        while history.undo():
+            undone += 1
+        self.assertLess(undone, 40)
+        self.assertIn("Item 49", self.cart)
+        self.assertNotIn("Item 10", self.cart)
+        with self.history.step():
+            with self.assertRaises(RuntimeError):
+                self.history.undo()
+
+    def test_random_changes(self):
+        """Test undoing and redoing random changes on both cart layouts"""
+        rng = random.Random(23)
+        for cart in (ShoppingCart(), ColumnarShoppingCart()):
+            history = CartHistory(cart, max_steps=1000)
+            states = [lines_of(cart)]
+            for _ in range(300):
+                name = f"Item {rng.randrange(20)}"
+                action = rng.random()
+                if action < 0.4:
+                    cart.add_item(ItemToPurchase(name, rng.choice([2, 2.5]), rng.randrange(1, 4),
+                                                 rng.choice(["red", "blue"])))
+                elif action < 0.6:
+                    if not cart.remove_items([name]).applied:
+                        continue
+                elif action < 0.9:
+                    if not cart.modify_items([ItemToPurchase(name, rng.randrange(0, 9),
+                                                             rng.randrange(0, 4), "green")]).applied:
+                        continue
+                else:
+                    item = cart.find_item(name)
+                    new_name = f"Item {rng.randrange(20, 40)}"
+                    if item is None or new_name in cart:
+                        continue
+                    item.item_name = new_name
+                states.append(lines_of(cart))
+            for state in reversed(states[:-1]):
+                self.assertTrue(history.undo())
+                self.assertEqual(lines_of(cart), state)
+            self.assertFalse(history.undo())
+            for state in states[1:]:
+                self.assertTrue(history.redo())
+                self.assertEqual(lines_of(cart), state)
+
+
+if __name__ == "__main__":
+    unittest.main()
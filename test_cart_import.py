@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from cart_import import ImportResult, RowError, import_orders, import_stream, read_csv, read_jsonl, to_item
+from module8 import ShoppingCart
+
+class TestCartImport(unittest.TestCase):
+    """Test importing order files into carts"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        """Helper method writing an order file and returning its path"""
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", newline="") as file:
+            file.write(text)
+        return path
+
+    def test_csv(self):
+        """Test a CSV file with good rows, bad rows and a repeated item"""
+        path = self.write("orders.csv",
+                          "name,price,quantity,description\n"
+                          'Nike Romaleos,189,2,"Volt color, Weightlifting shoes"\n'
+                          "Chocolate Chips,3.50,5,\n"
+                          "Hat,cheap,1,Red\n"
+                          "Socks,4,-1,Wool\n"
+                          ",4,1,Nameless\n"
+                          "Nike Romaleos,189,1,ignored\n")
+        result = import_orders(self.cart, path)
+        self.assertEqual(result, ImportResult(3, 3, [
+            RowError(4, "invalid price 'cheap'"),
+            RowError(5, "invalid quantity '-1'"),
+            RowError(6, "missing item name"),
+        ]))
+        self.assertEqual(self.cart.get_num_items_in_cart(), 8)
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "584.5")
+        self.assertEqual(self.cart.find_item("Chocolate Chips").item_description, "none")
+        self.assertEqual(self.cart.find_item("Nike Romaleos").item_description,
+                         "Volt color, Weightlifting shoes")
+
+    def test_jsonl(self):
+        """Test a JSONL file, including whole-dollar prices and broken lines"""
+        lines = [
+            json.dumps({"item_name": "Nike Romaleos", "item_price": 189, "item_quantity": 2}),
+            "",
+            json.dumps({"name": "Chocolate Chips", "price": "3.5", "quantity": 5,
+                        "description": "Semi-sweet"}),
+            "{not json",
+            json.dumps(["a", "list"]),
+            json.dumps({"name": "Hat", "price": 2, "quantity": 1.5}),
+            json.dumps({"name": "Cap", "price": True, "quantity": 1}),
+        ]
+        path = self.write("orders.jsonl", "\n".join(lines) + "\n")
+        result = import_orders(self.cart, path)
+        self.assertEqual((result.imported, result.rejected), (2, 4))
+        self.assertEqual([error.line for error in result.errors], [4, 5, 6, 7])
+        self.assertTrue(result.errors[0].message.startswith("invalid JSON"))
+        self.assertEqual(str(self.cart.find_item("Nike Romaleos").item_price), "189")
+        self.assertEqual(str(self.cart.get_cost_of_cart()), "395.5")
+
+    def test_bytes_that_are_not_utf8(self):
+        """Test that a line that is not UTF-8 is a bad row and the rest are imported"""
+        rows = {"orders.csv": [b"name,price,quantity", b"Hat,2,1", b"Caf\xe9,3,1", b"Cap,4,1"],
+                "orders.jsonl": [b'{"name": "Hat", "price": 2, "quantity": 1}',
+                                 b'{"name": "Caf\xe9", "price": 3, "quantity": 1}',
+                                 b'{"name": "Cap", "price": 4, "quantity": 1}']}
+        for name, lines in rows.items():
+            cart = ShoppingCart()
+            path = os.path.join(self.directory.name, name)
+            with open(path, "wb") as file:
+                file.write(b"\n".join(lines) + b"\n")
+            result = import_orders(cart, path)
+            self.assertEqual(result, ImportResult(2, 1, [RowError(len(lines) - 1, "invalid UTF-8")]))
+            self.assertEqual([item.item_name for item in cart], ["Hat", "Cap"])
+
+    def test_streams_in_chunks(self):
+        """Test that rows reach the cart in chunks and errors are capped"""
+        chunks = []
+        add_items = self.cart.add_items
+        self.cart.add_items = lambda items: chunks.append(len(items)) or add_items(items)
+
+        def rows():
+            for number in range(1, 2501):
+                quantity = "x" if number % 5 == 0 else "1"
+                yield number, {"name": f"Item {number}", "price": "1", "quantity": quantity}
+        result = import_stream(self.cart, rows(), chunk_rows=1000, max_errors=10)
+        self.assertEqual(chunks, [1000, 1000])
+        self.assertEqual((result.imported, result.rejected, len(result.errors)), (2000, 500, 10))
+        self.assertEqual(len(self.cart), 2000)
+
+    def test_readers_and_validation(self):
+        """Test the readers and row checks on their own"""
+        self.assertEqual(list(read_csv(io.StringIO(" Item_Name ,PRICE,extra\nHat,2,x\n\nCap\n"))),
+                         [(2, {"name": "Hat", "price": "2"}), (4, {"name": "Cap"})])
+        self.assertEqual(list(read_jsonl(io.StringIO('\n{"Name": "Hat", "price": null, "x": 1}\n'))),
+                         [(2, {"name": "Hat"})])
+        self.assertEqual(list(read_csv(io.StringIO(""))), [])
+        item = to_item({"name": " Hat ", "price": "2.5", "quantity": " 3 "})
+        self.assertEqual((item.item_name, str(item.item_price), item.item_quantity, item.item_description),
+                         ("Hat", "2.5", 3, "none"))
+        with self.assertRaisesRegex(ValueError, "negative price"):
+            to_item({"name": "Hat", "price": "-2", "quantity": "1"})
+        with self.assertRaisesRegex(ValueError, "invalid price None"):
+            to_item({"name": "Hat", "quantity": "1"})
+        with self.assertRaises(ValueError):
+            import_orders(self.cart, self.write("orders.txt", ""), "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import random
+import unittest
+from cart_columnar import ColumnarShoppingCart
+from cart_indexes import CartIndex, SortedKeys, tokenize
+from module8 import ItemToPurchase, ShoppingCart
+
+class TestCartIndex(unittest.TestCase):
+    """Test the price and description indexes of a cart"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        self.cart.add_item(ItemToPurchase("Powerbeats 2 Headphones", 128, 1, "Bluetooth headphones"))
+        self.index = CartIndex(self.cart)
+
+    def names(self, items):
+        return [item.item_name for item in items]
+
+    def test_queries(self):
+        """Test top_n, price_range and search on an indexed cart"""
+        self.assertEqual(self.names(self.index.top_n(2)),
+                         ["Nike Romaleos", "Powerbeats 2 Headphones"])
+        self.assertEqual(self.names(self.index.top_n(1, by="total")), ["Nike Romaleos"])
+        self.assertEqual(self.names(self.index.top_n(10, by="total")),
+                         ["Nike Romaleos", "Powerbeats 2 Headphones", "Chocolate Chips"])
+        self.assertEqual(self.index.top_n(0), [])
+        self.assertEqual(self.names(self.index.price_range(3.5, 128)),
+                         ["Chocolate Chips", "Powerbeats 2 Headphones"])
+        self.assertEqual(self.names(self.index.price_range(low=129)), ["Nike Romaleos"])
+        self.assertEqual(self.index.price_range(4, 5), [])
+        self.assertEqual(self.names(self.index.search("HEADPHONES")), ["Powerbeats 2 Headphones"])
+        self.assertEqual(self.names(self.index.search("lifting sh")), ["Nike Romaleos"])
+        self.assertEqual(self.names(self.index.search("semi-sweet")), ["Chocolate Chips"])
+        self.assertEqual(self.index.search("shoes volt"), [])
+        self.assertEqual(self.names(self.index.search(", ")), ["Nike Romaleos"])
+        with self.assertRaises(ValueError):
+            self.index.top_n(1, by="weight")
+
+    def test_follows_changes(self):
+        """Test that adds, removes, modifications and renames update the indexes"""
+        self.cart.add_item(ItemToPurchase("Hat", 500, 1, "Wool hat"))
+        self.assertEqual(self.names(self.index.top_n(1)), ["Hat"])
+        self.cart.modify_item(ItemToPurchase("Hat", 1, 0, "Cotton cap"))
+        self.assertEqual(self.names(self.index.price_range(0, 1)), ["Hat"])
+        self.assertEqual(self.index.search("wool"), [])
+        self.assertEqual(self.names(self.index.search("cotton")), ["Hat"])
+        self.cart.find_item("Hat").item_name = "Cap"
+        self.assertEqual(self.names(self.index.search("cotton")), ["Cap"])
+        self.cart.find_item("Chocolate Chips").item_quantity = 200
+        self.assertEqual(self.names(self.index.top_n(1, by="total")), ["Chocolate Chips"])
+        self.cart.remove_items(["Cap", "Nike Romaleos"])
+        self.assertEqual(self.names(self.index.top_n(5)),
+                         ["Powerbeats 2 Headphones", "Chocolate Chips"])
+        self.assertEqual(self.index.search("cotton"), [])
+        self.index.close()
+        self.cart.remove_item("Chocolate Chips")
+        self.assertEqual(len(self.index.top_n(5)), 2)
+
+    def test_matches_full_scan(self):
+        """Test random changes against scanning and sorting the cart"""
+        rng = random.Random(19)
+        words = ["red", "green", "blue", "chair", "table", "lamp"]
+        for cart in (ShoppingCart(), ColumnarShoppingCart()):
+            index = CartIndex(cart)
+            for step in range(2000):
+                name = f"Item {rng.randrange(60)}"
+                action = rng.random()
+                if action < 0.5:
+                    cart.add_item(ItemToPurchase(name, rng.randrange(1, 40), rng.randrange(1, 4),
+                                                 " ".join(rng.sample(words, 2))))
+                elif action < 0.7:
+                    cart.remove_items([name])
+                else:
+                    cart.modify_items([ItemToPurchase(name, rng.randrange(0, 40), rng.randrange(0, 4),
+                                                      rng.choice(words + ["none"]))])
+                if step % 100 == 0:
+                    items = list(cart)
+                    by_price = sorted(items, key=lambda item: (item.item_price.cents, item.item_name))
+                    self.assertEqual(self.names(index.price_range()), self.names(by_price))
+                    self.assertEqual(self.names(index.price_range(10, 20)),
+                                     [item.item_name for item in by_price
+                                      if 10 <= item.item_price <= 20])
+                    self.assertEqual(sorted(self.names(index.search("ue ch"))),
+                                     sorted(item.item_name for item in items
+                                            if "ue ch" in item.item_description))
+
+    def test_sorted_keys(self):
+        """Test sorted keys across chunk splits and emptied chunks"""
+        class SmallChunks(SortedKeys):
+            CHUNK = 4
+        rng = random.Random(7)
+        keys = SmallChunks(rng.sample(range(100), 10))
+        expected = sorted(keys.from_key(-1))
+        for _ in range(500):
+            key = rng.randrange(100)
+            if key in expected:
+                keys.remove(key)
+                expected.remove(key)
+            else:
+                keys.add(key)
+                expected.append(key)
+                expected.sort()
+            self.assertLessEqual(max(map(len, keys._chunks), default=0), 4)
+        self.assertEqual(len(keys), len(expected))
+        self.assertEqual(list(keys.from_key(-1)), expected)
+        self.assertEqual(list(keys.largest()), expected[::-1])
+        self.assertEqual(list(keys.from_key(50)), [key for key in expected if key >= 50])
+
+    def test_tokenize(self):
+        """Test splitting descriptions into words"""
+        self.assertEqual(tokenize("Volt color, Weightlifting shoes"),
+                         {"volt", "color", "weightlifting", "shoes"})
+        self.assertEqual(tokenize(""), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+import io
+import threading
+import unittest
+from cart_catalog import CatalogShoppingCart
+from cart_columnar import ColumnarShoppingCart
+from cart_concurrent import ConcurrentShoppingCart
+from cart_inventory import Inventory, OutOfStock
+from module8 import ItemToPurchase, ShoppingCart, run_batch
+
+class FakeClock:
+    """Clock that moves only when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCartInventory(unittest.TestCase):
+    """Test stock reservations made by carts"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.clock = FakeClock()
+        self.inventory = Inventory(ttl=60, clock=self.clock)
+        self.inventory.stock_many({"Nike Romaleos": 5, "Chocolate Chips": 20})
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.cart.set_inventory(self.inventory)
+
+    def test_reserve_through_cart(self):
+        """Test that adds and changes hold stock, and refused ones change nothing"""
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 1)
+        with self.assertRaises(OutOfStock) as caught:
+            self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2))
+        self.assertEqual(caught.exception.shortages, {"Nike Romaleos": 5})
+        with self.assertRaises(OutOfStock):
+            self.cart.add_item(ItemToPurchase("Hat", 20, 1))
+        self.assertEqual(self.cart.get_num_items_in_cart(), 4)
+        self.assertNotIn("Hat", self.cart)
+        self.assertTrue(self.cart.modify_item(ItemToPurchase("Nike Romaleos", 0, 1)))
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 4)
+        self.cart.remove_item("Nike Romaleos")
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 5)
+
+        output = io.StringIO()
+        run_batch(self.cart, ["a", "Chocolate Chips", "Semi-sweet", "3.50", "25",
+                              "a", "Chocolate Chips", "Semi-sweet", "3.50", "5",
+                              "c", "Chocolate Chips", "21", "q"], output)
+        self.assertEqual(output.getvalue(),
+                         "Not enough stock: Chocolate Chips (20 available). Nothing added.\n"
+                         "Not enough stock: Chocolate Chips (20 available). Nothing modified.\n")
+        self.assertEqual(self.inventory.held("Chocolate Chips", self.cart), 5)
+
+    def test_batches(self):
+        """Test that batches are reserved all or nothing"""
+        with self.assertRaises(OutOfStock) as caught:
+            self.cart.add_items([ItemToPurchase("Nike Romaleos", 189, 3),
+                                 ItemToPurchase("Chocolate Chips", 3.5, 10),
+                                 ItemToPurchase("Nike Romaleos", 189, 3)])
+        self.assertEqual(caught.exception.shortages, {"Nike Romaleos": 5})
+        self.assertEqual(len(self.cart), 0)
+        self.assertEqual(self.inventory.held("Chocolate Chips"), 0)
+        self.cart.add_items([ItemToPurchase("Nike Romaleos", 189, 2),
+                             ItemToPurchase("Chocolate Chips", 3.5, 10)])
+        with self.assertRaises(OutOfStock):
+            self.cart.modify_items([ItemToPurchase("Chocolate Chips", 0, 1),
+                                    ItemToPurchase("Nike Romaleos", 0, 6)])
+        self.assertEqual(self.cart.find_item("Chocolate Chips").item_quantity, 10)
+        self.assertEqual(self.cart.modify_items([ItemToPurchase("Chocolate Chips", 0, 1),
+                                                 ItemToPurchase("Hat", 0, 1)]).missing, ["Hat"])
+        self.assertEqual(self.inventory.available("Chocolate Chips"), 19)
+        self.cart.set_inventory(None)
+        self.assertEqual(self.inventory.held("Chocolate Chips"), 0)
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 100))
+        with self.assertRaises(OutOfStock):
+            self.cart.set_inventory(self.inventory)
+
+    def test_expiry_and_checkout(self):
+        """Test that abandoned holds expire and that checkout sells what is held"""
+        other = ShoppingCart()
+        other.set_inventory(self.inventory)
+        other.add_item(ItemToPurchase("Nike Romaleos", 189, 4))
+        self.clock.now = 30
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 1))
+        for i in range(200):
+            self.clock.now = 30 + i / 100
+            self.cart.modify_item(ItemToPurchase("Nike Romaleos", 0, 1))
+        self.clock.now = 62
+        self.assertEqual(self.inventory.release_expired(), 1)
+        self.assertEqual(self.inventory.held("Nike Romaleos"), 1)
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 4)
+        self.assertLess(sum(len(stripe.deadlines) for stripe in self.inventory._stripes), 100)
+        self.cart.modify_item(ItemToPurchase("Nike Romaleos", 0, 3))
+        with self.assertRaises(OutOfStock):
+            self.inventory.checkout(other)
+        self.inventory.checkout(self.cart)
+        self.assertEqual(self.inventory.on_hand("Nike Romaleos"), 2)
+        self.assertEqual(self.inventory.held("Nike Romaleos"), 0)
+        other.modify_item(ItemToPurchase("Nike Romaleos", 0, 2))
+        self.inventory.checkout(other)
+        self.assertEqual(self.inventory.on_hand("Nike Romaleos"), 0)
+        self.clock.now = 1000
+        self.assertEqual(self.inventory.release_expired(), 0)
+
+    def test_cart_layouts(self):
+        """Test reservations, renames and direct quantity changes on each cart layout"""
+        for cart in (ColumnarShoppingCart(), CatalogShoppingCart(), ConcurrentShoppingCart()):
+            inventory = Inventory()
+            inventory.stock_many({"Hat": 3, "Cap": 3})
+            cart.set_inventory(inventory)
+            cart.add_item(ItemToPurchase("Hat", 20, 2, "Wool"))
+            with self.assertRaises(OutOfStock):
+                cart.add_item(ItemToPurchase("Hat", 20, 2, "Wool"))
+            with self.assertRaises(OutOfStock):
+                cart.modify_item(ItemToPurchase("Hat", 0, 4))
+            with self.assertRaises(OutOfStock):
+                cart.add_items([ItemToPurchase("Cap", 15, 1), ItemToPurchase("Hat", 20, 2)])
+            self.assertEqual((len(cart), cart.get_num_items_in_cart()), (1, 2))
+            name = "Hat"
+            if not isinstance(cart, CatalogShoppingCart):  # catalog lines cannot be renamed
+                cart.find_item("Hat").item_name = name = "Cap"
+                self.assertEqual((inventory.held("Hat"), inventory.held("Cap")), (0, 2))
+            # Quantities written straight to the item are reserved like any other
+            with self.assertRaises(OutOfStock):
+                cart.find_item(name).item_quantity = 5
+            self.assertEqual((cart.find_item(name).item_quantity, inventory.held(name)), (2, 2))
+            cart.find_item(name).item_quantity = 3
+            self.assertEqual(inventory.available(name), 0)
+            cart.remove_items([name])
+            self.assertEqual((inventory.available("Hat"), inventory.available("Cap")), (3, 3))
+
+    def test_direct_writes_and_renames(self):
+        """Test that direct quantity writes and renames are refused past the stock"""
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2))
+        item = self.cart.find_item("Nike Romaleos")
+        with self.assertRaises(OutOfStock):
+            item.item_quantity = 50
+        with self.assertRaises(OutOfStock):
+            item.item_quantity += 4
+        self.assertEqual((item.item_quantity, self.cart.get_num_items_in_cart()), (2, 2))
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 3)
+        item.item_quantity = 1
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 4)
+        self.inventory.stock("Shoes", 0)
+        with self.assertRaises(OutOfStock):
+            item.item_name = "Shoes"
+        self.assertEqual(item.item_name, "Nike Romaleos")
+        self.assertEqual(self.inventory.held("Nike Romaleos"), 1)
+
+    def test_batch_keeps_its_hold(self):
+        """Test that a batch naming an item twice holds the total until it is done"""
+        for cart_class in (ShoppingCart, ColumnarShoppingCart, CatalogShoppingCart,
+                           ConcurrentShoppingCart):
+            inventory = Inventory()
+            inventory.stock("Hat", 7)
+            cart = cart_class()
+            cart.set_inventory(inventory)
+            other = ShoppingCart()
+            other.set_inventory(inventory)
+            refused = []
+
+            def grab(cart, event, item, changes):
+                # Another shopper tries for the stock while the batch is half done
+                try:
+                    other.add_item(ItemToPurchase("Hat", 20, 4))
+                except OutOfStock:
+                    refused.append(item.item_name)
+            cart.add_listener(grab)
+            cart.add_items([ItemToPurchase("Hat", 20, 3), ItemToPurchase("Hat", 20, 4)])
+            self.assertTrue(refused)
+            self.assertEqual(cart.get_num_items_in_cart(), 7)
+            self.assertEqual((inventory.held("Hat", cart), inventory.available("Hat")), (7, 0))
+
+    def test_merge(self):
+        """Test that a merge is reserved all or nothing before it is made"""
+        from cart_merge import merge
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 3))
+        guest = ShoppingCart()
+        guest.add_item(ItemToPurchase("Nike Romaleos", 189, 4))
+        guest.add_item(ItemToPurchase("Chocolate Chips", 3.5, 2))
+        with self.assertRaises(OutOfStock) as caught:
+            merge(self.cart, guest)
+        self.assertEqual(caught.exception.shortages, {"Nike Romaleos": 5})
+        self.assertEqual([(item.item_name, item.item_quantity) for item in self.cart],
+                         [("Nike Romaleos", 3)])
+        self.assertEqual(self.inventory.available("Nike Romaleos"), 2)
+        self.assertEqual(self.inventory.held("Chocolate Chips"), 0)
+        merge(self.cart, guest, policy="max")
+        self.assertEqual((self.inventory.available("Nike Romaleos"),
+                          self.inventory.available("Chocolate Chips")), (1, 18))
+
+    def test_concurrent_carts(self):
+        """Test that carts on several threads never hold more than the stock"""
+        inventory = Inventory()
+        inventory.stock_many({"Nike Romaleos": 500, "Chocolate Chips": 300})
+        carts = [ConcurrentShoppingCart() for _ in range(8)]
+        for cart in carts:
+            cart.set_inventory(inventory)
+
+        def shop(cart):
+            for name in ("Nike Romaleos", "Chocolate Chips") * 200:
+                try:
+                    cart.add_item(ItemToPurchase(name, 1, 1))
+                except OutOfStock:
+                    pass
+        threads = [threading.Thread(target=shop, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for name, stock in (("Nike Romaleos", 500), ("Chocolate Chips", 300)):
+            in_carts = sum(cart.find_item(name).item_quantity for cart in carts if name in cart)
+            self.assertEqual(in_carts, stock)
+            self.assertEqual(inventory.held(name), stock)
+            self.assertEqual(inventory.available(name), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
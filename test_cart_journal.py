@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from cart_columnar import ColumnarShoppingCart
+from cart_journal import CartJournal, JournalError, open_cart, read_journal
+from module8 import ItemToPurchase, ShoppingCart
+
+def snapshot_of(cart):
+    """Returns the contents of a cart as a comparable list"""
+    return [(item.item_name, str(item.item_price), item.item_quantity, item.item_description)
+            for item in cart]
+
+
+class TestJournal(unittest.TestCase):
+    """Test journaling and recovering carts"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.directory.name, "cart.journal")
+        self.snapshot_path = os.path.join(self.directory.name, "cart.snap")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_changes(self, cart):
+        """Applies one of every kind of change to a cart"""
+        cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        cart.add_item(ItemToPurchase("Powerbeats", 128, 1, "Bluetooth headphones"))
+        cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 1))
+        cart.modify_item(ItemToPurchase("Nike Romaleos", 200.25, 0, "Black"))
+        cart.remove_item("Powerbeats")
+        cart.find_item("Chocolate Chips").item_name = "Dark Chips"
+        cart.add_items([ItemToPurchase(f"Item {i}", i, i) for i in range(1, 4)])
+        cart.remove_items(["Item 2", "Missing"])
+
+    def test_replay_rebuilds_cart(self):
+        """Test that replaying the journal gives back the same cart"""
+        cart, journal = open_cart(self.journal_path, customer_name="John Doe",
+                                  current_date="May 11, 2025")
+        self.make_changes(cart)
+        journal.close()
+        recovered, journal = open_cart(self.journal_path)
+        journal.close()
+        self.assertEqual(recovered.customer_name, "John Doe")
+        self.assertEqual(snapshot_of(recovered), snapshot_of(cart))
+        self.assertEqual(recovered.get_cost_of_cart(), cart.get_cost_of_cart())
+
+    def test_checkpoint_and_replay(self):
+        """Test recovering from a snapshot plus the records written after it"""
+        cart, journal = open_cart(self.journal_path, self.snapshot_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        journal.checkpoint(self.snapshot_path)
+        self.assertEqual(read_journal(self.journal_path)[3], [])
+        cart.add_item(ItemToPurchase("B", 2, 2))
+        cart.modify_item(ItemToPurchase("A", 0, 5))
+        journal.close()
+        recovered, journal = open_cart(self.journal_path, self.snapshot_path,
+                                       cart_class=ColumnarShoppingCart)
+        self.assertEqual(journal.seq, 3)
+        journal.close()
+        self.assertEqual(snapshot_of(recovered), snapshot_of(cart))
+
+    def test_records_before_snapshot_are_skipped(self):
+        """Test a crash between writing the snapshot and emptying the journal"""
+        cart, journal = open_cart(self.journal_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        cart.add_item(ItemToPurchase("B", 1, 1))
+        journal.flush()
+        from cart_snapshot import save_cart
+        save_cart(cart, self.snapshot_path, stamp=journal.seq)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        journal.close()
+        recovered, journal = open_cart(self.journal_path, self.snapshot_path)
+        journal.close()
+        self.assertEqual(recovered.find_item("A").item_quantity, 2)
+
+    def test_crash_during_checkpoint(self):
+        """Test recovering a snapshot whose journal is missing, empty or header-only"""
+        cart, journal = open_cart(self.journal_path, self.snapshot_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        cart.add_item(ItemToPurchase("B", 2, 2))
+        journal.checkpoint(self.snapshot_path)
+        journal.close()
+        self.assertFalse(os.path.exists(self.journal_path + ".tmp"))
+        with open(self.journal_path, "rb") as file:
+            header_only = file.read()
+        for contents in (None, b"", header_only[:10], header_only):
+            if contents is None:
+                os.remove(self.journal_path)
+            else:
+                with open(self.journal_path, "wb") as file:
+                    file.write(contents)
+            recovered, journal = open_cart(self.journal_path, self.snapshot_path)
+            self.assertEqual(snapshot_of(recovered), snapshot_of(cart))
+            recovered.add_item(ItemToPurchase("C", 3, 3))
+            journal.close()
+            recovered, journal = open_cart(self.journal_path, self.snapshot_path)
+            journal.close()
+            self.assertEqual([item.item_name for item in recovered], ["A", "B", "C"])
+
+    def test_torn_tail_is_ignored_and_cut(self):
+        """Test that a half-written last record is dropped"""
+        cart, journal = open_cart(self.journal_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        cart.add_item(ItemToPurchase("B", 1, 1))
+        journal.close()
+        with open(self.journal_path, "r+b") as file:
+            file.truncate(os.path.getsize(self.journal_path) - 3)
+        recovered, journal = open_cart(self.journal_path)
+        recovered.add_item(ItemToPurchase("C", 1, 1))
+        journal.close()
+        recovered, journal = open_cart(self.journal_path)
+        journal.close()
+        self.assertEqual([item.item_name for item in recovered], ["A", "C"])
+
+    def test_group_commit(self):
+        """Test that records wait in memory until a commit"""
+        cart = ShoppingCart()
+        journal = CartJournal(cart, self.journal_path, background=False, max_pending=3)
+        size = os.path.getsize(self.journal_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        cart.add_item(ItemToPurchase("B", 1, 1))
+        self.assertEqual(os.path.getsize(self.journal_path), size)
+        cart.add_item(ItemToPurchase("C", 1, 1))
+        self.assertGreater(os.path.getsize(self.journal_path), size)
+        journal.close()
+
+    def test_missing_snapshot_after_checkpoint(self):
+        """Test that a checkpointed journal without its snapshot is refused"""
+        cart, journal = open_cart(self.journal_path, self.snapshot_path)
+        cart.add_item(ItemToPurchase("A", 1, 1))
+        journal.checkpoint(self.snapshot_path)
+        journal.close()
+        os.remove(self.snapshot_path)
+        with self.assertRaises(JournalError):
+            open_cart(self.journal_path, self.snapshot_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import random
+import unittest
+from cart_columnar import ColumnarShoppingCart
+from cart_merge import Changeset, ChangesetError, diff, merge, merge_changes
+from module8 import ItemToPurchase, ShoppingCart
+
+def lines_of(cart):
+    """Returns the lines of a cart as a comparable dictionary"""
+    return {item.item_name: (item.item_price.cents, item.item_price.whole, item.item_quantity,
+                             item.item_description) for item in cart}
+
+
+class TestCartMerge(unittest.TestCase):
+    """Test diffing and merging carts"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.account = ShoppingCart("John Doe", "May 11, 2025")
+        self.account.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.account.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        self.guest = ShoppingCart("Guest", "May 11, 2025")
+        self.guest.add_item(ItemToPurchase("Chocolate Chips", 3.5, 8, "Semi-sweet"))
+        self.guest.add_item(ItemToPurchase("Powerbeats 2 Headphones", 128, 1, "Bluetooth headphones"))
+
+    def test_merge_policies(self):
+        """Test the quantity of a line in both carts under each policy"""
+        for policy, quantity in (("sum", 13), ("max", 8), ("prefer-left", 5),
+                                 (lambda left, right: right, 8)):
+            account = ShoppingCart()
+            account.add_items(self.account)
+            changeset = merge(account, self.guest, policy)
+            self.assertEqual(account.find_item("Chocolate Chips").item_quantity, quantity)
+            self.assertEqual(account.find_item("Powerbeats 2 Headphones").item_quantity, 1)
+            self.assertEqual(account.find_item("Nike Romaleos").item_quantity, 2)
+            self.assertEqual(changeset.counts(),
+                             {"add": 1, "remove": 0, "update": int(quantity != 5)})
+        self.assertEqual(len(self.guest), 2)
+        with self.assertRaises(ValueError):
+            merge_changes(self.account, self.guest, "min")
+
+    def test_replay_elsewhere(self):
+        """Test replaying a merge's serialized changeset on a copy of the target"""
+        replica = ColumnarShoppingCart()
+        replica.add_items(self.account)
+        data = merge(self.account, self.guest).to_bytes()
+        Changeset.from_bytes(data).apply(replica)
+        self.assertEqual(lines_of(replica), lines_of(self.account))
+        self.assertEqual(replica.get_cost_of_cart(), self.account.get_cost_of_cart())
+
+    def test_diff_matches_random_carts(self):
+        """Test that applying a diff turns one random cart into the other"""
+        rng = random.Random(22)
+        for cart_class in (ShoppingCart, ColumnarShoppingCart):
+            for _ in range(20):
+                carts = []
+                for _ in range(2):
+                    cart = cart_class()
+                    for index in rng.sample(range(40), rng.randrange(30)):
+                        price = rng.choice([rng.randrange(1, 5), rng.randrange(100, 500) / 100])
+                        cart.add_item(ItemToPurchase(f"Item {index}", price, rng.randrange(1, 4),
+                                                     rng.choice(["red", "blue"])))
+                    carts.append(cart)
+                old, new = carts
+                changeset = Changeset.from_bytes(diff(old, new).to_bytes())
+                changeset.apply(old)
+                self.assertEqual(lines_of(old), lines_of(new))
+                self.assertEqual(old.get_cost_of_cart(), new.get_cost_of_cart())
+                self.assertEqual(str(old.get_cost_of_cart()), str(new.get_cost_of_cart()))
+                self.assertEqual(len(diff(old, new)), 0)
+
+    def test_errors(self):
+        """Test corrupt changesets and changes that do not fit the cart"""
+        data = diff(self.account, self.guest).to_bytes()
+        with self.assertRaisesRegex(ChangesetError, "not a changeset"):
+            Changeset.from_bytes(b"XXXX" + data[4:])
+        with self.assertRaisesRegex(ChangesetError, "truncated"):
+            Changeset.from_bytes(data[:-3])
+        with self.assertRaisesRegex(ChangesetError, "too short"):
+            Changeset.from_bytes(b"CS")
+        with self.assertRaises(ChangesetError):
+            diff(self.account, self.guest).apply(ShoppingCart())
+
+
+if __name__ == "__main__":
+    unittest.main()
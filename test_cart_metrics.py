@@ -0,0 +1,98 @@
+import io
+import json
+import unittest
+import cart_metrics
+import module8
+from cart_columnar import ColumnarShoppingCart
+from cart_metrics import CartMetrics
+from module8 import ItemToPurchase, ShoppingCart, run_batch
+
+class TestCartMetrics(unittest.TestCase):
+    """Test opt-in instrumentation of cart operations"""
+
+    def setUp(self):
+        """Record into a fresh CartMetrics for each test"""
+        self.metrics = cart_metrics.enable(CartMetrics())
+        self.addCleanup(cart_metrics.disable)
+
+    def test_disable_restores_originals(self):
+        """Test that nothing stays wrapped once metrics are off"""
+        cart_metrics.disable()
+        self.assertFalse(cart_metrics.enabled())
+        self.assertNotIn("__wrapped__", vars(ShoppingCart.add_item))
+        self.assertNotIn("__wrapped__", vars(ColumnarShoppingCart.remove_item))
+        self.assertIs(module8.MENU_COMMANDS['r'][2], module8.remove_command)
+        self.assertNotIn("__wrapped__", vars(module8.invalid_command))
+
+    def test_calls_misses_and_gauges(self):
+        """Test counting calls and misses of cart methods"""
+        for cart in (ShoppingCart(), ColumnarShoppingCart()):
+            cart.add_item(ItemToPurchase("Hat", 2, 1))
+            cart.add_items([ItemToPurchase("Socks", 3, 2), ItemToPurchase("Scarf", 5, 1)])
+            cart.remove_items(["Socks", "Gloves", "Boots"])
+            cart.get_cost_of_cart()
+        operations = self.metrics.snapshot()["operations"]
+        self.assertEqual(operations["add_item"]["calls"], 2)
+        self.assertEqual(operations["remove_items"]["misses"], 4)
+        self.assertEqual(operations["get_cost_of_cart"]["calls"], 2)
+        self.assertEqual(operations["add_items"]["latency_buckets"][-1], [None, 2])
+        self.assertEqual(self.metrics.snapshot()["gauges"], {"cart_lines": 2, "cart_lines_max": 3})
+
+    def test_menu_commands(self):
+        """Test counting menu commands, failures and invalid options"""
+        cart = ShoppingCart()
+        run_batch(cart, ["a", "Hat", "Red", "2", "1", "r", "Gloves", "c", "Hat", "3", "x", "z"],
+                  io.StringIO())
+        operations = self.metrics.snapshot()["operations"]
+        self.assertEqual(operations["menu_a"]["calls"], 1)
+        self.assertEqual(operations["menu_r"]["misses"], 1)
+        self.assertEqual(operations["menu_c"]["misses"], 0)
+        self.assertEqual(operations["menu_invalid"]["misses"], 2)
+        self.assertEqual(operations["remove_item"]["misses"], 1)
+
+    def test_failing_commands(self):
+        """Test that commands that raise or run out of stock count as failed calls"""
+        from cart_inventory import Inventory
+        inventory = Inventory()
+        inventory.stock("Hat", 2)
+        cart = ShoppingCart()
+        cart.set_inventory(inventory)
+        output = io.StringIO()
+        run_batch(cart, ["a", "Hat", "Red", "abc", "1",
+                         "a", "Hat", "Red", "2", "5",
+                         "a", "Hat", "Red", "2", "1",
+                         "c", "Hat", "lots",
+                         "c", "Hat", "9"], output)
+        self.assertEqual(output.getvalue().count("Error: "), 2)
+        operations = self.metrics.snapshot()["operations"]
+        self.assertEqual((operations["menu_a"]["calls"], operations["menu_a"]["misses"]), (3, 2))
+        self.assertEqual((operations["menu_c"]["calls"], operations["menu_c"]["misses"]), (2, 2))
+        self.assertEqual((operations["add_item"]["calls"], operations["add_item"]["misses"]), (2, 1))
+        self.assertEqual((operations["modify_item"]["calls"], operations["modify_item"]["misses"]),
+                         (1, 1))
+
+    def test_server_invalid_option(self):
+        """Test that the server counts invalid options like the menu does"""
+        from cart_server import run_command
+        self.assertEqual(run_command(ShoppingCart(), 'x', []), "Invalid option. Please try again.\n")
+        operations = self.metrics.snapshot()["operations"]
+        self.assertEqual(operations["menu_invalid"]["calls"], 1)
+        self.assertEqual(operations["menu_invalid"]["misses"], 1)
+
+    def test_exports(self):
+        """Test the text dump and the JSON snapshot"""
+        cart = ShoppingCart()
+        cart.add_item(ItemToPurchase("Hat", 2, 1))
+        text = self.metrics.dump_text()
+        self.assertIn('cart_calls_total{operation="add_item"} 1\n', text)
+        self.assertIn('cart_latency_seconds_bucket{operation="add_item",le="+Inf"} 1\n', text)
+        self.assertIn("cart_lines 1\n", text)
+        self.assertEqual(json.loads(self.metrics.to_json()), self.metrics.snapshot())
+        self.metrics.reset()
+        cart.remove_item("Hat")
+        self.assertEqual(self.metrics.snapshot()["operations"]["remove_item"]["calls"], 1)
+        self.assertEqual(self.metrics.snapshot()["operations"]["add_item"]["calls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import unittest
+from unittest import mock
+import cart_numpy
+from cart_columnar import ColumnarShoppingCart
+from cart_numpy import NumpyShoppingCart, line_totals, recompute_totals, render_total, totals_where
+from cart_render import render_total as render_total_plain
+from module8 import ItemToPurchase, ShoppingCart
+from money import Money
+
+class VectorTotalsChecks:
+    """Checks run with and without NumPy; subclasses pick the path"""
+
+    def make_carts(self):
+        """Helper method building the same lines in each cart layout"""
+        carts = [ShoppingCart("John Doe", "May 11, 2025"),
+                 ColumnarShoppingCart("John Doe", "May 11, 2025"),
+                 NumpyShoppingCart("John Doe", "May 11, 2025")]
+        for cart in carts:
+            cart.add_items(ItemToPurchase(f"Item {i}", 1 + i % 7, 1 + i % 3, "d") for i in range(50))
+            cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+            cart.remove_items([f"Item {i}" for i in range(0, 50, 4)])
+            cart.modify_item(ItemToPurchase("Item 5", 0, 9))
+        return carts
+
+    def test_recompute_totals_matches_running_totals(self):
+        """Test that vectorized totals equal the cart's own totals"""
+        for cart in self.make_carts():
+            quantity, cost = recompute_totals(cart)
+            self.assertEqual(quantity, cart.get_num_items_in_cart())
+            self.assertEqual(cost, cart.get_cost_of_cart())
+            self.assertEqual(str(cost), str(cart.get_cost_of_cart()))
+
+    def test_line_totals(self):
+        """Test the extended price of every line, in cart order"""
+        for cart in self.make_carts():
+            expected = [(item.item_price * item.item_quantity).cents for item in cart]
+            self.assertEqual(list(line_totals(cart)), expected)
+
+    def test_totals_where(self):
+        """Test sums over a price range"""
+        for cart in self.make_carts():
+            for low, high in ((None, None), (4, None), (None, 3.5), (2, 5), (100, None)):
+                matching = [item for item in cart
+                            if (low is None or item.item_price >= Money(low))
+                            and (high is None or item.item_price <= Money(high))]
+                quantity, cost = totals_where(cart, low, high)
+                self.assertEqual(quantity, sum(item.item_quantity for item in matching))
+                self.assertEqual(cost.cents, sum((item.item_price * item.item_quantity).cents
+                                                 for item in matching))
+
+    def test_render_total_matches_plain_report(self):
+        """Test that the vectorized report is identical to print_total's"""
+        for cart in self.make_carts():
+            self.assertEqual("".join(render_total(cart)), "".join(render_total_plain(cart)))
+        buffer = io.StringIO()
+        cart.print_total(buffer)
+        self.assertEqual(buffer.getvalue(), "".join(render_total_plain(cart)))
+        empty = NumpyShoppingCart()
+        self.assertEqual("".join(render_total(empty)), "".join(render_total_plain(empty)))
+
+
+class TestPurePythonPath(VectorTotalsChecks, unittest.TestCase):
+    """Test the fallback used when NumPy is not installed"""
+
+    def setUp(self):
+        """Hide NumPy for the duration of each test"""
+        patcher = mock.patch.object(cart_numpy, "numpy", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(cart_numpy.numpy is None, "NumPy is not installed")
+class TestNumpyPath(VectorTotalsChecks, unittest.TestCase):
+    """Test the vectorized path"""
+
+    def test_huge_products_fall_back_to_python_integers(self):
+        """Test that sums which could overflow int64 stay exact"""
+        cart = NumpyShoppingCart()
+        cart.add_item(ItemToPurchase("Yacht", 10 ** 12, 10 ** 6))
+        cart.add_item(ItemToPurchase("Jet", 10 ** 12, 10 ** 6))
+        self.assertEqual(recompute_totals(cart)[1], cart.get_cost_of_cart())
+
+    def test_cart_can_grow_after_vector_calls(self):
+        """Test that no NumPy view keeps the columns from growing"""
+        cart = NumpyShoppingCart()
+        cart.add_item(ItemToPurchase("Hat", 2, 1))
+        recompute_totals(cart)
+        totals_where(cart, 1)
+        cart.add_item(ItemToPurchase("Socks", 3, 1))
+        self.assertEqual(list(line_totals(cart)), [200, 300])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import io
+import random
+import unittest
+from cart_catalog import Catalog, CatalogShoppingCart
+from cart_columnar import ColumnarShoppingCart
+from cart_pricing import (BuyXGetY, CartPricing, Coupon, LineRule, PercentOff, PricingEngine, Tax,
+                          TieredDiscount)
+from module8 import ItemToPurchase, ShoppingCart
+
+def full_discount(engine, cart):
+    """Returns the cents off every line of a cart, priced from scratch"""
+    return sum(cents for item in cart
+               for _, cents in engine.price_line(item.item_name, item.item_price.cents,
+                                                 item.item_quantity))
+
+
+class TestCartPricing(unittest.TestCase):
+    """Test promotions, coupons and tax on a cart"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        self.engine = PricingEngine([
+            PercentOff(10, ["Nike Romaleos"]),
+            BuyXGetY(2, 1, ["Chocolate Chips"]),
+            Coupon("SAVE5", amount=5, minimum=100),
+            Tax(7),
+        ])
+
+    def test_line_rules(self):
+        """Test each kind of line rule, stacking and the cap at the line's cost"""
+        self.assertEqual(PercentOff(10).discount(189_00, 2), 37_80)
+        self.assertEqual(PercentOff(12.5).discount(1, 1), 0)
+        self.assertEqual(PercentOff(50).discount(1, 1), 1)
+        tiers = TieredDiscount([(10, 5), (5, 2), (50, 10)])
+        self.assertEqual([tiers.discount(100, quantity) for quantity in (4, 5, 10, 49, 50)],
+                         [0, 10, 50, 245, 500])
+        self.assertEqual(BuyXGetY(2, 1).discount(350, 5), 350)
+        self.assertEqual(BuyXGetY(2, 1).discount(350, 6), 700)
+        engine = PricingEngine([PercentOff(60), PercentOff(60, ["Hat"], "hat sale")])
+        self.assertEqual(engine.price_line("Hat", 1000, 1), (("60% off", 600), ("hat sale", 400)))
+        self.assertEqual(engine.price_line("Socks", 1000, 1), (("60% off", 600),))
+        self.assertEqual(PricingEngine([PercentOff(5, ["Hat"])]).price_line("Socks", 1000, 1), ())
+        self.assertEqual(PricingEngine([PercentOff(10, ["Hat", "Hat"])]).price_line("Hat", 1000, 1),
+                         (("10% off", 100),))
+        with self.assertRaises(TypeError):
+            LineRule()
+        for bad in (lambda: PercentOff(150), lambda: PercentOff("abc"), lambda: BuyXGetY(0, 1),
+                    lambda: Coupon("X"), lambda: Coupon("X", amount=1, percent=5)):
+            with self.assertRaises(ValueError):
+                bad()
+
+    def test_breakdown(self):
+        """Test the itemized breakdown and the report print_total prints"""
+        self.cart.set_pricing(self.engine)
+        breakdown = self.cart.pricing()
+        self.assertEqual(str(breakdown.subtotal), "395.5")
+        self.assertEqual([(name, label, str(amount)) for name, label, amount in breakdown.line_discounts],
+                         [("Nike Romaleos", "10% off", "37.8"),
+                          ("Chocolate Chips", "buy 2 get 1 free", "3.5")])
+        self.assertEqual([(label, str(amount)) for label, amount in breakdown.adjustments],
+                         [("Coupon SAVE5", "-5.0"), ("Tax 7%", "24.44")])
+        self.assertEqual(str(breakdown.total), "373.64")
+        output = io.StringIO()
+        self.cart.print_total(output)
+        self.assertEqual(output.getvalue(),
+                         "John Doe's Shopping Cart - May 11, 2025\n"
+                         "Number of Items: 7\n\n"
+                         "Nike Romaleos 2 @ $189 = $378\n"
+                         "Chocolate Chips 5 @ $3.5 = $17.5\n\n"
+                         "Total: $395.5\n\n"
+                         "Discounts:\n"
+                         "Nike Romaleos (10% off): -$37.8\n"
+                         "Chocolate Chips (buy 2 get 1 free): -$3.5\n"
+                         "Coupon SAVE5: -$5.0\n"
+                         "Tax 7%: $24.44\n"
+                         "Amount Due: $373.64\n")
+        self.cart.set_pricing(None)
+        self.assertIsNone(self.cart.pricing())
+        output = io.StringIO()
+        self.cart.print_total(output)
+        self.assertTrue(output.getvalue().endswith("Total: $395.5\n"))
+
+    def test_whole_dollar_cart_prints_whole_amounts(self):
+        """Test that a whole-dollar cart's breakdown stays in whole dollars where it can"""
+        cart = ShoppingCart("John Doe", "May 11, 2025")
+        cart.add_item(ItemToPurchase("Hat", 20, 1, "Wool"))
+        cart.set_pricing(PricingEngine([PercentOff(10), Coupon("SAVE1", amount=1)]))
+        output = io.StringIO()
+        cart.print_total(output)
+        self.assertTrue(output.getvalue().endswith("Total: $20\n\n"
+                                                   "Discounts:\n"
+                                                   "Hat (10% off): -$2\n"
+                                                   "Coupon SAVE1: -$1\n"
+                                                   "Amount Due: $17\n"))
+        cart.set_pricing(PricingEngine([PercentOff(12.5)]))
+        self.assertEqual(str(cart.pricing().total), "17.5")
+
+    def test_follows_catalog_prices(self):
+        """Test that catalog price changes made through another cart are priced"""
+        catalog = Catalog()
+        cart = CatalogShoppingCart(catalog=catalog)
+        cart.add_item(ItemToPurchase("Hat", 100, 2))
+        cart.set_pricing(PricingEngine([PercentOff(50)]))
+        self.assertEqual(cart.pricing().total, 100)
+        catalog.set_price("Hat", 10)
+        breakdown = cart.pricing()
+        self.assertEqual((breakdown.discount, breakdown.total), (10, 10))
+
+    def test_coupons(self):
+        """Test coupon minimums, order and the cap at the cost"""
+        engine = PricingEngine([Tax(10), Coupon("BIG", amount=1000, minimum=800), Coupon("TEN", percent=10)])
+        self.assertEqual(engine.adjustments(500_00), [("Coupon TEN", -50_00), ("Tax 10%", 45_00)])
+        self.assertEqual(engine.adjustments(1000_00),
+                         [("Coupon BIG", -1000_00)])
+        engine = PricingEngine([Coupon("MIN", amount=5, minimum=50)])
+        self.assertEqual(engine.adjustments(49_99), [])
+        self.assertEqual(engine.adjustments(50_00), [("Coupon MIN", -5_00)])
+
+    def test_follows_changes(self):
+        """Test that only changed lines are priced again, including renames and removals"""
+        pricing = CartPricing(self.cart, self.engine)
+        self.assertEqual(str(pricing.total()), "373.64")
+        priced = []
+        price_line = self.engine.price_line
+        self.engine.price_line = lambda *args: priced.append(args[0]) or price_line(*args)
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 1, "Semi-sweet"))
+        self.cart.add_item(ItemToPurchase("Hat", 20, 1, "Wool"))
+        pricing.total()
+        self.assertEqual(sorted(priced), ["Chocolate Chips", "Hat"])
+        self.assertEqual(pricing.breakdown().discount.cents, 37_80 + 7_00)
+        self.cart.find_item("Nike Romaleos").item_name = "Romaleos"
+        self.assertEqual(pricing.breakdown().discount.cents, 7_00)
+        self.cart.remove_item("Chocolate Chips")
+        self.assertEqual(pricing.breakdown().discount.cents, 0)
+        pricing.close()
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 1, "none"))
+        self.assertEqual(pricing.breakdown().discount.cents, 0)
+
+    def test_random_changes(self):
+        """Test incremental pricing against pricing from scratch on both cart layouts"""
+        rng = random.Random(24)
+        rules = [PercentOff(rng.choice([5, 12.5, 30]), [f"Item {rng.randrange(30)}"]) for _ in range(20)]
+        rules += [TieredDiscount([(3, 5), (6, 15)]), BuyXGetY(3, 1, [f"Item {i}" for i in range(10)])]
+        engine = PricingEngine(rules)
+        for cart in (ShoppingCart(), ColumnarShoppingCart()):
+            pricing = CartPricing(cart, engine)
+            for _ in range(300):
+                name = f"Item {rng.randrange(30)}"
+                action = rng.random()
+                if action < 0.5:
+                    cart.add_item(ItemToPurchase(name, rng.choice([2, 2.5, 19.99]), rng.randrange(1, 5)))
+                elif action < 0.7:
+                    cart.remove_items([name])
+                elif action < 0.9:
+                    cart.modify_items([ItemToPurchase(name, rng.randrange(0, 9), rng.randrange(0, 9))])
+                else:
+                    item = cart.find_item(name)
+                    new_name = f"Item {rng.randrange(30)}"
+                    if item is not None and new_name not in cart:
+                        item.item_name = new_name
+                if rng.random() < 0.2:
+                    self.assertEqual(pricing.breakdown().discount.cents, full_discount(engine, cart))
+            self.assertEqual(pricing.breakdown().discount.cents, full_discount(engine, cart))
+
+
+if __name__ == "__main__":
+    unittest.main()
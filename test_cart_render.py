@@ -0,0 +1,176 @@
+import io
+import unittest
+import cart_render
+from cart_catalog import Catalog, CatalogShoppingCart
+from cart_columnar import ColumnarShoppingCart
+from cart_render import ReportCache, render_descriptions, render_total, write_report
+from module8 import ItemToPurchase, ShoppingCart
+
+class CountingSink:
+    """File-like object that records each write"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+
+
+class TestRender(unittest.TestCase):
+    """Test report rendering"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+
+    def test_render_total_text(self):
+        """Test the exact text of the shopping cart report"""
+        self.assertEqual("".join(render_total(self.cart)),
+                         "John Doe's Shopping Cart - May 11, 2025\n"
+                         "Number of Items: 7\n"
+                         "\n"
+                         "Nike Romaleos 2 @ $189 = $378\n"
+                         "Chocolate Chips 5 @ $3.5 = $17.5\n"
+                         "\n"
+                         "Total: $395.5\n")
+
+    def test_render_descriptions_text(self):
+        """Test the exact text of the descriptions report"""
+        self.assertEqual("".join(render_descriptions(self.cart)),
+                         "John Doe's Shopping Cart - May 11, 2025\n"
+                         "Item Descriptions\n"
+                         "Nike Romaleos: Volt color, Weightlifting shoes\n"
+                         "Chocolate Chips: Semi-sweet\n")
+
+    def test_render_empty_cart(self):
+        """Test both reports for an empty cart"""
+        empty = ShoppingCart("Jane Doe", "May 12, 2025")
+        expected = "Jane Doe's Shopping Cart - May 12, 2025\nSHOPPING CART IS EMPTY\n"
+        self.assertEqual("".join(render_total(empty)), expected)
+        self.assertEqual("".join(render_descriptions(empty)), expected)
+
+    def test_render_is_lazy_and_chunked(self):
+        """Test that large carts are rendered in chunks of many lines"""
+        cart = ShoppingCart()
+        cart.add_items(ItemToPurchase(f"Item {i}", 1, 1, "d") for i in range(cart_render.CHUNK_LINES * 2 + 1))
+        chunks = list(render_descriptions(cart))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1].count("\n"), cart_render.CHUNK_LINES)
+        self.assertEqual(chunks[3], f"Item {cart_render.CHUNK_LINES * 2}: d\n")
+
+    def test_write_report_buffers(self):
+        """Test that write_report makes few large writes"""
+        cart = ShoppingCart()
+        cart.add_items(ItemToPurchase(f"Item {i}", 1, 1, "d") for i in range(5000))
+        sink = CountingSink()
+        write_report(render_total(cart), sink, buffer_size=16 * 1024)
+        self.assertLess(len(sink.writes), 10)
+        self.assertEqual("".join(sink.writes), "".join(render_total(cart)))
+
+    def test_print_methods_accept_file(self):
+        """Test printing reports to a file-like object"""
+        buffer = io.StringIO()
+        self.cart.print_total(file=buffer)
+        self.assertEqual(buffer.getvalue(), "".join(render_total(self.cart)))
+        buffer = io.StringIO()
+        self.cart.print_descriptions(buffer)
+        self.assertEqual(buffer.getvalue(), "".join(render_descriptions(self.cart)))
+
+
+class CountingItem(ItemToPurchase):
+    """ItemToPurchase that counts how often its quantity is read"""
+    __slots__ = ()
+    reads = 0
+
+    @property
+    def item_quantity(self):
+        CountingItem.reads += 1
+        return self._item_quantity
+
+    @item_quantity.setter
+    def item_quantity(self, value):
+        ItemToPurchase.item_quantity.fset(self, value)
+
+
+class TestReportCache(unittest.TestCase):
+    """Test caching rendered report lines between reports"""
+
+    def assert_reports_match(self, cart, cache):
+        """Helper method comparing cached reports with fresh ones"""
+        self.assertEqual("".join(cache.render_total()), "".join(render_total(cart)))
+        self.assertEqual("".join(cache.render_descriptions()), "".join(render_descriptions(cart)))
+
+    def test_reports_follow_every_change(self):
+        """Test that cached reports match fresh ones after each kind of change"""
+        for cart in (ShoppingCart("John Doe", "May 11, 2025"), ColumnarShoppingCart("John Doe", "May 11, 2025")):
+            cache = ReportCache(cart)
+            self.assert_reports_match(cart, cache)
+            cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color"))
+            cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+            self.assert_reports_match(cart, cache)
+            cart.modify_item(ItemToPurchase("Nike Romaleos", 0, 3))
+            self.assert_reports_match(cart, cache)
+            cart.find_item("Chocolate Chips").item_name = "Dark Chips"
+            cart.find_item("Dark Chips").item_description = "Dark"
+            self.assert_reports_match(cart, cache)
+            cart.remove_item("Nike Romaleos")
+            cart.customer_name = "Jane Doe"
+            self.assert_reports_match(cart, cache)
+            cache.close()
+
+    def test_only_changed_lines_are_formatted(self):
+        """Test partial re-rendering"""
+        cart = ShoppingCart()
+        cart.add_items(CountingItem(f"Item {i}", 1, 1, "d") for i in range(100))
+        cache = ReportCache(cart)
+        CountingItem.reads = 0
+        first = "".join(cache.render_total())
+        formatted = CountingItem.reads
+        self.assertGreaterEqual(formatted, 100)
+        CountingItem.reads = 0
+        self.assertEqual("".join(cache.render_total()), first)
+        self.assertEqual(CountingItem.reads, 0)
+        cart.find_item("Item 5").item_quantity = 4
+        CountingItem.reads = 0
+        second = "".join(cache.render_total())
+        self.assertEqual(CountingItem.reads, 2)
+        self.assertEqual(second, "".join(render_total(cart)))
+
+    def test_catalog_changes_invalidate(self):
+        """Test that catalog price changes reach a catalog cart's cached report"""
+        catalog = Catalog()
+        cart = CatalogShoppingCart("John Doe", "May 11, 2025", catalog)
+        cart.add_item(ItemToPurchase("Hat", 2, 1, "Red"))
+        cache = ReportCache(cart)
+        self.assert_reports_match(cart, cache)
+        catalog.set_price("Hat", 3)
+        catalog.set_description("Hat", "Blue")
+        self.assert_reports_match(cart, cache)
+
+    def test_large_carts_are_not_cached(self):
+        """Test that the cache stays bounded"""
+        cart = ShoppingCart()
+        cart.add_items(ItemToPurchase(f"Item {i}", 1, 1, "d") for i in range(20))
+        cache = ReportCache(cart, max_lines=10)
+        self.assert_reports_match(cart, cache)
+        self.assertEqual(cache._lines["total"], {})
+        self.assertEqual(cache._reports, {})
+
+    def test_cart_print_methods_use_cache(self):
+        """Test ShoppingCart.cache_reports"""
+        cart = ShoppingCart("John Doe", "May 11, 2025")
+        cart.cache_reports()
+        cart.add_item(ItemToPurchase("Hat", 2, 1, "Red"))
+        for _ in range(2):
+            buffer = io.StringIO()
+            cart.print_total(buffer)
+            self.assertEqual(buffer.getvalue(), "".join(render_total(cart)))
+        buffer = io.StringIO()
+        cart.print_descriptions(buffer)
+        self.assertEqual(buffer.getvalue(), "".join(render_descriptions(cart)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from cart_server import CartClient, CartServer, generate_load, run_command
+from module8 import ShoppingCart
+
+class TestCartServer(unittest.TestCase):
+    """Test the asyncio cart server and its client"""
+
+    def run_with_server(self, scenario, unix=False):
+        """Helper method running scenario(host, port, path) against a fresh server"""
+        async def main():
+            server_state = CartServer()
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "cart.sock") if unix else None
+                server = await server_state.start(port=0, path=path)
+                port = None if unix else server.sockets[0].getsockname()[1]
+                async with server:
+                    result = await scenario("127.0.0.1", port, path)
+                return result, server_state
+        return asyncio.run(main())
+
+    def test_run_command(self):
+        """Test running one menu option and capturing its output"""
+        cart = ShoppingCart("John Doe", "May 11, 2025")
+        self.assertEqual(run_command(cart, 'a', ["Socks", "Wool", "4", "2"]), "")
+        self.assertEqual(run_command(cart, 'r', ["Hat"]), "Item not found in cart. Nothing removed.\n")
+        self.assertEqual(run_command(cart, 'x', []), "Invalid option. Please try again.\n")
+        self.assertTrue(run_command(cart, 'a', ["Hat", "Red", "cheap", "1"]).startswith("Error: "))
+        self.assertEqual(cart.get_num_items_in_cart(), 2)
+
+    def test_session(self):
+        """Test a full session over TCP"""
+        async def scenario(host, port, path):
+            client, greeting = await CartClient.connect("John Doe", "May 11, 2025", host, port)
+            replies = [greeting]
+            replies.append(await client.send('a', "Nike Romaleos", "Volt color", "189", "2"))
+            replies.append(await client.send('c', "Nike Romaleos", "3"))
+            replies.append(await client.send('z'))
+            replies.append(await client.send('o'))
+            await client.close()
+            return replies
+
+        replies, server = self.run_with_server(scenario)
+        self.assertEqual(replies, [
+            "Customer name: John Doe\nToday's date: May 11, 2025\n",
+            "",
+            "",
+            "Invalid option. Please try again.\n",
+            "John Doe's Shopping Cart - May 11, 2025\n"
+            "Number of Items: 3\n"
+            "\n"
+            "Nike Romaleos 3 @ $189.0 = $567.0\n"
+            "\n"
+            "Total: $567.0\n",
+        ])
+        self.assertEqual(server.commands, 4)
+        self.assertEqual(server.sessions, 0)
+
+    def test_sessions_have_separate_carts_and_lines_are_escaped(self):
+        """Test two sessions over a Unix socket, with an item name starting with a dot"""
+        async def scenario(host, port, path):
+            first, _ = await CartClient.connect("Ann", "May 11, 2025", path=path)
+            second, _ = await CartClient.connect("Bob", "May 11, 2025", path=path)
+            await first.send('a', ".", "Dot", "1", "1")
+            replies = (await first.send('i'), await second.send('i'))
+            await first.close()
+            await second.close()
+            return replies
+
+        (first, second), _ = self.run_with_server(scenario, unix=True)
+        self.assertEqual(first, "Ann's Shopping Cart - May 11, 2025\nItem Descriptions\n.: Dot\n")
+        self.assertEqual(second, "Bob's Shopping Cart - May 11, 2025\nSHOPPING CART IS EMPTY\n")
+
+    def test_generate_load(self):
+        """Test the load generator against many concurrent sessions"""
+        async def scenario(host, port, path):
+            return await generate_load(50, 20, host, port)
+
+        results, server = self.run_with_server(scenario)
+        self.assertEqual(results["commands"], 1000)
+        self.assertEqual(server.commands, 1000)
+        self.assertLessEqual(results["p50"], results["p99"])
+
+
+if __name__ == "__main__":
+    unittest.main()
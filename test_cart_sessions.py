@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from cart_sessions import CartRegistry
+from module8 import ItemToPurchase
+
+class TestCartRegistry(unittest.TestCase):
+    """Test the multi-customer cart registry"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.registry = CartRegistry(self.directory.name, max_carts=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup_hits_and_misses(self):
+        """Test that the same cart comes back for the same customer"""
+        cart = self.registry.get("Alice", "May 11, 2025")
+        self.assertIs(self.registry.get("Alice"), cart)
+        self.assertEqual(cart.current_date, "May 11, 2025")
+        stats = self.registry.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["faults"]), (1, 1, 0))
+
+    def test_lru_eviction_and_fault_in(self):
+        """Test that the least recently used cart is saved and loaded back"""
+        self.registry.get("Alice").add_item(ItemToPurchase("A", 1.5, 2, "a"))
+        self.registry.get("Bob").add_item(ItemToPurchase("B", 2, 1, "b"))
+        self.registry.get("Alice")
+        self.registry.get("Carol")
+        self.assertNotIn("Bob", self.registry)
+        self.assertIn("Alice", self.registry)
+        self.assertEqual(self.registry.evictions, 1)
+        bob = self.registry.get("Bob")
+        self.assertEqual(bob.find_item("B").item_price, 2)
+        self.assertEqual(self.registry.faults, 1)
+        self.assertNotIn("Alice", self.registry)
+        alice = self.registry.get("Alice")
+        self.assertEqual(str(alice.get_cost_of_cart()), "3.0")
+
+    def test_line_budget(self):
+        """Test evicting by number of cart lines"""
+        registry = CartRegistry(self.directory.name, max_carts=None, max_lines=3)
+        registry.get("Alice").add_items(ItemToPurchase(f"A{i}", 1, 1) for i in range(2))
+        registry.get("Bob").add_items(ItemToPurchase(f"B{i}", 1, 1) for i in range(2))
+        self.assertEqual(registry.lines, 4)
+        registry.get("Bob")
+        self.assertNotIn("Alice", registry)
+        self.assertEqual(registry.lines, 2)
+        registry.get("Carol")
+        self.assertEqual(registry.stats()["carts"], 2)
+        self.assertEqual(len(registry.get("Alice")), 2)
+        self.assertEqual(registry.faults, 1)
+
+    def test_discard_and_flush(self):
+        """Test forgetting a cart and saving carts without evicting them"""
+        self.registry.get("Alice").add_item(ItemToPurchase("A", 1, 1))
+        self.registry.flush()
+        other = CartRegistry(self.directory.name)
+        self.assertEqual(len(other.get("Alice")), 1)
+        self.registry.discard("Alice")
+        self.assertEqual(len(self.registry.get("Alice")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
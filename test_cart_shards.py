@@ -0,0 +1,87 @@
+import unittest
+from cart_shards import ShardedCartEngine, shard_of
+from money import Money
+
+class TestShardedCartEngine(unittest.TestCase):
+    """Test routing cart commands to worker processes"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start one engine for all tests; each test uses its own customers"""
+        cls.engine = ShardedCartEngine(workers=3, batch_size=7)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+
+    def test_shard_of_is_stable(self):
+        """Test that a customer always maps to the same shard"""
+        self.assertEqual(shard_of("John Doe", 4), shard_of("John Doe", 4))
+        self.assertTrue(0 <= shard_of("John Doe", 4) < 4)
+
+    def test_commands_and_results(self):
+        """Test the results of each operation"""
+        results = self.engine.execute([
+            ("John Doe", "add", "Nike Romaleos", 189, 2, "Volt color"),
+            ("John Doe", "add", "Chocolate Chips", 3.5, 5, "Semi-sweet"),
+            ("John Doe", "modify", "Nike Romaleos", 0, 3),
+            ("John Doe", "remove", "Missing"),
+            ("John Doe", "modify", "Missing", 0, 1),
+            ("John Doe", "quantity"),
+            ("John Doe", "cost"),
+            ("John Doe", "report"),
+            ("John Doe", "bogus"),
+            ("John Doe", "close"),
+            ("John Doe", "quantity"),
+        ])
+        self.assertEqual(results[:7], [None, None, True, False, False, 8, Money("584.5")])
+        self.assertIn("Nike Romaleos 3 @ $189 = $567\n", results[7])
+        self.assertIsInstance(results[8], ValueError)
+        self.assertEqual(results[9:], [True, 0])
+
+    def test_only_add_opens_a_cart(self):
+        """Test that reads and misses on an unknown customer store no cart"""
+        before = self.engine.stats()["carts"]
+        results = self.engine.execute([
+            ("Nobody", "quantity"),
+            ("Nobody", "cost"),
+            ("Nobody", "report"),
+            ("Nobody", "remove", "Hat"),
+            ("Nobody", "modify", "Hat", 0, 2),
+            ("Nobody", "bogus"),
+            ("Closed", "add", "Hat", 10, 1, "d"),
+            ("Closed", "close"),
+            ("Closed", "quantity"),
+            ("Closed", "close"),
+        ])
+        self.assertEqual(results[:2], [0, Money(0)])
+        self.assertIn("SHOPPING CART IS EMPTY", results[2])
+        self.assertEqual(results[3:5], [False, False])
+        self.assertIsInstance(results[5], ValueError)
+        self.assertEqual(results[6:], [None, True, 0, False])
+        self.assertEqual(self.engine.stats()["carts"], before)
+
+    def test_results_keep_command_order_across_shards_and_batches(self):
+        """Test many customers with more commands than one batch"""
+        customers = [f"Order {n}" for n in range(20)]
+        for customer in customers:
+            for i in range(5):
+                self.engine.submit(customer, "add", f"Item {i}", 2, i + 1, "d")
+        self.engine.flush()
+        results = self.engine.execute([(customer, "quantity") for customer in customers])
+        self.assertEqual(results, [15] * 20)
+
+    def test_stats_across_shards(self):
+        """Test gathering totals from every shard"""
+        before = self.engine.stats()
+        self.engine.submit("Revenue A", "add", "Hat", 10, 2, "d")
+        self.engine.submit("Revenue B", "add", "Hat", 2.25, 1, "d")
+        after = self.engine.stats()
+        self.assertEqual(after["carts"] - before["carts"], 2)
+        self.assertEqual(after["quantity"] - before["quantity"], 3)
+        self.assertEqual((after["revenue"] - before["revenue"]).cents, 2225)
+        self.assertEqual(self.engine.total_revenue(), after["revenue"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from cart_columnar import ColumnarShoppingCart
+from cart_snapshot import CartSnapshot, SnapshotError, load_cart, save_cart
+from module8 import ItemToPurchase, ShoppingCart
+
+class TestSnapshot(unittest.TestCase):
+    """Test saving and loading cart snapshots"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cart.snap")
+        self.cart = ShoppingCart("Jöhn Doe", "May 11, 2025")
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 189, 2, "Volt color, Weightlifting shoes"))
+        self.cart.add_item(ItemToPurchase("Chocolate Chips", 3.5, 5, "Semi-sweet"))
+        self.cart.add_item(ItemToPurchase("Dark Chips", 4.25, 1, "Semi-sweet"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test that a saved cart loads back with the same lines and totals"""
+        save_cart(self.cart, self.path)
+        loaded = load_cart(self.path)
+        self.assertEqual(loaded.customer_name, "Jöhn Doe")
+        self.assertEqual(loaded.current_date, "May 11, 2025")
+        self.assertEqual([(i.item_name, str(i.item_price), i.item_quantity, i.item_description)
+                          for i in loaded],
+                         [(i.item_name, str(i.item_price), i.item_quantity, i.item_description)
+                          for i in self.cart])
+        self.assertEqual(loaded.get_num_items_in_cart(), 8)
+        self.assertEqual(str(loaded.get_cost_of_cart()), str(self.cart.get_cost_of_cart()))
+
+    def test_lazy_snapshot(self):
+        """Test reading totals and single lines without loading the cart"""
+        save_cart(self.cart, self.path, stamp=42)
+        with CartSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.stamp, 42)
+            self.assertEqual(len(snapshot), 3)
+            self.assertEqual(snapshot.get_num_items_in_cart(), 8)
+            self.assertEqual(str(snapshot.get_cost_of_cart()), "399.75")
+            self.assertEqual(snapshot[1].item_name, "Chocolate Chips")
+            self.assertEqual(snapshot.find_item("Dark Chips").item_price, 4.25)
+            self.assertIsNone(snapshot.find_item("Missing"))
+            with self.assertRaises(IndexError):
+                snapshot.line(3)
+
+    def test_empty_cart_and_columnar_cart(self):
+        """Test saving an empty cart and loading into a columnar cart"""
+        save_cart(ShoppingCart(), self.path)
+        self.assertEqual(len(load_cart(self.path)), 0)
+        save_cart(self.cart, self.path)
+        loaded = load_cart(self.path, ColumnarShoppingCart)
+        self.assertIsInstance(loaded, ColumnarShoppingCart)
+        self.assertEqual(loaded.get_cost_of_cart(), self.cart.get_cost_of_cart())
+
+    def test_not_a_snapshot(self):
+        """Test that other files are rejected"""
+        with open(self.path, "wb") as file:
+            file.write(b"x" * 100)
+        with self.assertRaises(SnapshotError):
+            CartSnapshot(self.path)
+        for data in (b"", b"CART"):
+            with open(self.path, "wb") as file:
+                file.write(data)
+            with self.assertRaises(SnapshotError):
+                CartSnapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import io
 import sys
 import unittest
 from unittest.mock import patch
-from module8 import ItemToPurchase, ShoppingCart, print_menu, main
+from module8 import ItemToPurchase, ShoppingCart, batch_main, print_menu, main, run_batch
 
 class TestItemToPurchase(unittest.TestCase):
     """Test the ItemToPurchase class functionality"""
@@ -84,11 +84,78 @@ class TestShoppingCart(unittest.TestCase):
         names = [item.item_name for item in self.cart.cart_items]
         self.assertNotIn("Nike Romaleos", names)
     
+    def test_cart_items_is_read_only_view(self):
+        """Test that cart_items follows the cart and cannot be changed directly"""
+        items = self.cart.cart_items
+        with self.assertRaises(AttributeError):
+            items.append(ItemToPurchase("Hat", 20, 1))
+        with self.assertRaises(AttributeError):
+            items.clear()
+        with self.assertRaises(TypeError):
+            items[0] = ItemToPurchase("Hat", 20, 1)
+        self.cart.add_item(ItemToPurchase("Hat", 20, 1))
+        self.assertEqual(len(items), 3)
+        self.assertEqual([items[0].item_name, items[-1].item_name], ["Nike Romaleos", "Hat"])
+        self.assertEqual([item.item_name for item in items[1:]], ["Chocolate Chips", "Hat"])
+        with self.assertRaises(IndexError):
+            items[3]
+
+    def test_items_share_prices(self):
+        """Test that items with equal prices keep one Money between them"""
+        first = ItemToPurchase("Hat", 20, 1)
+        second = ItemToPurchase("Cap", 20, 2)
+        self.assertIs(first.item_price, second.item_price)
+        second.item_price = 15
+        self.assertEqual((str(first.item_price), str(second.item_price)), ("20", "15"))
+
+    def test_cart_items_indexing_and_slicing(self):
+        """Test that every index and slice of cart_items matches a list, on every layout"""
+        from cart_catalog import Catalog, CatalogShoppingCart
+        from cart_columnar import ColumnarShoppingCart
+        from cart_concurrent import ConcurrentShoppingCart
+        for cart in (ShoppingCart(), ColumnarShoppingCart(), CatalogShoppingCart(catalog=Catalog()),
+                     ConcurrentShoppingCart()):
+            cart.add_items(ItemToPurchase(f"Item {i}", 1, 1) for i in range(7))
+            names = [f"Item {i}" for i in range(7)]
+            items = cart.cart_items
+            self.assertEqual([item.item_name for item in reversed(cart)], names[::-1])
+            for index in range(-7, 7):
+                self.assertEqual(items[index].item_name, names[index])
+            bounds = [None, -9, -7, -3, -1, 0, 1, 3, 6, 7, 9]
+            for start in bounds:
+                for stop in bounds:
+                    for step in (None, 1, 2, 3, -1, -2, -4):
+                        self.assertEqual([item.item_name for item in items[start:stop:step]],
+                                         names[start:stop:step])
+
     def test_remove_item_not_found(self):
         """Test that proper message is displayed when removing non-existent item"""
         output = self.capture_output(self.cart.remove_item, "NonExistentItem")
         self.assertIn("Item not found in cart. Nothing removed.", output)
     
+    def test_add_duplicate_name_merges_quantity(self):
+        """Test that adding an item name already in the cart adds to its quantity"""
+        self.cart.add_item(ItemToPurchase("Nike Romaleos", 150, 1, "Other description"))
+        self.assertEqual(len(self.cart.cart_items), 2)
+        item = self.cart.find_item("Nike Romaleos")
+        self.assertEqual(item.item_quantity, 3)
+        self.assertEqual(item.item_price, 189)
+        self.assertEqual(item.item_description, "Volt color, Weightlifting shoes")
+
+    def test_find_item(self):
+        """Test looking up items by name"""
+        self.assertIs(self.cart.find_item("Chocolate Chips"), self.item2)
+        self.assertIsNone(self.cart.find_item("NonExistentItem"))
+        self.assertIn("Nike Romaleos", self.cart)
+        self.assertEqual(len(self.cart), 2)
+
+    def test_remove_item_keeps_order(self):
+        """Test that removing an item keeps the remaining items in insertion order"""
+        self.cart.add_item(ItemToPurchase("Powerbeats", 128, 1, "Bluetooth headphones"))
+        self.assertTrue(self.cart.remove_item("Chocolate Chips"))
+        names = [item.item_name for item in self.cart.cart_items]
+        self.assertEqual(names, ["Nike Romaleos", "Powerbeats"])
+
     def test_modify_item_found(self):
         """Test modifying an existing item in the cart"""
         modified_item = ItemToPurchase("Nike Romaleos", 200, 3, "none")
@@ -119,6 +186,114 @@ class TestShoppingCart(unittest.TestCase):
         # (2 * $189) + (5 * $3) = $378 + $15 = $393
         self.assertEqual(self.cart.get_cost_of_cart(), 393)
     
+    def test_totals_follow_cart_changes(self):
+        """Test that running totals are updated by add, remove and modify"""
+        self.cart.add_item(ItemToPurchase("Powerbeats", 128, 1, "Bluetooth headphones"))
+        self.cart.modify_item(ItemToPurchase("Chocolate Chips", 4, 10, "none"))
+        self.cart.remove_item("Nike Romaleos")
+        self.assertEqual(self.cart.get_num_items_in_cart(), 11)
+        self.assertEqual(self.cart.get_cost_of_cart(), 128 + 40)
+
+    def test_totals_follow_direct_attribute_writes(self):
+        """Test that writing an item's attributes directly updates the cart totals"""
+        self.item1.item_quantity = 1
+        self.item2.item_price = 2
+        self.assertEqual(self.cart.get_num_items_in_cart(), 6)
+        self.assertEqual(self.cart.get_cost_of_cart(), 189 + 10)
+
+    def test_removed_item_no_longer_updates_totals(self):
+        """Test that an item removed from the cart stops affecting its totals"""
+        self.cart.remove_item("Chocolate Chips")
+        self.item2.item_quantity = 100
+        self.assertEqual(self.cart.get_num_items_in_cart(), 2)
+        self.assertEqual(self.cart.get_cost_of_cart(), 378)
+
+    def test_item_added_to_second_cart_is_copied(self):
+        """Test that an item already in one cart is added to another as a copy"""
+        other = ShoppingCart("Jane Doe", "May 12, 2025")
+        other.add_item(self.item1)
+        self.assertIsNot(other.find_item("Nike Romaleos"), self.item1)
+        self.item1.item_quantity = 10
+        self.assertEqual(other.get_num_items_in_cart(), 2)
+        self.assertEqual(self.cart.get_num_items_in_cart(), 15)
+
+    def test_rename_item_in_cart(self):
+        """Test that renaming an item re-keys it and keeps its place"""
+        self.item1.item_name = "Romaleos 4"
+        self.assertIs(self.cart.find_item("Romaleos 4"), self.item1)
+        self.assertNotIn("Nike Romaleos", self.cart)
+        names = [item.item_name for item in self.cart.cart_items]
+        self.assertEqual(names, ["Romaleos 4", "Chocolate Chips"])
+        with self.assertRaises(ValueError):
+            self.item1.item_name = "Chocolate Chips"
+
+    def test_cost_of_cart_is_exact(self):
+        """Test that the cart total does not drift with decimal prices"""
+        cart = ShoppingCart()
+        for i in range(10):
+            cart.add_item(ItemToPurchase(f"Item {i}", 0.1, 1))
+        cart.remove_item("Item 0")
+        self.assertEqual(str(cart.get_cost_of_cart()), "0.9")
+        for i in range(1, 10):
+            cart.remove_item(f"Item {i}")
+        self.assertEqual(str(cart.get_cost_of_cart()), "0")
+
+    def test_add_items(self):
+        """Test adding a batch of items, including a duplicate name"""
+        result = self.cart.add_items([
+            ItemToPurchase("Powerbeats", 128, 1, "Bluetooth headphones"),
+            ItemToPurchase("Chocolate Chips", 3, 5, "none"),
+        ])
+        self.assertEqual(result.applied, 2)
+        self.assertEqual(result.missing, [])
+        self.assertEqual(len(self.cart), 3)
+        self.assertEqual(self.cart.get_num_items_in_cart(), 13)
+        self.assertEqual(self.cart.get_cost_of_cart(), 378 + 30 + 128)
+
+    def test_remove_items_reports_missing(self):
+        """Test that a batch removal reports missing names instead of printing"""
+        output = self.capture_output(self.cart.remove_items, ["Nike Romaleos", "X", "Y"])
+        self.assertEqual(output, "")
+        result = self.cart.remove_items(["Chocolate Chips", "Z"])
+        self.assertEqual(result.applied, 1)
+        self.assertEqual(result.missing, ["Z"])
+        self.assertEqual(len(self.cart), 0)
+        self.assertEqual(self.cart.get_cost_of_cart(), 0)
+
+    def test_modify_items(self):
+        """Test modifying a batch of items with missing names"""
+        result = self.cart.modify_items([
+            ItemToPurchase("Nike Romaleos", 200, 0, "none"),
+            ItemToPurchase("Chocolate Chips", 0, 1, "Dark"),
+            ItemToPurchase("X", 1, 1, "none"),
+        ])
+        self.assertEqual(result.applied, 2)
+        self.assertEqual(result.missing, ["X"])
+        self.assertEqual(self.item1.item_price, 200)
+        self.assertEqual(self.item1.item_quantity, 2)
+        self.assertEqual(self.item2.item_description, "Dark")
+        self.assertEqual(self.cart.get_num_items_in_cart(), 3)
+        self.assertEqual(self.cart.get_cost_of_cart(), 403)
+
+    def test_listeners_hear_every_change(self):
+        """Test that listeners are told about adds, removes and updates"""
+        events = []
+        self.cart.add_listener(lambda cart, event, item, changes:
+                               events.append((event, item.item_name, changes)))
+        self.cart.add_item(ItemToPurchase("Powerbeats", 128, 1, "Bluetooth headphones"))
+        self.cart.add_item(ItemToPurchase("Powerbeats", 128, 2))
+        self.cart.modify_item(ItemToPurchase("Nike Romaleos", 200, 0, "Black"))
+        self.item2.item_description = "Dark"
+        self.cart.remove_item("Chocolate Chips")
+        self.assertEqual(events, [
+            ("add", "Powerbeats", None),
+            ("update", "Powerbeats", (("item_quantity", 1),)),
+            ("update", "Nike Romaleos", (("item_description", "Volt color, Weightlifting shoes"),
+                                         ("item_price", 189))),
+            ("update", "Chocolate Chips", (("item_description", "Semi-sweet"),)),
+            ("remove", "Chocolate Chips", None),
+        ])
+
     def test_print_total_with_items(self):
         """Test printing the cart total with items"""
         output = self.capture_output(self.cart.print_total)
@@ -233,6 +408,72 @@ class TestMenuFunctionality(unittest.TestCase):
         self.assertIn("Invalid option", captured_output.getvalue())
 
 
+class TestBatchMode(unittest.TestCase):
+    """Test running menu commands from a stream without prompting"""
+
+    def setUp(self):
+        """Set up test fixtures before each test"""
+        self.cart = ShoppingCart("Test User", "May 11, 2025")
+
+    def test_run_batch(self):
+        """Test that batch commands change the cart and only reports are written"""
+        commands = io.StringIO("a\nItem1\nDesc1\n5\n1\n"
+                               "a\nItem2\nDesc2\n2.5\n2\n"
+                               "c\nItem1\n3\n"
+                               "r\nItem2\n"
+                               "r\nMissing\n"
+                               "x\n"
+                               "i\n"
+                               "q\n"
+                               "o\n")
+        output = io.StringIO()
+        count = run_batch(self.cart, commands, output)
+        self.assertEqual(count, 6)
+        self.assertEqual(self.cart.find_item("Item1").item_quantity, 3)
+        self.assertNotIn("Item2", self.cart)
+        self.assertEqual(output.getvalue(),
+                         "Item not found in cart. Nothing removed.\n"
+                         "Invalid option. Please try again.\n"
+                         "Test User's Shopping Cart - May 11, 2025\n"
+                         "Item Descriptions\n"
+                         "Item1: Desc1\n")
+
+    def test_run_batch_reports_bad_values(self):
+        """Test that a bad value is reported and the remaining commands still run"""
+        commands = ["r", "Missing", "o", "a", "Hat", "d", "abc", "1",
+                    "a", "Cap", "d", "4", "x", "o"]
+        output = io.StringIO()
+        self.assertEqual(run_batch(self.cart, commands, output), 5)
+        self.assertEqual(output.getvalue(),
+                         "Item not found in cart. Nothing removed.\n"
+                         "Test User's Shopping Cart - May 11, 2025\n"
+                         "SHOPPING CART IS EMPTY\n"
+                         "Error: invalid money amount: 'abc'\n"
+                         "Error: invalid literal for int() with base 10: 'x'\n"
+                         "Test User's Shopping Cart - May 11, 2025\n"
+                         "SHOPPING CART IS EMPTY\n")
+
+        output = io.StringIO()
+        with self.assertRaises(KeyboardInterrupt):
+            run_batch(self.cart, iter_then_raise(["r", "Missing"]), output)
+        self.assertEqual(output.getvalue(), "Item not found in cart. Nothing removed.\n")
+
+    def test_batch_main(self):
+        """Test that batch_main reads the customer details and ends at end of input"""
+        output = io.StringIO()
+        cart = batch_main(["John Smith\n", "May 11, 2025\n", "a\n", "Item1\n", "Desc1\n",
+                           "5\n", "1\n", "o\n"], output)
+        self.assertEqual(cart.customer_name, "John Smith")
+        self.assertIn("Customer name: John Smith", output.getvalue())
+        self.assertIn("Item1 1 @ $5.0 = $5.0", output.getvalue())
+
+
+def iter_then_raise(lines):
+    """Yields lines, then raises KeyboardInterrupt as if the replay were stopped"""
+    yield from lines
+    raise KeyboardInterrupt
+
+
 class TestMainFunction(unittest.TestCase):
     """Test the main function with simulated user input"""
     
@@ -0,0 +1,94 @@
+import unittest
+from decimal import Decimal
+from money import Money, parse_price
+
+class TestMoney(unittest.TestCase):
+    """Test the Money class"""
+
+    def test_conversions(self):
+        """Test converting ints, floats, strings and Decimals to cents"""
+        self.assertEqual(Money(189).cents, 18900)
+        self.assertEqual(Money(10.99).cents, 1099)
+        self.assertEqual(Money("0.07").cents, 7)
+        self.assertEqual(Money(Decimal("3.5")).cents, 350)
+        self.assertEqual(Money(Money(2)).cents, 200)
+
+    def test_rounds_half_up(self):
+        """Test that amounts are rounded half-up to the nearest cent"""
+        self.assertEqual(Money(1.005).cents, 101)
+        self.assertEqual(Money("2.675").cents, 268)
+        self.assertEqual(Money("-1.005").cents, -101)
+
+    def test_invalid_amounts(self):
+        """Test that bad amounts raise the same errors as float() and int()"""
+        with self.assertRaises(ValueError):
+            Money("abc")
+        with self.assertRaises(ValueError):
+            Money("inf")
+        with self.assertRaises(TypeError):
+            Money(None)
+
+    def test_prints_like_the_original_number(self):
+        """Test that Money prints the way ints and floats used to"""
+        self.assertEqual(str(Money(189)), "189")
+        self.assertEqual(str(Money(5.0)), "5.0")
+        self.assertEqual(str(Money(10.99)), "10.99")
+        self.assertEqual(str(Money(10.5)), "10.5")
+        self.assertEqual(str(Money(189) * 2), "378")
+        self.assertEqual(str(Money(10.99) * 2), "21.98")
+        self.assertEqual(str(Money(-0.05)), "-0.05")
+        self.assertEqual(f"{Money(3):.2f}", "3.00")
+
+    def test_no_float_drift(self):
+        """Test that sums are exact where floats drift"""
+        self.assertNotEqual(0.1 + 0.2, 0.3)
+        self.assertEqual(Money(0.1) + Money(0.2), Money(0.3))
+        total = sum(Money(0.01) for _ in range(1000))
+        self.assertEqual(total.cents, 1000)
+        self.assertEqual(str(total), "10.0")
+
+    def test_compares_with_numbers(self):
+        """Test equality, ordering and hashing against ints and floats"""
+        self.assertEqual(Money(9.99), 9.99)
+        self.assertEqual(Money(200), 200)
+        self.assertNotEqual(Money(0), 1)
+        self.assertLess(Money(1), 1.5)
+        self.assertEqual(hash(Money(9.99)), hash(9.99))
+        self.assertEqual(hash(Money(5.0)), hash(5))
+        self.assertFalse(Money(0))
+
+    def test_ordering_agrees_with_equality(self):
+        """Test that amounts between two cents are not rounded before comparing"""
+        price = Money(10.99)
+        self.assertTrue(price < 10.994)
+        self.assertTrue(price <= 10.994)
+        self.assertFalse(price == 10.994)
+        self.assertFalse(price > 10.994)
+        self.assertTrue(price > 10.986)
+        self.assertFalse(price < 10.99)
+        self.assertTrue(price >= 10.99)
+        self.assertTrue(Money(3) < 3.001)
+        self.assertFalse(Money(3) < 3)
+
+    def test_total(self):
+        """Test the fast line-total path"""
+        prices = [Money(189), Money(3)]
+        self.assertEqual(Money.total(prices, [2, 5]), 393)
+        self.assertTrue(Money.total(prices, [2, 5]).whole)
+        self.assertEqual(str(Money.total([Money(0.1)] * 3, [1, 1, 1])), "0.3")
+
+    def test_shared(self):
+        """Test that equal amounts printed alike share one Money"""
+        self.assertIs(Money.shared(189), Money.shared(Money(189)))
+        self.assertIsNot(Money.shared(189), Money.shared(189.0))
+        self.assertEqual(str(Money.shared(189.0)), "189.0")
+        self.assertIs(Money.shared("10.99"), Money.shared(10.99))
+
+    def test_parse_price(self):
+        """Test parsing prices typed at the menu"""
+        self.assertEqual(str(parse_price("5")), "5.0")
+        self.assertEqual(parse_price(" 10.99\n").cents, 1099)
+
+
+if __name__ == "__main__":
+    unittest.main()